@@ -1,10 +1,25 @@
 import logging
+import os
 
 from src.common.rc_code import RcCode
 
 
+# The level of the loggers, e.g. CONSOLE_SERVER_LOG_LEVEL=DEBUG enables the payload traces of the serial ports and the
+# sockets. The payload traces are in the hot path, so they are disabled by default.
+LOG_LEVEL_ENV = "CONSOLE_SERVER_LOG_LEVEL"
+DEFAULT_LOG_LEVEL = logging.INFO
+
+
+def get_log_level():
+    log_level = logging.getLevelName(os.environ.get(LOG_LEVEL_ENV, "").upper())
+    if not isinstance(log_level, int):
+        return DEFAULT_LOG_LEVEL
+    return log_level
+
+
 class LoggerSystem:
-    def __init__(self, loger_name):
+    def __init__(self, loger_name, log_level=None):
+        self._log_level = log_level if log_level is not None else get_log_level()
         self._file_handler = None
         self._screen_handler = None
         self._formatter = None
@@ -24,7 +39,7 @@ class LoggerSystem:
         self._file_handler.setLevel(logging.DEBUG)
         self._file_handler.setFormatter(self._formatter)
 
-        self._logger.setLevel(logging.DEBUG)
+        self._logger.setLevel(self._log_level)
 
         self._logger.addHandler(self._screen_handler)
         self._logger.addHandler(self._file_handler)
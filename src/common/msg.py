@@ -4,12 +4,20 @@ from src.console_server.processing.console_server_definition import ConsoleServe
 
 
 class Msg:
-    def __init__(self, request=None, serial_port_id=None, socket_fd=None, exec_user=None, data=None):
+    def __init__(self, request=None, serial_port_id=None, socket_fd=None, exec_user=None, data=None, request_id=None,
+                 connection_id=None):
         self.request = request
         self.serial_port_id = serial_port_id
         self.socket_fd = socket_fd
         self.exec_user = exec_user
         self.data = data
+        # The correlation ID of the request. The reply carries the same ID, so a client can send several requests on
+        # one connection and match the replies which may come back out of order.
+        self.request_id = request_id
+        # The ID of the client connection which the console server sends the request for. The fd of a closed client is
+        # reused by the next client, so the reply of the handler is dropped if the connection ID is changed. The ID is
+        # only passed between the console server and the handlers, and it is not sent to the client.
+        self.connection_id = connection_id
 
     def set_msg(self, msg_dict):
         try:
@@ -20,23 +28,28 @@ class Msg:
             self.data = msg_dict["data"]
         except KeyError:
             return RcCode.INVALID_VALUE
+        # The request ID is optional for the clients which do not pipeline the requests
+        self.request_id = msg_dict.get("request_id")
         return RcCode.SUCCESS
     
     def get_msg(self):
         return RcCode.SUCCESS, {
             "request": self.request, "serial_port_id": self.serial_port_id,
-            "socket_fd": self.socket_fd, "exec_user": self.exec_user, "data": self.data
+            "socket_fd": self.socket_fd, "exec_user": self.exec_user, "data": self.data,
+            "request_id": self.request_id
         }
 
 
 class RequestMsg(Msg):
-    def __init__(self, request=None, serial_port_id=None, socket_fd=None, exec_user=None, data=None):
-        Msg.__init__(self, request, serial_port_id, socket_fd, exec_user, data)
+    def __init__(self, request=None, serial_port_id=None, socket_fd=None, exec_user=None, data=None, request_id=None,
+                 connection_id=None):
+        Msg.__init__(self, request, serial_port_id, socket_fd, exec_user, data, request_id, connection_id)
 
     def serialize(self):
         msg_str = json.dumps({
             "request": self.request, "serial_port_id": self.serial_port_id,
-            "socket_fd": self.socket_fd, "exec_user": self.exec_user, "data": self.data
+            "socket_fd": self.socket_fd, "exec_user": self.exec_user, "data": self.data,
+            "request_id": self.request_id, "connection_id": self.connection_id
         })
         return RcCode.SUCCESS, msg_str
 
@@ -47,6 +60,8 @@ class RequestMsg(Msg):
         self.socket_fd = msg_dict["socket_fd"]
         self.exec_user = msg_dict["exec_user"]
         self.data = msg_dict["data"]
+        self.request_id = msg_dict.get("request_id")
+        self.connection_id = msg_dict.get("connection_id")
         return RcCode.SUCCESS
 
 class ConnectSerialPortRequest(RequestMsg):
@@ -61,6 +76,10 @@ class GetPortStatusRequest(RequestMsg):
     def __init__(self, exec_user, serial_port_id=None):
         RequestMsg.__init__(self, ConsoleServerEvent.GET_PORT_STATUS, serial_port_id, None, exec_user)
 
+class GetPortCountersRequest(RequestMsg):
+    def __init__(self, exec_user, serial_port_id):
+        RequestMsg.__init__(self, ConsoleServerEvent.GET_PORT_COUNTERS, serial_port_id, None, exec_user)
+
 class SetAliasNameRequest(RequestMsg):
     def __init__(self, exec_user, serial_port_id, alias_name):
         RequestMsg.__init__(self, ConsoleServerEvent.SET_ALIAS_NAME, serial_port_id, None, exec_user, {"alias_name": alias_name})
@@ -143,9 +162,28 @@ class PortLeaveGroupRequest(RequestMsg):
     def __init__(self, exec_user, serial_port_id, group_name):
         RequestMsg.__init__(self, ConsoleServerEvent.PORT_LEAVE_GROUP, serial_port_id, None, exec_user, {"group_name": group_name})
 
+class GetPermissionMatrixRequest(RequestMsg):
+    def __init__(self, exec_user):
+        RequestMsg.__init__(self, ConsoleServerEvent.GET_PERMISSION_MATRIX, None, None, exec_user)
+
+class BatchRequest(RequestMsg):
+    def __init__(self, exec_user, operation_list=None):
+        RequestMsg.__init__(self, ConsoleServerEvent.BATCH, None, None, exec_user, {"operations": []})
+        if operation_list is not None:
+            for operation in operation_list:
+                self.add_operation(operation)
+
+    def add_operation(self, operation):
+        # The operation is a request or the dictionary of the request name, the serial port ID and the data
+        if isinstance(operation, Msg):
+            operation = {"request": operation.request, "serial_port_id": operation.serial_port_id, "data": operation.data}
+        self.data["operations"].append(operation)
+        return RcCode.SUCCESS
+
 class ReplyMsg(Msg):
-    def __init__(self, request=None, serial_port_id=None, socket_fd=None, exec_user=None, data=None, result=None):
-        Msg.__init__(self, request, serial_port_id, socket_fd, exec_user, data)
+    def __init__(self, request=None, serial_port_id=None, socket_fd=None, exec_user=None, data=None, result=None,
+                 request_id=None, connection_id=None):
+        Msg.__init__(self, request, serial_port_id, socket_fd, exec_user, data, request_id, connection_id)
         self.result = result
 
     def set_msg(self, msg_dict):
@@ -169,7 +207,7 @@ class ReplyMsg(Msg):
         sg_str = json.dumps({
             "request": self.request, "serial_port_id": self.serial_port_id,
             "socket_fd": self.socket_fd, "exec_user": self.exec_user, "data": self.data,
-            "result": self.result
+            "result": self.result, "request_id": self.request_id, "connection_id": self.connection_id
         })
         return RcCode.SUCCESS, sg_str
 
@@ -181,6 +219,8 @@ class ReplyMsg(Msg):
         self.data = msg_dict["data"]
         self.exec_user = msg_dict["exec_user"]
         self.result = msg_dict["result"]
+        self.request_id = msg_dict.get("request_id")
+        self.connection_id = msg_dict.get("connection_id")
         return RcCode.SUCCESS
 
 
@@ -193,6 +233,8 @@ def msg_deserialize(msg_str):
     return RcCode.SUCCESS, msg_dict
 
 def check_all_required_parameter(msg, key_list, required_exec_user=True, required_socket_fd=False, required_serial_port_id=False):
+    if len(key_list) > 0 and not isinstance(msg.data, dict):
+        return False
     for key in key_list:
         if key not in msg.data:
             return False
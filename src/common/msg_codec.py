@@ -0,0 +1,130 @@
+import json
+import struct
+from enum import IntEnum
+
+from src.common.rc_code import RcCode
+
+
+class MsgCodec(IntEnum):
+    JSON = 0
+    BINARY = 1
+
+
+# The first byte of a binary message. A JSON message always starts with "{", so the codec of a connection is detected
+# from the first message sent by the client.
+MSG_CODEC_MAGIC = 0xC5
+MSG_CODEC_VERSION = 1
+
+# The header of a binary message: magic, version, field flags, serial port ID, socket fd, request ID, and the sizes of
+# the request, the user, the result and the data which follow the header in order
+_MSG_HEADER = struct.Struct("<BBBiiIHHHI")
+_MSG_FIELD_SERIAL_PORT_ID = 0x01
+_MSG_FIELD_SOCKET_FD = 0x02
+_MSG_FIELD_EXEC_USER = 0x04
+_MSG_FIELD_RESULT = 0x08
+_MSG_FIELD_DATA = 0x10
+_MSG_FIELD_DATA_EMPTY = 0x20
+_MSG_FIELD_REQUEST_ID = 0x40
+
+# The data is a nested structure. It is encoded by the C encoder of JSON without the spaces, which is faster than
+# walking it in Python.
+_DATA_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def _encode_str(value):
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return json.dumps(value).encode("utf-8")
+
+
+def msg_encode(msg_dict, codec):
+    if codec == MsgCodec.JSON:
+        return RcCode.SUCCESS, json.dumps(msg_dict).encode("utf-8")
+
+    try:
+        # The fields which are None are not sent. The flags tell which fields exist.
+        flags = 0
+        serial_port_id = msg_dict.get("serial_port_id")
+        if serial_port_id is not None:
+            flags = flags | _MSG_FIELD_SERIAL_PORT_ID
+        socket_fd = msg_dict.get("socket_fd")
+        if socket_fd is not None:
+            flags = flags | _MSG_FIELD_SOCKET_FD
+        request_id = msg_dict.get("request_id")
+        if request_id is not None:
+            flags = flags | _MSG_FIELD_REQUEST_ID
+        request = _encode_str(msg_dict.get("request", ""))
+        exec_user = msg_dict.get("exec_user")
+        if exec_user is not None:
+            flags = flags | _MSG_FIELD_EXEC_USER
+            exec_user = _encode_str(exec_user)
+        else:
+            exec_user = b""
+        result = msg_dict.get("result")
+        if result is not None:
+            flags = flags | _MSG_FIELD_RESULT
+            result = _encode_str(result)
+        else:
+            result = b""
+        data = msg_dict.get("data")
+        if data is None:
+            data = b""
+        elif data == {}:
+            flags = flags | _MSG_FIELD_DATA_EMPTY
+            data = b""
+        else:
+            flags = flags | _MSG_FIELD_DATA
+            data = _DATA_ENCODER.encode(data).encode("utf-8")
+
+        header = _MSG_HEADER.pack(MSG_CODEC_MAGIC, MSG_CODEC_VERSION, flags,
+                                  serial_port_id if serial_port_id is not None else 0,
+                                  socket_fd if socket_fd is not None else 0,
+                                  request_id if request_id is not None else 0,
+                                  len(request), len(exec_user), len(result), len(data))
+    except (TypeError, ValueError, struct.error):
+        return RcCode.INVALID_TYPE, None
+    return RcCode.SUCCESS, b"".join((header, request, exec_user, result, data))
+
+
+def msg_decode(data):
+    # Detect the codec by the first byte
+    if not data:
+        return RcCode.INVALID_VALUE, None, None
+    if data[0] != MSG_CODEC_MAGIC:
+        try:
+            return RcCode.SUCCESS, MsgCodec.JSON, json.loads(data)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return RcCode.INVALID_VALUE, MsgCodec.JSON, None
+
+    try:
+        _, version, flags, serial_port_id, socket_fd, request_id, request_len, exec_user_len, result_len, data_len = \
+            _MSG_HEADER.unpack_from(data, 0)
+        if version != MSG_CODEC_VERSION:
+            return RcCode.INVALID_VALUE, MsgCodec.BINARY, None
+        pos = _MSG_HEADER.size
+        if pos + request_len + exec_user_len + result_len + data_len != len(data):
+            return RcCode.INVALID_VALUE, MsgCodec.BINARY, None
+
+        msg_dict = {
+            "request": str(data[pos:pos + request_len], "utf-8"),
+            "serial_port_id": serial_port_id if flags & _MSG_FIELD_SERIAL_PORT_ID else None,
+            "socket_fd": socket_fd if flags & _MSG_FIELD_SOCKET_FD else None,
+            "exec_user": None,
+            "data": None,
+            "result": None,
+            "request_id": request_id if flags & _MSG_FIELD_REQUEST_ID else None
+        }
+        pos = pos + request_len
+        if flags & _MSG_FIELD_EXEC_USER:
+            msg_dict["exec_user"] = str(data[pos:pos + exec_user_len], "utf-8")
+        pos = pos + exec_user_len
+        if flags & _MSG_FIELD_RESULT:
+            msg_dict["result"] = str(data[pos:pos + result_len], "utf-8")
+        pos = pos + result_len
+        if flags & _MSG_FIELD_DATA:
+            msg_dict["data"] = json.loads(data[pos:pos + data_len])
+        elif flags & _MSG_FIELD_DATA_EMPTY:
+            msg_dict["data"] = {}
+    except (ValueError, UnicodeDecodeError, struct.error):
+        return RcCode.INVALID_VALUE, MsgCodec.BINARY, None
+    return RcCode.SUCCESS, MsgCodec.BINARY, msg_dict
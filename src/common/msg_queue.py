@@ -1,5 +1,10 @@
+import os
+import pickle
 import queue
-from multiprocessing import Queue
+import select
+import struct
+import time
+from multiprocessing import Queue, shared_memory
 
 from src.common.logger_system import LoggerSystem
 from src.common.rc_code import RcCode
@@ -38,6 +43,13 @@ class BiMsgQueue:
             return RcCode.QUEUE_FULL
         return RcCode.SUCCESS
     
+    def local_peer_receive_fd_get(self):
+        # The fd becomes readable when the remote peer sends a message to the local peer
+        try:
+            return RcCode.SUCCESS, self._rx_queue._reader.fileno()
+        except OSError:
+            return RcCode.FAILURE, None
+
     def local_peer_receive_msg(self):
         try:
             msg = self._rx_queue.get(self._rx_blocking, self._rx_timeout)
@@ -52,9 +64,201 @@ class BiMsgQueue:
             return RcCode.QUEUE_FULL
         return RcCode.SUCCESS
     
+    def remote_peer_receive_fd_get(self):
+        # The fd becomes readable when the local peer sends a message to the remote peer
+        try:
+            return RcCode.SUCCESS, self._tx_queue._reader.fileno()
+        except OSError:
+            return RcCode.FAILURE, None
+
     def remote_peer_receive_msg(self):
         try:
             msg = self._tx_queue.get(self._rx_blocking, self._rx_timeout)
         except queue.Empty:
             return RcCode.QUEUE_ENPTY, None
-        return RcCode.SUCCESS, msg
\ No newline at end of file
+        return RcCode.SUCCESS, msg
+
+
+# The bytes of the ring buffer shared by the peers of ShmBiMsgQueue in each direction
+SHM_MSG_QUEUE_SIZE = 1024 * 1024
+
+# The write position and the read position are kept in the different cache lines so that the peers do not share them
+_SHM_RING_HEAD_OFFSET = 0
+_SHM_RING_TAIL_OFFSET = 64
+_SHM_RING_DATA_OFFSET = 128
+_SHM_RING_POS_FORMAT = "Q"
+_SHM_RING_LEN_FORMAT = "I"
+_SHM_RING_LEN_SIZE = struct.calcsize(_SHM_RING_LEN_FORMAT)
+
+# The seconds a blocking sender waits before it checks the full ring buffer again
+_SHM_RING_FULL_WAIT_TIME = 0.0005
+
+
+class _ShmMsgRing:
+    # A single producer single consumer ring buffer in the shared memory. The positions only increase, and the producer
+    # rings the doorbell after each message is published so that the consumer can wait for the eventfd.
+    def __init__(self, size):
+        self._size = size
+        self._shm = shared_memory.SharedMemory(create=True, size=_SHM_RING_DATA_OFFSET + size)
+        self._buf = self._shm.buf
+        struct.pack_into(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_HEAD_OFFSET, 0)
+        struct.pack_into(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_TAIL_OFFSET, 0)
+        self._doorbell_fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        self._shm.unlink()
+        os.close(self._doorbell_fd)
+
+    def get_doorbell_fd(self):
+        return self._doorbell_fd
+
+    def _copy_in(self, pos, data):
+        offset = pos % self._size
+        first_len = min(len(data), self._size - offset)
+        start = _SHM_RING_DATA_OFFSET + offset
+        self._buf[start:start + first_len] = data[:first_len]
+        if first_len < len(data):
+            self._buf[_SHM_RING_DATA_OFFSET:_SHM_RING_DATA_OFFSET + len(data) - first_len] = data[first_len:]
+
+    def _copy_out(self, pos, size):
+        offset = pos % self._size
+        first_len = min(size, self._size - offset)
+        start = _SHM_RING_DATA_OFFSET + offset
+        if first_len == size:
+            return bytes(self._buf[start:start + size])
+        return bytes(self._buf[start:start + first_len]) + \
+            bytes(self._buf[_SHM_RING_DATA_OFFSET:_SHM_RING_DATA_OFFSET + size - first_len])
+
+    def push(self, data):
+        record_size = _SHM_RING_LEN_SIZE + len(data)
+        if record_size > self._size:
+            return RcCode.INVALID_VALUE
+        head = struct.unpack_from(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_HEAD_OFFSET)[0]
+        tail = struct.unpack_from(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_TAIL_OFFSET)[0]
+        if self._size - (head - tail) < record_size:
+            return RcCode.QUEUE_FULL
+
+        # Copy the message before the head is moved so that the consumer never sees a partial message
+        self._copy_in(head, struct.pack(_SHM_RING_LEN_FORMAT, len(data)))
+        self._copy_in(head + _SHM_RING_LEN_SIZE, data)
+        struct.pack_into(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_HEAD_OFFSET, head + record_size)
+        os.eventfd_write(self._doorbell_fd, 1)
+        return RcCode.SUCCESS
+
+    def pop(self):
+        head = struct.unpack_from(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_HEAD_OFFSET)[0]
+        tail = struct.unpack_from(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_TAIL_OFFSET)[0]
+        if head == tail:
+            # Clear the doorbell, then check again so that a message published meanwhile is not missed
+            try:
+                os.eventfd_read(self._doorbell_fd)
+            except BlockingIOError:
+                pass
+            head = struct.unpack_from(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_HEAD_OFFSET)[0]
+            if head == tail:
+                return RcCode.QUEUE_ENPTY, None
+
+        data_len = struct.unpack(_SHM_RING_LEN_FORMAT, self._copy_out(tail, _SHM_RING_LEN_SIZE))[0]
+        data = self._copy_out(tail + _SHM_RING_LEN_SIZE, data_len)
+        struct.pack_into(_SHM_RING_POS_FORMAT, self._buf, _SHM_RING_TAIL_OFFSET, tail + _SHM_RING_LEN_SIZE + data_len)
+        return RcCode.SUCCESS, data
+
+
+class ShmBiMsgQueue:
+    # The same API as BiMsgQueue, but the messages are passed through the shared memory instead of the pipes. The queue
+    # has to be initialized before the peer process is forked.
+    def __init__(self, logger_system=None, tx_blocking=True, tx_timeout=None, rx_blocking=True, rx_timeout=None,
+                 queue_size=SHM_MSG_QUEUE_SIZE):
+        self._tx_blocking = tx_blocking
+        self._rx_blocking = rx_blocking
+        self._tx_timeout = tx_timeout
+        self._rx_timeout = rx_timeout
+        self._queue_size = queue_size
+        self._logger_system = logger_system
+        self._logger = None
+        self._tx_ring = None
+        self._rx_ring = None
+
+    def init_queue(self):
+        # Init log system
+        if self._logger_system is None:
+            self._logger_system = LoggerSystem("ShmBiMsgQueue")
+            rc = self._logger_system.init_logger_system()
+            if rc != RcCode.SUCCESS:
+                return rc
+
+        # Init queue
+        self._logger = self._logger_system.get_logger()
+        try:
+            self._tx_ring = _ShmMsgRing(self._queue_size)
+            self._rx_ring = _ShmMsgRing(self._queue_size)
+        except OSError as e:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not create the shared memory. {}".format(e)))
+            return RcCode.FAILURE
+        return RcCode.SUCCESS
+
+    def close_queue(self):
+        # Only the process which initializes the queue releases the shared memory
+        for ring in (self._tx_ring, self._rx_ring):
+            if ring is not None:
+                ring.close()
+        self._tx_ring = None
+        self._rx_ring = None
+        return RcCode.SUCCESS
+
+    def _send_msg(self, ring, msg):
+        try:
+            data = pickle.dumps(msg, pickle.HIGHEST_PROTOCOL)
+        except pickle.PicklingError:
+            return RcCode.INVALID_VALUE
+
+        # The ring buffer is not expected to be full, so the blocking sender simply checks it again after a while
+        end_time = None if self._tx_timeout is None else time.monotonic() + self._tx_timeout
+        while True:
+            rc = ring.push(data)
+            if rc != RcCode.QUEUE_FULL or not self._tx_blocking:
+                return rc
+            if end_time is not None and time.monotonic() >= end_time:
+                return RcCode.QUEUE_FULL
+            time.sleep(_SHM_RING_FULL_WAIT_TIME)
+
+    def _receive_msg(self, ring):
+        end_time = None if self._rx_timeout is None else time.monotonic() + self._rx_timeout
+        while True:
+            rc, data = ring.pop()
+            if rc == RcCode.SUCCESS:
+                return RcCode.SUCCESS, pickle.loads(data)
+            if rc != RcCode.QUEUE_ENPTY or not self._rx_blocking:
+                return rc, None
+
+            # Wait for the doorbell of the sender
+            timeout = None if end_time is None else end_time - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                return RcCode.QUEUE_ENPTY, None
+            select.select([ring.get_doorbell_fd()], [], [], timeout)
+
+    def local_peer_send_msg(self, msg):
+        return self._send_msg(self._tx_ring, msg)
+
+    def local_peer_receive_fd_get(self):
+        # The fd becomes readable when the remote peer sends a message to the local peer
+        if self._rx_ring is None:
+            return RcCode.FAILURE, None
+        return RcCode.SUCCESS, self._rx_ring.get_doorbell_fd()
+
+    def local_peer_receive_msg(self):
+        return self._receive_msg(self._rx_ring)
+
+    def remote_peer_send_msg(self, msg):
+        return self._send_msg(self._rx_ring, msg)
+
+    def remote_peer_receive_fd_get(self):
+        # The fd becomes readable when the local peer sends a message to the remote peer
+        if self._tx_ring is None:
+            return RcCode.FAILURE, None
+        return RcCode.SUCCESS, self._tx_ring.get_doorbell_fd()
+
+    def remote_peer_receive_msg(self):
+        return self._receive_msg(self._tx_ring)
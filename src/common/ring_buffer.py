@@ -0,0 +1,50 @@
+from src.common.rc_code import RcCode
+
+
+class RingBuffer:
+    def __init__(self, size):
+        self._size = size
+        self._buffer = bytearray(size)
+        self._buffer_view = memoryview(self._buffer)
+        self._write_pos = 0
+        self._data_len = 0
+
+    def get_size(self):
+        return RcCode.SUCCESS, self._size
+
+    def get_data_len(self):
+        return RcCode.SUCCESS, self._data_len
+
+    def clear(self):
+        self._write_pos = 0
+        self._data_len = 0
+        return RcCode.SUCCESS
+
+    def write(self, data):
+        if self._size == 0:
+            return RcCode.SUCCESS
+
+        # Only the tail of the data can be kept if the data is larger than the buffer
+        data_view = memoryview(data)
+        if len(data_view) > self._size:
+            data_view = data_view[len(data_view) - self._size:]
+        data_len = len(data_view)
+
+        # Copy the data to the end of the buffer, and wrap around to the head of the buffer if necessary
+        first_len = min(data_len, self._size - self._write_pos)
+        self._buffer_view[self._write_pos:self._write_pos + first_len] = data_view[:first_len]
+        if first_len < data_len:
+            self._buffer_view[:data_len - first_len] = data_view[first_len:]
+        self._write_pos = (self._write_pos + data_len) % self._size
+        self._data_len = min(self._data_len + data_len, self._size)
+        return RcCode.SUCCESS
+
+    def read(self, max_size=None):
+        # Read the latest data in the buffer without consuming it
+        read_len = self._data_len if max_size is None else min(max_size, self._data_len)
+        if read_len == 0:
+            return RcCode.SUCCESS, b""
+        start_pos = (self._write_pos - read_len) % self._size
+        if start_pos + read_len <= self._size:
+            return RcCode.SUCCESS, bytes(self._buffer_view[start_pos:start_pos + read_len])
+        return RcCode.SUCCESS, bytes(self._buffer_view[start_pos:]) + bytes(self._buffer_view[:self._write_pos])
@@ -0,0 +1,192 @@
+import os
+import pickle
+import struct
+import time
+from multiprocessing import shared_memory
+
+from src.common.logger_system import LoggerSystem
+from src.common.rc_code import RcCode
+
+
+# The bytes of the shared memory which keeps the snapshot at first. The larger snapshot is moved to a larger shared
+# memory.
+SHM_SNAPSHOT_SIZE = 1024 * 1024
+
+# The generation, the size of the snapshot and the name of the shared memory which keeps the larger snapshot are in
+# the first cache line, and the snapshot follows them. The snapshot is after the header if the name is empty.
+_SHM_SNAPSHOT_GENERATION_OFFSET = 0
+_SHM_SNAPSHOT_LEN_OFFSET = 8
+_SHM_SNAPSHOT_NAME_OFFSET = 16
+_SHM_SNAPSHOT_DATA_OFFSET = 64
+_SHM_SNAPSHOT_GENERATION_FORMAT = "Q"
+_SHM_SNAPSHOT_LEN_FORMAT = "I"
+_SHM_SNAPSHOT_NAME_FORMAT = "{}p".format(_SHM_SNAPSHOT_DATA_OFFSET - _SHM_SNAPSHOT_NAME_OFFSET)
+
+# The times a reader reads the snapshot again when the writer updates it at the same time. The reader yields the CPU
+# to the writer between the retries.
+_SHM_SNAPSHOT_READ_RETRY = 1000
+
+
+class ShmSnapshot:
+    # A read-mostly object which one process publishes to the other processes through the shared memory. The generation
+    # works as a sequence lock: it is odd while the writer copies the snapshot, and the reader reads the snapshot again
+    # if the generation has changed meanwhile. The reader keeps the decoded snapshot until the generation changes.
+    # The snapshot has to be initialized before the reader processes are forked. The snapshot which does not fit is
+    # written to a new shared memory, and the readers attach it by the name in the header.
+    def __init__(self, logger_system=None, snapshot_size=SHM_SNAPSHOT_SIZE):
+        self._snapshot_size = snapshot_size
+        self._logger_system = logger_system
+        self._logger = None
+        self._shm = None
+        self._buf = None
+        self._data_shm = None
+        self._owner_pid = None
+        self._cache_generation = None
+        self._cache_snapshot = None
+
+    def init_snapshot(self):
+        # Init log system
+        if self._logger_system is None:
+            self._logger_system = LoggerSystem("ShmSnapshot")
+            rc = self._logger_system.init_logger_system()
+            if rc != RcCode.SUCCESS:
+                return rc
+
+        # Init the shared memory
+        self._logger = self._logger_system.get_logger()
+        try:
+            self._shm = shared_memory.SharedMemory(create=True, size=_SHM_SNAPSHOT_DATA_OFFSET + self._snapshot_size)
+        except OSError as e:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not create the shared memory. {}".format(e)))
+            return RcCode.FAILURE
+        self._buf = self._shm.buf
+        self._owner_pid = os.getpid()
+        struct.pack_into(_SHM_SNAPSHOT_GENERATION_FORMAT, self._buf, _SHM_SNAPSHOT_GENERATION_OFFSET, 0)
+        struct.pack_into(_SHM_SNAPSHOT_LEN_FORMAT, self._buf, _SHM_SNAPSHOT_LEN_OFFSET, 0)
+        struct.pack_into(_SHM_SNAPSHOT_NAME_FORMAT, self._buf, _SHM_SNAPSHOT_NAME_OFFSET, b"")
+        self._logger.info(self._logger_system.set_logger_rc_code(
+            "The snapshot larger than {} bytes is moved to a new shared memory.".format(self._snapshot_size)))
+        return RcCode.SUCCESS
+
+    def _close_data_shm(self):
+        if self._data_shm is None:
+            return
+        self._data_shm.close()
+
+        # Only the process which initializes the snapshot releases the shared memory
+        if self._owner_pid == os.getpid():
+            self._data_shm.unlink()
+        self._data_shm = None
+
+    def close_snapshot(self):
+        if self._shm is None:
+            return RcCode.SUCCESS
+        self._close_data_shm()
+        self._buf = None
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+        self._shm = None
+        return RcCode.SUCCESS
+
+    def _get_generation(self):
+        return struct.unpack_from(_SHM_SNAPSHOT_GENERATION_FORMAT, self._buf, _SHM_SNAPSHOT_GENERATION_OFFSET)[0]
+
+    def get_generation(self):
+        if self._buf is None:
+            return RcCode.FAILURE, None
+        return RcCode.SUCCESS, self._get_generation()
+
+    def publish_snapshot(self, snapshot):
+        if self._buf is None:
+            return RcCode.FAILURE
+        try:
+            data = pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL)
+        except pickle.PicklingError:
+            return RcCode.INVALID_VALUE
+
+        # Create a shared memory twice as large as the current one until the snapshot fits. The old shared memory is
+        # released after the readers are told the new name, and the readers which read it meanwhile read again.
+        old_data_shm = None
+        data_size = self._snapshot_size if self._data_shm is None else self._data_shm.size
+        if len(data) > data_size:
+            while len(data) > data_size:
+                data_size *= 2
+            try:
+                data_shm = shared_memory.SharedMemory(create=True, size=data_size)
+            except OSError as e:
+                self._logger.error(self._logger_system.set_logger_rc_code(
+                    "Can not create the shared memory for the snapshot size {}. {}".format(len(data), e)))
+                return RcCode.FAILURE
+            self._logger.info(self._logger_system.set_logger_rc_code(
+                "Move the snapshot size {} to the shared memory size {}.".format(len(data), data_size)))
+            old_data_shm = self._data_shm
+            self._data_shm = data_shm
+
+        # Mark the snapshot as being written, copy it, then publish the next generation
+        generation = self._get_generation()
+        struct.pack_into(_SHM_SNAPSHOT_GENERATION_FORMAT, self._buf, _SHM_SNAPSHOT_GENERATION_OFFSET, generation + 1)
+        if self._data_shm is None:
+            self._buf[_SHM_SNAPSHOT_DATA_OFFSET:_SHM_SNAPSHOT_DATA_OFFSET + len(data)] = data
+        else:
+            self._data_shm.buf[:len(data)] = data
+            struct.pack_into(_SHM_SNAPSHOT_NAME_FORMAT, self._buf, _SHM_SNAPSHOT_NAME_OFFSET,
+                             self._data_shm.name.encode())
+        struct.pack_into(_SHM_SNAPSHOT_LEN_FORMAT, self._buf, _SHM_SNAPSHOT_LEN_OFFSET, len(data))
+        struct.pack_into(_SHM_SNAPSHOT_GENERATION_FORMAT, self._buf, _SHM_SNAPSHOT_GENERATION_OFFSET, generation + 2)
+
+        if old_data_shm is not None:
+            old_data_shm.close()
+            old_data_shm.unlink()
+        return RcCode.SUCCESS
+
+    def _read_snapshot_data(self, data_len):
+        name = struct.unpack_from(_SHM_SNAPSHOT_NAME_FORMAT, self._buf, _SHM_SNAPSHOT_NAME_OFFSET)[0].decode()
+        if not name:
+            return RcCode.SUCCESS, bytes(self._buf[_SHM_SNAPSHOT_DATA_OFFSET:_SHM_SNAPSHOT_DATA_OFFSET + data_len])
+
+        # Attach the shared memory which the writer has moved the snapshot to
+        if self._data_shm is None or self._data_shm.name != name:
+            try:
+                data_shm = shared_memory.SharedMemory(name=name)
+            except OSError:
+                # The writer has moved the snapshot again and released the shared memory
+                return RcCode.DATA_NOT_READY, None
+            self._close_data_shm()
+            self._data_shm = data_shm
+        if data_len > self._data_shm.size:
+            return RcCode.DATA_NOT_READY, None
+        return RcCode.SUCCESS, bytes(self._data_shm.buf[:data_len])
+
+    def get_snapshot(self):
+        if self._buf is None:
+            return RcCode.FAILURE, None
+        for retry in range(_SHM_SNAPSHOT_READ_RETRY):
+            if retry > 0:
+                time.sleep(0)
+            generation = self._get_generation()
+            if generation % 2 == 1:
+                # The writer is copying the snapshot
+                continue
+            if generation == self._cache_generation:
+                return RcCode.SUCCESS, self._cache_snapshot
+            if generation == 0:
+                return RcCode.DATA_NOT_READY, None
+
+            data_len = struct.unpack_from(_SHM_SNAPSHOT_LEN_FORMAT, self._buf, _SHM_SNAPSHOT_LEN_OFFSET)[0]
+            rc, data = self._read_snapshot_data(data_len)
+            if rc != RcCode.SUCCESS or self._get_generation() != generation:
+                continue
+
+            # The snapshot is shared by the callers until the generation changes, so they must not modify it
+            self._cache_snapshot = pickle.loads(data)
+            self._cache_generation = generation
+            return RcCode.SUCCESS, self._cache_snapshot
+
+        # The writer keeps updating the snapshot. The previous snapshot is used until the reader gets the new one.
+        if self._cache_generation is not None:
+            if self._logger is not None:
+                self._logger.warning(self._logger_system.set_logger_rc_code(
+                    "Use the snapshot of generation {} while it is updated.".format(self._cache_generation)))
+            return RcCode.SUCCESS, self._cache_snapshot
+        return RcCode.DATA_NOT_READY, None
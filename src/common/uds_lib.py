@@ -1,10 +1,72 @@
 import errno
+import logging
 import os
 import socket
 
 from src.common.rc_code import RcCode
 
 
+# Each message is sent as a frame: the size of the message in 4 bytes little endian followed by the message
+UDS_FRAME_HEADER_SIZE = 4
+UDS_FRAME_MAX_SIZE = 16 * 1024 * 1024
+
+# The consumed data at the head of the frame buffer is removed when it reaches this size
+_UDS_FRAME_COMPACT_SIZE = 64 * 1024
+
+
+def uds_frame_encode(data):
+    if isinstance(data, str):
+        data = bytes(data, 'utf-8')
+    if len(data) > UDS_FRAME_MAX_SIZE:
+        return RcCode.INVALID_VALUE, None
+    return RcCode.SUCCESS, len(data).to_bytes(UDS_FRAME_HEADER_SIZE, byteorder='little') + data
+
+
+class UdsFrameDecoder:
+    def __init__(self, max_frame_size=UDS_FRAME_MAX_SIZE):
+        self._max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._read_pos = 0
+
+    def feed(self, data):
+        self._buffer += data
+        return RcCode.SUCCESS
+
+    def get_frame(self):
+        # The frame is returned only when all of its data has arrived
+        data_len = len(self._buffer) - self._read_pos
+        if data_len < UDS_FRAME_HEADER_SIZE:
+            return RcCode.DATA_NOT_READY, None
+        frame_size = int.from_bytes(
+            self._buffer[self._read_pos:self._read_pos + UDS_FRAME_HEADER_SIZE], byteorder='little')
+        if frame_size > self._max_frame_size:
+            return RcCode.INVALID_VALUE, None
+        if data_len < UDS_FRAME_HEADER_SIZE + frame_size:
+            return RcCode.DATA_NOT_READY, None
+        frame_pos = self._read_pos + UDS_FRAME_HEADER_SIZE
+        frame = bytes(self._buffer[frame_pos:frame_pos + frame_size])
+        self._read_pos = frame_pos + frame_size
+
+        # Release the consumed data
+        if self._read_pos == len(self._buffer):
+            self._buffer.clear()
+            self._read_pos = 0
+        elif self._read_pos >= _UDS_FRAME_COMPACT_SIZE:
+            del self._buffer[:self._read_pos]
+            self._read_pos = 0
+        return RcCode.SUCCESS, frame
+
+    def get_buffered_size(self):
+        return RcCode.SUCCESS, len(self._buffer) - self._read_pos
+
+    def pop_remaining_data(self):
+        # Take the data which does not belong to a frame, e.g. the data sent after the protocol is switched
+        data = bytes(self._buffer[self._read_pos:])
+        self._buffer.clear()
+        self._read_pos = 0
+        return RcCode.SUCCESS, data
+
+
 class UnixDomainServerSocket:
     def __init__(self, max_client, uds_server_file_path, logger_system):
         self._uds_server_file_path = uds_server_file_path
@@ -68,12 +130,38 @@ class UnixDomainConnectedClientSocket:
 
     def uds_client_socket_send(self, data):
         try:
-            self._logger.info(self._logger_system.set_logger_rc_code("Send message {}".format(data)))
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(self._logger_system.set_logger_rc_code("Send message {}".format(data)))
             self._client_socket.sendall(data)
         except OSError:
             return RcCode.FAILURE
         return RcCode.SUCCESS
 
+    def uds_client_socket_send_frame(self, data):
+        # Send the size and the message by a single system call
+        rc, frame = uds_frame_encode(data)
+        if rc != RcCode.SUCCESS:
+            return rc
+        return self.uds_client_socket_send(frame)
+
+    def uds_client_socket_send_nonblocking(self, data):
+        try:
+            size = self._client_socket.send(data)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(self._logger_system.set_logger_rc_code("Send message {}".format(data[:size])))
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return RcCode.DATA_NOT_READY, 0
+            return RcCode.FAILURE, 0
+        return RcCode.SUCCESS, size
+
+    def uds_client_socket_set_blocking(self, blocking):
+        try:
+            self._client_socket.setblocking(blocking)
+        except OSError:
+            return RcCode.FAILURE
+        return RcCode.SUCCESS
+
     def uds_client_socket_recv(self, max_size):
         wait = True
         data = b""
@@ -103,6 +191,12 @@ class UnixDomainClientSocket:
 
         self._logger = logger_system.get_logger()
         self._uds_socket = None
+        self._frame_decoder = UdsFrameDecoder()
+
+    def uds_client_socket_fd_get(self):
+        if self._uds_socket is None:
+            return -1
+        return self._uds_socket.fileno()
 
     def uds_client_socket_init(self, blocking=True):
         if self._uds_client_file_path != "" and os.path.exists(self._uds_client_file_path):
@@ -140,9 +234,10 @@ class UnixDomainClientSocket:
 
     def uds_client_socket_send(self, data):
         try:
-            self._logger.info(
-                self._logger_system.set_logger_rc_code(
-                    "Send the data {} to host {}".format(data, self._uds_socket.getpeername())))
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(
+                    self._logger_system.set_logger_rc_code(
+                        "Send the data {} to host {}".format(data, self._uds_socket.getpeername())))
             if isinstance(data, str):
                 self._uds_socket.sendall(bytes(data, 'utf-8'))
             else:
@@ -151,6 +246,31 @@ class UnixDomainClientSocket:
             return RcCode.FAILURE
         return RcCode.SUCCESS
 
+    def uds_client_socket_send_frame(self, data):
+        # Send the size and the message by a single system call
+        rc, frame = uds_frame_encode(data)
+        if rc != RcCode.SUCCESS:
+            return rc
+        return self.uds_client_socket_send(frame)
+
+    def uds_client_socket_recv_frame(self):
+        # Receive until a whole frame arrives. The data of the following frames is kept for the next call. An empty
+        # frame means that the socket has been closed.
+        while True:
+            rc, frame = self._frame_decoder.get_frame()
+            if rc != RcCode.DATA_NOT_READY:
+                return rc, frame
+            rc, data = self.uds_client_socket_recv(_UDS_FRAME_COMPACT_SIZE)
+            if rc != RcCode.SUCCESS:
+                return rc, None
+            if data == b"":
+                return RcCode.SUCCESS, b""
+            self._frame_decoder.feed(data)
+
+    def uds_client_socket_pop_remaining_data(self):
+        # Take the data which has been received after the last frame
+        return self._frame_decoder.pop_remaining_data()
+
     def uds_client_socket_recv(self, max_size):
         wait = True
         data = b""
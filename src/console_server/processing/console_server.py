@@ -3,44 +3,109 @@ import select
 import time
 
 from src.common.logger_system import LoggerSystem
-from src.common.msg import ReplyMsg, RequestMsg, msg_deserialize, msg_serialize, check_all_required_parameter
-from src.common.msg_queue import BiMsgQueue
+from src.common.msg import ReplyMsg, RequestMsg, check_all_required_parameter
+from src.common.msg_codec import MsgCodec, msg_decode, msg_encode
+from src.common.msg_queue import BiMsgQueue, ShmBiMsgQueue
 from src.common.rc_code import RcCode
-from src.common.uds_lib import UnixDomainServerSocket, UnixDomainConnectedClientSocket
-from src.console_server.processing.console_server_definition import ConsoleServerEvent, UserRole, UserRolePriorityDict, \
-    PriorityUserRole_dict, VALID_BAUD_RATE
+from src.common.shm_snapshot import ShmSnapshot
+from src.common.uds_lib import UnixDomainServerSocket, UnixDomainConnectedClientSocket, UdsFrameDecoder
+from src.console_server.processing.console_server_definition import ConsoleServerEvent, ConsoleServerOpcode, \
+    ConsoleServerEventOpcodeDict, RequestScope, UserRole, UserRolePriorityDict, PriorityUserRole_dict, VALID_BAUD_RATE, DEFAULT_SCROLLBACK_SIZE, DEFAULT_CLIENT_OUTPUT_LIMIT, \
+    DEFAULT_SERIAL_RX_COALESCE_WINDOW, SlowConsumerPolicy
 from src.console_server.processing.console_server_handler import ConsolerServerHandler
 
 
 MAX_HANDLER_PROCESS =  8
 
+# The maximum bytes read from a client socket at once
+MAX_CLIENT_RECV_SIZE = 64 * 1024
+
+# The maximum requests of a client which wait for the handler reply at the same time
+MAX_CLIENT_PENDING_REQUEST = 64
+
+# The maximum operations in a batch request, and the requests which can be applied by the batch request
+MAX_BATCH_OPERATION = 256
+BATCH_OPERATION_LIST = [
+    ConsoleServerEvent.SET_BAUD_RATE, ConsoleServerEvent.SET_ALIAS_NAME,
+    ConsoleServerEvent.PORT_JOIN_GROUP, ConsoleServerEvent.PORT_LEAVE_GROUP,
+    ConsoleServerEvent.CREATE_GROUP, ConsoleServerEvent.DESTROY_GROUP,
+    ConsoleServerEvent.ADD_USER_ACCOUNT, ConsoleServerEvent.DEL_USER_ACCOUNT,
+    ConsoleServerEvent.USER_JOIN_GROUP, ConsoleServerEvent.USER_LEAVE_GROUP
+]
+
 
 DEFAULT_USER_ACCOUNT = "admin"
 DEFAULT_GROUP_NAME = "admin"
 DEFAULT_ROLE = UserRole.ROLE_ADMIN
 
 
-class _ConsoleServerOpDb:
+class _ConsoleServerUndoLog:
+    # Record how to revert the account changes of a request, so that the request can be reverted if its accounts can
+    # not be published to the handlers. Each change records its reverse change only.
+    def __init__(self):
+        self._undo_list = None
+
+    def _record_undo(self, func, *args):
+        if self._undo_list is not None:
+            self._undo_list.append((func, args))
+
+    def start_undo_log(self):
+        self._undo_list = []
+        return RcCode.SUCCESS
+
+    def stop_undo_log(self):
+        undo_list = self._undo_list if self._undo_list is not None else []
+        self._undo_list = None
+        return RcCode.SUCCESS, undo_list
+
+    def apply_undo_log(self, undo_list):
+        # Revert the changes in the reverse order. The reverse changes are not recorded.
+        current_undo_list = self._undo_list
+        self._undo_list = None
+        status = RcCode.SUCCESS
+        for func, args in reversed(undo_list):
+            rc = func(*args)
+            if rc != RcCode.SUCCESS:
+                status = rc
+        self._undo_list = current_undo_list
+        return status
+
+
+class _ConsoleServerOpDb(_ConsoleServerUndoLog):
     def __init__(self):
+        _ConsoleServerUndoLog.__init__(self)
         self._client_socket_dict = {}
         self._process_handler_dict = {}
         self._process_queue_dict = {}
+        self._process_queue_fd_dict = {}
+        self._resume_client_socket_set = set()
+        self._last_connection_id = 0
         self._serial_port_group_dict = {}
         self._serial_port_dict = {}
         self._group_dict = {}
         self._user_dict = {}
 
+        # The users and the serial ports of each group. They are the reverse indexes of the group lists.
+        self._group_user_dict = {}
+        self._group_port_dict = {}
+
     def add_client_socket(self, client_socket_fd, client_socket):
         if client_socket_fd in self._client_socket_dict:
             return RcCode.DATA_EXIST
         self._client_socket_dict[client_socket_fd] = {}
         self._client_socket_dict[client_socket_fd]["socket_obj"] = client_socket
+        self._last_connection_id += 1
+        self._client_socket_dict[client_socket_fd]["connection_id"] = self._last_connection_id
+        self._client_socket_dict[client_socket_fd]["codec"] = MsgCodec.JSON
+        self._client_socket_dict[client_socket_fd]["frame_decoder"] = UdsFrameDecoder()
+        self._client_socket_dict[client_socket_fd]["request_dict"] = {}
         return RcCode.SUCCESS
 
     def del_client_socket(self, client_socket_fd):
         if client_socket_fd not in self._client_socket_dict:
             return RcCode.DATA_NOT_FOUND
         del self._client_socket_dict[client_socket_fd]
+        self._resume_client_socket_set.discard(client_socket_fd)
         return RcCode.SUCCESS
 
     def get_client_socket(self, client_socket_fd):
@@ -48,33 +113,82 @@ class _ConsoleServerOpDb:
             return RcCode.DATA_NOT_FOUND, None
         return RcCode.SUCCESS, self._client_socket_dict[client_socket_fd]["socket_obj"]
 
+    def get_client_connection_id(self, client_socket_fd):
+        if client_socket_fd not in self._client_socket_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._client_socket_dict[client_socket_fd]["connection_id"]
+
+    def set_client_codec(self, client_socket_fd, codec):
+        if client_socket_fd not in self._client_socket_dict:
+            return RcCode.DATA_NOT_FOUND
+        self._client_socket_dict[client_socket_fd]["codec"] = codec
+        return RcCode.SUCCESS
+
+    def get_client_codec(self, client_socket_fd):
+        if client_socket_fd not in self._client_socket_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._client_socket_dict[client_socket_fd]["codec"]
+
+    def get_client_frame_decoder(self, client_socket_fd):
+        if client_socket_fd not in self._client_socket_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._client_socket_dict[client_socket_fd]["frame_decoder"]
+
+    def get_client_request_blocked(self, client_socket_fd):
+        if client_socket_fd not in self._client_socket_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        # A request without the request ID can not be matched with other replies, so the client waits for its reply.
+        # The requests with the request ID are pipelined up to the limit.
+        request_dict = self._client_socket_dict[client_socket_fd]["request_dict"]
+        return RcCode.SUCCESS, None in request_dict or len(request_dict) >= MAX_CLIENT_PENDING_REQUEST
+
+    def finish_client_request(self, client_socket_fd, request_id):
+        if client_socket_fd not in self._client_socket_dict:
+            return RcCode.DATA_NOT_FOUND
+        client_socket_dict = self._client_socket_dict[client_socket_fd]
+        client_socket_dict["request_dict"].pop(request_id, None)
+
+        # The requests which arrived while the handler processes the request are resumed by the daemon
+        rc, buffered_size = client_socket_dict["frame_decoder"].get_buffered_size()
+        if rc == RcCode.SUCCESS and buffered_size > 0:
+            self._resume_client_socket_set.add(client_socket_fd)
+        return RcCode.SUCCESS
+
+    def pop_resume_client_socket(self):
+        resume_client_socket_set = self._resume_client_socket_set
+        self._resume_client_socket_set = set()
+        return RcCode.SUCCESS, resume_client_socket_set
+
     def add_client_request(self, client_socket_fd, request):
         if client_socket_fd not in self._client_socket_dict:
             return RcCode.DATA_NOT_FOUND
-        self._client_socket_dict[client_socket_fd]["request"] = request
+        request_dict = self._client_socket_dict[client_socket_fd]["request_dict"]
+        if request.request_id in request_dict:
+            return RcCode.DATA_EXIST
+        request_dict[request.request_id] = request
         return RcCode.SUCCESS
 
-    def del_client_request(self, client_socket_fd):
+    def del_client_request(self, client_socket_fd, request_id):
         if client_socket_fd not in self._client_socket_dict:
             return RcCode.DATA_NOT_FOUND
-        if "request" not in self._client_socket_dict[client_socket_fd]:
+        if request_id not in self._client_socket_dict[client_socket_fd]["request_dict"]:
             return RcCode.DATA_NOT_FOUND
-        del self._client_socket_dict[client_socket_fd]["request"]
+        del self._client_socket_dict[client_socket_fd]["request_dict"][request_id]
         return RcCode.SUCCESS
 
-    def get_client_request(self, client_socket_fd):
+    def get_client_request(self, client_socket_fd, request_id):
         if client_socket_fd not in self._client_socket_dict:
             return RcCode.DATA_NOT_FOUND, None
-        if "request" not in self._client_socket_dict[client_socket_fd]:
+        if request_id not in self._client_socket_dict[client_socket_fd]["request_dict"]:
             return RcCode.DATA_NOT_FOUND, None
-        return RcCode.SUCCESS, self._client_socket_dict[client_socket_fd]["request"]
+        return RcCode.SUCCESS, self._client_socket_dict[client_socket_fd]["request_dict"][request_id]
 
     def update_client_request(self, client_socket_fd, request):
         if client_socket_fd not in self._client_socket_dict:
             return RcCode.DATA_NOT_FOUND
-        if "request" not in self._client_socket_dict[client_socket_fd]:
+        if request.request_id not in self._client_socket_dict[client_socket_fd]["request_dict"]:
             return RcCode.DATA_NOT_FOUND
-        self._client_socket_dict[client_socket_fd]["request"] = request
+        self._client_socket_dict[client_socket_fd]["request_dict"][request.request_id] = request
         return RcCode.SUCCESS
 
     def add_process_handler(self, process_id, handler_obj, message_queue):
@@ -89,6 +203,9 @@ class _ConsoleServerOpDb:
             return RcCode.DATA_NOT_FOUND
         del self._process_handler_dict[process_id]
         del self._process_queue_dict[process_id]
+        for queue_fd, queue_process_id in list(self._process_queue_fd_dict.items()):
+            if queue_process_id == process_id:
+                del self._process_queue_fd_dict[queue_fd]
         return RcCode.SUCCESS
 
     def get_process_handler(self, process_id=None):
@@ -101,6 +218,17 @@ class _ConsoleServerOpDb:
             return RcCode.SUCCESS, self._process_queue_dict[process_id]
         return RcCode.SUCCESS, self._process_queue_dict
 
+    def add_process_queue_fd(self, process_id, queue_fd):
+        if queue_fd in self._process_queue_fd_dict:
+            return RcCode.DATA_EXIST
+        self._process_queue_fd_dict[queue_fd] = process_id
+        return RcCode.SUCCESS
+
+    def get_process_id_by_queue_fd(self, queue_fd):
+        if queue_fd not in self._process_queue_fd_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._process_queue_fd_dict[queue_fd]
+
     def set_handler_init_status(self, process_id, status):
         if process_id not in self._process_handler_dict:
             return RcCode.DATA_NOT_FOUND
@@ -159,6 +287,8 @@ class _ConsoleServerOpDb:
     def del_serial_port(self, serial_port_id):
         if serial_port_id not in self._serial_port_dict:
             return RcCode.DATA_NOT_FOUND
+        for group_name in self._serial_port_dict[serial_port_id]["group_list"]:
+            self._group_port_dict[group_name].discard(serial_port_id)
         del self._serial_port_dict[serial_port_id]
         return RcCode.SUCCESS
 
@@ -185,12 +315,25 @@ class _ConsoleServerOpDb:
         if group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
         self._user_dict[username] = {"role": role, "group_list": [group_name]}
+        self._group_user_dict[group_name].add(username)
+        self._record_undo(self.del_user_account, username)
         return RcCode.SUCCESS
 
     def del_user_account(self, username):
         if username not in self._user_dict:
             return RcCode.DATA_NOT_FOUND
-        del self._user_dict[username]
+        for group_name in self._user_dict[username]["group_list"]:
+            self._group_user_dict[group_name].discard(username)
+        self._record_undo(self._restore_user_account, username, self._user_dict.pop(username))
+        return RcCode.SUCCESS
+
+    def _restore_user_account(self, username, user_account):
+        if username in self._user_dict:
+            return RcCode.DATA_EXIST
+        self._user_dict[username] = user_account
+        for group_name in user_account["group_list"]:
+            if group_name in self._group_user_dict:
+                self._group_user_dict[group_name].add(username)
         return RcCode.SUCCESS
 
     def get_user_account(self, username=None):
@@ -208,6 +351,7 @@ class _ConsoleServerOpDb:
     def modify_user_account_role(self, username, role):
         if username not in self._user_dict:
             return RcCode.DATA_NOT_FOUND
+        self._record_undo(self.modify_user_account_role, username, self._user_dict[username]["role"])
         self._user_dict[username]["role"] = role
         return RcCode.SUCCESS
 
@@ -215,17 +359,30 @@ class _ConsoleServerOpDb:
         if group_name in self._group_dict:
             return RcCode.DATA_EXIST
         self._group_dict[group_name] = {"role": role}
+        self._group_user_dict[group_name] = set()
+        self._group_port_dict[group_name] = set()
+        self._record_undo(self.destroy_group, group_name)
         return RcCode.SUCCESS
 
     def destroy_group(self, group_name):
         if group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        del self._group_dict[group_name]
+        self._record_undo(self._restore_group, group_name, self._group_dict.pop(group_name),
+                          self._group_user_dict.pop(group_name), self._group_port_dict.pop(group_name))
+        return RcCode.SUCCESS
+
+    def _restore_group(self, group_name, group, user_set, port_set):
+        if group_name in self._group_dict:
+            return RcCode.DATA_EXIST
+        self._group_dict[group_name] = group
+        self._group_user_dict[group_name] = user_set
+        self._group_port_dict[group_name] = port_set
         return RcCode.SUCCESS
 
     def modify_group(self, group_name, role):
         if group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
+        self._record_undo(self.modify_group, group_name, self._group_dict[group_name]["role"])
         self._group_dict[group_name] = {"role": role}
         return RcCode.SUCCESS
 
@@ -236,47 +393,75 @@ class _ConsoleServerOpDb:
             return RcCode.DATA_NOT_FOUND, None
         return RcCode.SUCCESS, self._group_dict[group_name]
 
+    def get_group_user_set(self, group_name):
+        if group_name not in self._group_user_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._group_user_dict[group_name]
+
+    def get_group_port_set(self, group_name):
+        if group_name not in self._group_port_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._group_port_dict[group_name]
+
     def user_join_group(self, username, group_name):
-        if username not in self._user_dict:
+        if username not in self._user_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        group_list = self._user_dict[username]["group_list"]
-        if group_name in group_list:
+        if username in self._group_user_dict[group_name]:
             return RcCode.DATA_EXIST
-        group_list.append(group_name)
+        self._user_dict[username]["group_list"].append(group_name)
+        self._group_user_dict[group_name].add(username)
+        self._record_undo(self.user_leave_group, username, group_name)
         return RcCode.SUCCESS
 
     def user_leave_group(self, username, group_name):
-        if username not in self._user_dict:
+        if username not in self._user_dict or group_name not in self._group_dict:
+            return RcCode.DATA_NOT_FOUND
+        if username not in self._group_user_dict[group_name]:
             return RcCode.DATA_NOT_FOUND
         group_list = self._user_dict[username]["group_list"]
-        if group_name not in group_list:
+        index = group_list.index(group_name)
+        del group_list[index]
+        self._group_user_dict[group_name].discard(username)
+        self._record_undo(self._restore_user_group, username, group_name, index)
+        return RcCode.SUCCESS
+
+    def _restore_user_group(self, username, group_name, index):
+        if username not in self._user_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        group_list.remove(group_name)
+        self._user_dict[username]["group_list"].insert(index, group_name)
+        self._group_user_dict[group_name].add(username)
         return RcCode.SUCCESS
 
     def port_join_group(self, serial_port_id, group_name):
-        if serial_port_id not in self._serial_port_dict:
+        if serial_port_id not in self._serial_port_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        if group_name in self._serial_port_dict[serial_port_id]["group_list"]:
+        if serial_port_id in self._group_port_dict[group_name]:
             return RcCode.DATA_EXIST
         self._serial_port_dict[serial_port_id]["group_list"].append(group_name)
+        self._group_port_dict[group_name].add(serial_port_id)
         return RcCode.SUCCESS
 
     def port_leave_group(self, serial_port_id, group_name):
-        if serial_port_id not in self._serial_port_dict:
+        if serial_port_id not in self._serial_port_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        if group_name in self._serial_port_dict[serial_port_id]["group_list"]:
+        if serial_port_id not in self._group_port_dict[group_name]:
             return RcCode.DATA_NOT_FOUND
         self._serial_port_dict[serial_port_id]["group_list"].remove(group_name)
+        self._group_port_dict[group_name].discard(serial_port_id)
         return RcCode.SUCCESS
 
 
-class _ConsoleServerConfigDb:
+class _ConsoleServerConfigDb(_ConsoleServerUndoLog):
     def __init__(self):
+        _ConsoleServerUndoLog.__init__(self)
         self._serial_port_dict = {}
         self._group_dict = {}
         self._user_dict = {}
 
+        # The users and the serial ports of each group. They are the reverse indexes of the group lists.
+        self._group_user_dict = {}
+        self._group_port_dict = {}
+
     def add_serial_port(self, serial_port_id, baud_rate, alias_name):
         if serial_port_id in self._serial_port_dict:
             return RcCode.DATA_EXIST
@@ -290,6 +475,8 @@ class _ConsoleServerConfigDb:
     def del_serial_port(self, serial_port_id):
         if serial_port_id not in self._serial_port_dict:
             return RcCode.DATA_NOT_FOUND
+        for group_name in self._serial_port_dict[serial_port_id]["group_list"]:
+            self._group_port_dict[group_name].discard(serial_port_id)
         del self._serial_port_dict[serial_port_id]
         return RcCode.SUCCESS
 
@@ -316,12 +503,25 @@ class _ConsoleServerConfigDb:
         if group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
         self._user_dict[username] = {"role": role, "group_list": [group_name]}
+        self._group_user_dict[group_name].add(username)
+        self._record_undo(self.del_user_account, username)
         return RcCode.SUCCESS
 
     def del_user_account(self, username):
         if username not in self._user_dict:
             return RcCode.DATA_NOT_FOUND
-        del self._user_dict[username]
+        for group_name in self._user_dict[username]["group_list"]:
+            self._group_user_dict[group_name].discard(username)
+        self._record_undo(self._restore_user_account, username, self._user_dict.pop(username))
+        return RcCode.SUCCESS
+
+    def _restore_user_account(self, username, user_account):
+        if username in self._user_dict:
+            return RcCode.DATA_EXIST
+        self._user_dict[username] = user_account
+        for group_name in user_account["group_list"]:
+            if group_name in self._group_user_dict:
+                self._group_user_dict[group_name].add(username)
         return RcCode.SUCCESS
 
     def get_user_account(self, username=None):
@@ -344,6 +544,7 @@ class _ConsoleServerConfigDb:
     def modify_user_account_role(self, username, role):
         if username not in self._user_dict:
             return RcCode.DATA_NOT_FOUND
+        self._record_undo(self.modify_user_account_role, username, self._user_dict[username]["role"])
         self._user_dict[username]["role"] = role
         return RcCode.SUCCESS
 
@@ -351,17 +552,30 @@ class _ConsoleServerConfigDb:
         if group_name in self._group_dict:
             return RcCode.DATA_EXIST
         self._group_dict[group_name] = {"role": role}
+        self._group_user_dict[group_name] = set()
+        self._group_port_dict[group_name] = set()
+        self._record_undo(self.destroy_group, group_name)
         return RcCode.SUCCESS
 
     def destroy_group(self, group_name):
         if group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        del self._group_dict[group_name]
+        self._record_undo(self._restore_group, group_name, self._group_dict.pop(group_name),
+                          self._group_user_dict.pop(group_name), self._group_port_dict.pop(group_name))
+        return RcCode.SUCCESS
+
+    def _restore_group(self, group_name, group, user_set, port_set):
+        if group_name in self._group_dict:
+            return RcCode.DATA_EXIST
+        self._group_dict[group_name] = group
+        self._group_user_dict[group_name] = user_set
+        self._group_port_dict[group_name] = port_set
         return RcCode.SUCCESS
 
     def modify_group(self, group_name, role):
         if group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
+        self._record_undo(self.modify_group, group_name, self._group_dict[group_name]["role"])
         self._group_dict[group_name] = {"role": role}
         return RcCode.SUCCESS
 
@@ -372,44 +586,76 @@ class _ConsoleServerConfigDb:
             return RcCode.DATA_NOT_FOUND, None
         return RcCode.SUCCESS, self._group_dict[group_name]
 
+    def get_group_user_set(self, group_name):
+        if group_name not in self._group_user_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._group_user_dict[group_name]
+
+    def get_group_port_set(self, group_name):
+        if group_name not in self._group_port_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._group_port_dict[group_name]
+
     def user_join_group(self, username, group_name):
-        if username not in self._user_dict:
+        if username not in self._user_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        group_list = self._user_dict[username]["group_list"]
-        if group_name in group_list:
+        if username in self._group_user_dict[group_name]:
             return RcCode.DATA_EXIST
-        group_list.append(group_name)
+        self._user_dict[username]["group_list"].append(group_name)
+        self._group_user_dict[group_name].add(username)
+        self._record_undo(self.user_leave_group, username, group_name)
         return RcCode.SUCCESS
 
     def user_leave_group(self, username, group_name):
-        if username not in self._user_dict:
+        if username not in self._user_dict or group_name not in self._group_dict:
+            return RcCode.DATA_NOT_FOUND
+        if username not in self._group_user_dict[group_name]:
             return RcCode.DATA_NOT_FOUND
         group_list = self._user_dict[username]["group_list"]
-        if group_name not in group_list:
+        index = group_list.index(group_name)
+        del group_list[index]
+        self._group_user_dict[group_name].discard(username)
+        self._record_undo(self._restore_user_group, username, group_name, index)
+        return RcCode.SUCCESS
+
+    def _restore_user_group(self, username, group_name, index):
+        if username not in self._user_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        group_list.remove(group_name)
+        self._user_dict[username]["group_list"].insert(index, group_name)
+        self._group_user_dict[group_name].add(username)
         return RcCode.SUCCESS
 
     def port_join_group(self, serial_port_id, group_name):
-        if serial_port_id not in self._serial_port_dict:
+        if serial_port_id not in self._serial_port_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        if group_name in self._serial_port_dict[serial_port_id]["group_list"]:
+        if serial_port_id in self._group_port_dict[group_name]:
             return RcCode.DATA_EXIST
         self._serial_port_dict[serial_port_id]["group_list"].append(group_name)
+        self._group_port_dict[group_name].add(serial_port_id)
         return RcCode.SUCCESS
 
     def port_leave_group(self, serial_port_id, group_name):
-        if serial_port_id not in self._serial_port_dict:
+        if serial_port_id not in self._serial_port_dict or group_name not in self._group_dict:
             return RcCode.DATA_NOT_FOUND
-        if group_name in self._serial_port_dict[serial_port_id]["group_list"]:
+        if serial_port_id not in self._group_port_dict[group_name]:
             return RcCode.DATA_NOT_FOUND
         self._serial_port_dict[serial_port_id]["group_list"].remove(group_name)
+        self._group_port_dict[group_name].discard(serial_port_id)
         return RcCode.SUCCESS
 
 
 class ConsoleServer(multiprocessing.Process):
-    def __init__(self, daemon_id, max_client, num_of_serial_port):
+    def __init__(self, daemon_id, max_client, num_of_serial_port, scrollback_size=DEFAULT_SCROLLBACK_SIZE,
+                 client_output_limit=DEFAULT_CLIENT_OUTPUT_LIMIT, slow_consumer_policy=SlowConsumerPolicy.DROP_OLDEST,
+                 serial_tx_pacing=False, serial_rx_coalesce_window=DEFAULT_SERIAL_RX_COALESCE_WINDOW,
+                 shm_msg_queue=False):
         self._num_of_serial_port = num_of_serial_port
+        self._scrollback_size = scrollback_size
+        self._client_output_limit = client_output_limit
+        self._slow_consumer_policy = slow_consumer_policy
+        self._serial_tx_pacing = serial_tx_pacing
+        self._serial_rx_coalesce_window = serial_rx_coalesce_window
+        self._shm_msg_queue = shm_msg_queue
         self._daemon_id = daemon_id
         self._max_client = max_client
         multiprocessing.Process.__init__(self, name="ConsoleServer_{}".format(daemon_id))
@@ -427,37 +673,47 @@ class ConsoleServer(multiprocessing.Process):
 
         self._op_db = _ConsoleServerOpDb()
 
-        self._processing_time = 0.01
+        # The accounts and the groups shared with the handlers
+        self._acl_snapshot = ShmSnapshot()
+
+        # The handler, the required parameters, the permission and the scope of each request indexed by the opcode
+        self._request_dispatch_table = [None] * len(ConsoleServerOpcode)
+        self._init_request_dispatch_table()
+
+        # The opcode bitmask which each role can execute indexed by the role priority, and the bitmask of each user
+        self._role_permission_list = []
+        self._init_permission_matrix()
+        self._user_permission_dict = {}
 
-    def _reply_client_message(self, client_socket_obj, client_request, result, data):
+    def _reply_client_message(self, client_socket_obj, client_request, result, data, finish_request=True):
         # Create reply message
         reply_msg = ReplyMsg(
             client_request.request, client_request.serial_port_id, client_request.socket_fd,
-            client_request.exec_user, data, result)
+            client_request.exec_user, data, result, client_request.request_id)
         rc, msg_dict = reply_msg.get_msg()
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not convert the data to the dictionary.", rc=rc))
             return rc
 
-        # Message serialize
-        rc, msg_str = msg_serialize(msg_dict)
+        # Message serialize by the codec which the client uses
+        client_socket_fd = client_socket_obj.uds_client_socket_fd_get()
+        rc, codec = self._op_db.get_client_codec(client_socket_fd)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not serialize the data.", rc=rc))
-            return rc
-
-        # Send the total size of the message by socket
-        data_len = len(msg_str)
-        data_byte = data_len.to_bytes(4, byteorder='little')
-        rc = client_socket_obj.uds_client_socket_send(data_byte)
+            codec = MsgCodec.JSON
+        rc, msg_byte = msg_encode(msg_dict, codec)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not serialize the data.", rc=rc))
             return rc
 
-        # Send the message by socket
-        rc = client_socket_obj.uds_client_socket_send(bytes(msg_str, 'utf-8'))
+        # Send the total size and the message by socket
+        rc = client_socket_obj.uds_client_socket_send_frame(msg_byte)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not serialize the data.", rc=rc))
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not send the data.", rc=rc))
             return rc
+
+        # The request is complete. The next request of the client can be processed.
+        if finish_request:
+            self._op_db.finish_client_request(client_socket_fd, client_request.request_id)
         self._logger.info(self._logger_system.set_logger_rc_code("Reply client completely.", rc=rc))
         return RcCode.SUCCESS
     
@@ -514,9 +770,17 @@ class ConsoleServer(multiprocessing.Process):
     def _init_console_handler(self):
         # Create the process the for the socket
         rc = RcCode.SUCCESS
+
+        # The handlers inherit the shared memory of the ACL snapshot when they are forked
+        rc = self._acl_snapshot.init_snapshot()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not init the ACL snapshot.", rc=rc))
+            return rc
+
         for process_id in range(0, MAX_HANDLER_PROCESS):
-            # Create the message queue
-            msg_queue = BiMsgQueue(tx_blocking=False, tx_timeout=None, rx_blocking=False, rx_timeout=None)
+            # Create the message queue. The shared memory queue passes the messages without the feeder thread and the pipe.
+            msg_queue_class = ShmBiMsgQueue if self._shm_msg_queue else BiMsgQueue
+            msg_queue = msg_queue_class(tx_blocking=False, tx_timeout=None, rx_blocking=False, rx_timeout=None)
             rc = msg_queue.init_queue()
             if rc != RcCode.SUCCESS:
                 self._logger.error(
@@ -524,12 +788,30 @@ class ConsoleServer(multiprocessing.Process):
                 return rc
             
             # Create the console server handler
-            process_handler = ConsolerServerHandler(process_id, msg_queue.remote_peer_send_msg, msg_queue.remote_peer_receive_msg)
+            process_handler = ConsolerServerHandler(
+                process_id, msg_queue.remote_peer_send_msg, msg_queue.remote_peer_receive_msg,
+                msg_queue.remote_peer_receive_fd_get, scrollback_size=self._scrollback_size,
+                client_output_limit=self._client_output_limit, slow_consumer_policy=self._slow_consumer_policy,
+                serial_tx_pacing=self._serial_tx_pacing, serial_rx_coalesce_window=self._serial_rx_coalesce_window,
+                acl_snapshot=self._acl_snapshot)
             rc = self._op_db.add_process_handler(process_id, process_handler, msg_queue)
             if rc != RcCode.SUCCESS:
                 self._logger.error(
                     self._logger_system.set_logger_rc_code("Can not add the handler to the DB.", rc=rc))
                 return rc
+
+            # Wake up the daemon when the handler replies
+            rc, queue_fd = msg_queue.local_peer_receive_fd_get()
+            if rc != RcCode.SUCCESS:
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code("Can not get the fd of the message queue.", rc=rc))
+                return rc
+            rc = self._op_db.add_process_queue_fd(process_id, queue_fd)
+            if rc != RcCode.SUCCESS:
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code("Can not add the fd of the message queue to the DB.", rc=rc))
+                return rc
+            self._server_mgmt_epoll.register(queue_fd, select.EPOLLIN)
             process_handler.start()
         return rc
     
@@ -728,62 +1010,11 @@ class ConsoleServer(multiprocessing.Process):
             return rc
 
         # Update the DB
-        rc = self._config_db.add_user_account(DEFAULT_USER_ACCOUNT, DEFAULT_GROUP_NAME, DEFAULT_ROLE)
+        rc = self._config_db.add_user_account(DEFAULT_USER_ACCOUNT, DEFAULT_ROLE, DEFAULT_GROUP_NAME)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not add the user in the DB.", rc=rc))
             return rc
 
-        # Create the process the for the socket
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            rc, msg_queue = self._op_db.get_process_queue(process_id)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "The message queue for queue {} does not exist.".format(process_id), rc=rc))
-                return rc
-
-            # Send message to the handler
-            request = RequestMsg(ConsoleServerEvent.INIT_DEFAULT_ACCOUNT, 
-                                 data={"username": DEFAULT_USER_ACCOUNT, "group_name": DEFAULT_GROUP_NAME, "role": DEFAULT_ROLE})
-            rc = msg_queue.local_peer_send_msg(request)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code("Can not send the port initialize request.", rc=rc))
-                return rc
-
-        status_dict = {}
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            status_dict[process_id] = False
-        count = 0
-        while True:
-            break_check = True
-            for process_id in range(0, MAX_HANDLER_PROCESS):
-                if status_dict[process_id]:
-                    continue
-
-                # Receive the message from the queue
-                status = False
-                rc, reply = self._receive_queue_message(process_id)
-                if rc == RcCode.SUCCESS:
-                    # Check if handler has initialized completely
-                    if reply.request == ConsoleServerEvent.INIT_DEFAULT_ACCOUNT and reply.result == "OK":
-                        self._logger.info(
-                            self._logger_system.set_logger_rc_code(
-                                "Process {} has created the default account.".format(process_id), rc=rc))
-                        status_dict[process_id] = True
-                        status = True
-
-                # Summary the process status
-                break_check = break_check and status
-
-            # Process initialize completely. Stop the loop
-            if break_check:
-                break
-            else:
-                # Update the counter
-                count = count + 1
-                time.sleep(1)
-
         # Update the DB
         rc = self._op_db.create_group(DEFAULT_GROUP_NAME, DEFAULT_ROLE)
         if rc != RcCode.SUCCESS:
@@ -792,253 +1023,212 @@ class ConsoleServer(multiprocessing.Process):
             return rc
 
         # Update the DB
-        rc = self._op_db.add_user_account(DEFAULT_USER_ACCOUNT, DEFAULT_GROUP_NAME, DEFAULT_ROLE)
+        rc = self._op_db.add_user_account(DEFAULT_USER_ACCOUNT, DEFAULT_ROLE, DEFAULT_GROUP_NAME)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not add the user in the DB.", rc=rc))
             return rc
+
+        # The handlers check the default account by the ACL snapshot
+        rc = self._publish_acl_snapshot()
+        if rc != RcCode.SUCCESS:
+            return rc
         return RcCode.SUCCESS
-    
+
+    def _publish_acl_snapshot(self):
+        # Publish the accounts and the groups of the operation DB. The handlers read them when a user connects, so the
+        # account changes do not wait for every handler.
+        rc, user_dict = self._op_db.get_user_account()
+        if rc != RcCode.SUCCESS:
+            return rc
+        rc, group_dict = self._op_db.get_group()
+        if rc != RcCode.SUCCESS:
+            return rc
+        rc = self._acl_snapshot.publish_snapshot({"user": user_dict, "group": group_dict})
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not publish the ACL snapshot.", rc=rc))
+            return rc
+        return RcCode.SUCCESS
+
+    def _start_account_change(self):
+        # Record the account changes of the request in both DBs
+        self._config_db.start_undo_log()
+        self._op_db.start_undo_log()
+
+    def _stop_account_change(self):
+        _, config_undo_list = self._config_db.stop_undo_log()
+        _, op_undo_list = self._op_db.stop_undo_log()
+        return config_undo_list, op_undo_list
+
+    def _publish_account_change(self, config_undo_list=None):
+        # Publish the accounts which the request has changed. If they can not be published, revert the changes of the
+        # request in both DBs, so that the DBs keep the accounts which the handlers use and the request can be retried.
+        recorded_config_undo_list, op_undo_list = self._stop_account_change()
+        if config_undo_list is not None:
+            recorded_config_undo_list = config_undo_list + recorded_config_undo_list
+        rc = self._publish_acl_snapshot()
+        if rc == RcCode.SUCCESS:
+            return RcCode.SUCCESS
+
+        self._logger.warning(self._logger_system.set_logger_rc_code("Revert the account changes of the request."))
+        undo_rc = self._op_db.apply_undo_log(op_undo_list)
+        if undo_rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not revert the account changes in the operation DB.", rc=undo_rc))
+        undo_rc = self._config_db.apply_undo_log(recorded_config_undo_list)
+        if undo_rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not revert the account changes in the config DB.", rc=undo_rc))
+        self._invalidate_user_permission()
+        return rc
+
     ##########################################################################################################
     # Process Message Queue Data Relate API
     ##########################################################################################################
 
     def _check_request_is_valid(self, reply, client_socket_obj):
         # Get the source request
-        rc, request_msg = self._op_db.get_client_request(reply.socket_fd)
+        rc, request_msg = self._op_db.get_client_request(reply.socket_fd, reply.request_id)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Get origin request fail.", rc=rc))
-            return self._reply_client_message(client_socket_obj, reply,
-                                              "failed", "Verify the data failed.")
+            self._reply_client_message(client_socket_obj, reply, "failed", "Verify the data failed.")
+            return rc
 
         # Check if the request data is the same with the handler reply
         if request_msg.request != reply.request or request_msg.socket_fd != reply.socket_fd or \
             request_msg.serial_port_id != reply.serial_port_id:
-            return self._reply_client_message(client_socket_obj, reply,
-                                            "failed", "Invalid serial prot number.")
+            self._reply_client_message(client_socket_obj, reply, "failed", "Invalid serial prot number.")
+            return RcCode.INVALID_VALUE
         return RcCode.SUCCESS
     
     def _update_request_information(self, reply, client_socket_obj):
+        # The client has been replied if the reply can not be applied, so the caller stops processing the reply
         # Update DB if handler handles the request successful
         if reply.result != "OK":
             self._logger.error(self._logger_system.set_logger_rc_code("Handler the request failed."))
-            return self._reply_client_message(client_socket_obj, reply,
-                                              "failed", "Handler the request failed.")
+            self._reply_client_message(client_socket_obj, reply, "failed", "Handler the request failed.")
+            return RcCode.FAILURE
 
         # Delete the source request
-        rc = self._op_db.del_client_request(reply.socket_fd)
+        rc = self._op_db.del_client_request(reply.socket_fd, reply.request_id)
         if rc != RcCode.SUCCESS:
             self._logger.info(self._logger_system.set_logger_rc_code("Delete origin request fail.", rc=rc))
-            return self._reply_client_message(client_socket_obj, reply,
-                                              "failed", "Delete original request failed.")
+            self._reply_client_message(client_socket_obj, reply, "failed", "Delete original request failed.")
+            return rc
         return RcCode.SUCCESS
     
-    def _update_process_reply_info(self, reply, client_socket_obj):
-        # Get the source request
-        rc, request = self._op_db.get_client_request(reply.socket_fd)
+    def _handle_config_baud_rate_reply(self, reply, client_socket_obj, process_id):
+        # Check if the request is valid
+        rc = self._check_request_is_valid(reply, client_socket_obj)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Delete origin request fail.", rc=rc))
-            return self._reply_client_message(client_socket_obj, reply,
-                                              "failed", "Delete original request failed.")
+            return rc
 
-        process_id = reply.data["process_id"]
-        request.data["ready"][process_id] = True
-        request.data["status"][process_id] = True if reply.result == "OK" else False
-        return RcCode.SUCCESS
-    
-    def _check_process_reply_info(self, reply, client_socket_obj):
-        # Get the source request
-        rc, request = self._op_db.get_client_request(reply.socket_fd)
+        # Update the DB
+        rc = self._update_request_information(reply, client_socket_obj)
         if rc != RcCode.SUCCESS:
-            self._logger.info(self._logger_system.set_logger_rc_code("Delete origin request fail.", rc=rc))
-            return self._reply_client_message(client_socket_obj, reply,
-                                              "failed", "Delete original request failed.")
-
-        complete = True
-        status = True
-        for i in range(0, MAX_HANDLER_PROCESS):
-            if not request.data["ready"][i]:
-                complete = False
-                status = False
-                break
-            status = status and request.data["status"][i]
-        return RcCode.SUCCESS, complete, status
+            return rc
 
-    def _handle_client_reply(self, reply):
-        self._logger.info(self._logger_system.set_logger_rc_code("Receive the request {}.".format(reply.request)))
-        # Do other action if request need
-        match reply.request:
-            case ConsoleServerEvent.SET_BAUD_RATE:
-                # Get the socket object
-                rc, client_socket_obj = self._op_db.get_client_socket(reply.socket_fd)
-                if rc != RcCode.SUCCESS:
-                    self._logger.error(
-                        self._logger_system.set_logger_rc_code("Can not find the socket in the DB for request {}.".format(reply.request), rc=rc))
-                    return rc
-                
-                # Check if the request is valid
-                rc = self._check_request_is_valid(reply, client_socket_obj)
-                if rc != RcCode.SUCCESS:
-                    return rc
-                
-                # Update the DB
-                rc = self._update_request_information(reply, client_socket_obj)
-                if rc != RcCode.SUCCESS:
-                    return rc
+        # Config the new baud rate in the DB
+        rc = self._op_db.modify_serial_port(reply.serial_port_id, "baud_rate", reply.data["baud_rate"])
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not update the baud rate of the port in the operation DB.", rc=rc))
+            return rc
 
-                # Config the new baud rate in the DB
-                rc = self._op_db.modify_serial_port(reply.serial_port_id, "baud_rate", reply.data["baud_rate"])
-                if rc != RcCode.SUCCESS:
-                    self._logger.error(self._logger_system.set_logger_rc_code(
-                        "Can not update the baud rate of the port in the operation DB.", rc=rc))
-                    return rc
-            case ConsoleServerEvent.CREATE_GROUP | ConsoleServerEvent.DESTROY_GROUP | \
-                ConsoleServerEvent.ADD_USER_ACCOUNT | ConsoleServerEvent.DEL_USER_ACCOUNT | \
-                ConsoleServerEvent.USER_JOIN_GROUP | ConsoleServerEvent.USER_LEAVE_GROUP | \
-                ConsoleServerEvent.PORT_JOIN_GROUP | ConsoleServerEvent.PORT_LEAVE_GROUP:
-                # Get the socket object
-                rc, client_socket_obj = self._op_db.get_client_socket(reply.socket_fd)
-                if rc != RcCode.SUCCESS:
-                    self._logger.error(
-                        self._logger_system.set_logger_rc_code("Can not find the socket in the DB for request {}.".format(reply.request), rc=rc))
-                    return rc
-                
-                # Check if the request is valid
-                rc = self._check_request_is_valid(reply, client_socket_obj)
-                if rc != RcCode.SUCCESS:
-                    return rc
+        # Reply the message to the user
+        return self._reply_client_message(client_socket_obj, reply, reply.result, reply.data)
 
-                # Update DB if handler handles the request successful
-                rc = self._update_process_reply_info(reply, client_socket_obj)
-                if rc != RcCode.SUCCESS:
-                    return rc
+    def _handle_port_counters_reply(self, reply, client_socket_obj, process_id):
+        # Check if the request is valid
+        rc = self._check_request_is_valid(reply, client_socket_obj)
+        if rc != RcCode.SUCCESS:
+            return rc
 
-                # Check the request status
-                rc, complete, status = self._check_process_reply_info(reply, client_socket_obj)
-                if rc != RcCode.SUCCESS:
-                    return rc
-                if not complete:
-                    # The process does not still process the request.
-                    return RcCode.SUCCESS
-                reply.result = "OK" if status else "Failed"
-                del reply.data["ready"]
-                del reply.data["status"]
-                del reply.data["process_id"]
-
-                match reply.request:
-                    case ConsoleServerEvent.CREATE_GROUP:
-                        # Update the DB
-                        rc = self._op_db.create_group(reply.data["group_name"], reply.data["role"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "Can not create the group in the operation DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "Can not create the group in the operation DB.")
-                    case ConsoleServerEvent.DESTROY_GROUP:
-                        # Update the DB
-                        rc = self._op_db.destroy_group(reply.data["group_name"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "Can not destroy the group in the operation DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "Can not destroy the group in the operation DB.")
-                    case ConsoleServerEvent.ADD_USER_ACCOUNT:
-                        # Update the DB
-                        rc = self._op_db.add_user_account(reply.data["username"], reply.data["role"], reply.data["group_name"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "Can not add the user in the operation DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "Can not add the user in the operation DB.")
-                    case ConsoleServerEvent.DEL_USER_ACCOUNT:
-                        # Update the DB
-                        rc = self._op_db.del_user_account(reply.data["username"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "Can not delete the user in the operation DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "Can not delete the user in the operation DB.")
-                    case ConsoleServerEvent.USER_JOIN_GROUP:
-                        # Update the DB
-                        rc = self._op_db.user_join_group(reply.data["username"], reply.data["group_name"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "User can not join the group in the DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "User can not join the group in the operation DB.")
-                    case ConsoleServerEvent.USER_LEAVE_GROUP:
-                        # Update the DB
-                        rc = self._op_db.user_leave_group(reply.data["username"], reply.data["group_name"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "User can not leave the group in the DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "User can not leave the group in the DB.")
-                    case ConsoleServerEvent.PORT_JOIN_GROUP:
-                        # Update the DB
-                        rc = self._config_db.port_join_group(reply.serial_port_id, reply.data["group_name"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "Port can not join the group in the operation DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "Port can not join the group in the operation DB.")
-                    case ConsoleServerEvent.PORT_LEAVE_GROUP:
-                        # Update the DB
-                        rc = self._op_db.port_leave_group(reply.serial_port_id, reply.data["group_name"])
-                        if rc != RcCode.SUCCESS:
-                            self._logger.error(self._logger_system.set_logger_rc_code(
-                                "Port can not leave the group in the operation DB.", rc=rc))
-                            return self._reply_client_message(client_socket_obj, reply,
-                                                              "failed", "Port can not leave the group in the operation DB.")
-            case _:
-                return RcCode.INVALID_VALUE
+        # Update the DB
+        rc = self._update_request_information(reply, client_socket_obj)
+        if rc != RcCode.SUCCESS:
+            return rc
 
         # Reply the message to the user
-        rc = self._reply_client_message(client_socket_obj, reply, reply.result, reply.data)
+        return self._reply_client_message(client_socket_obj, reply, reply.result, reply.data)
+
+    def _handle_port_group_reply(self, reply, client_socket_obj, process_id):
+        # Check if the request is valid
+        rc = self._check_request_is_valid(reply, client_socket_obj)
         if rc != RcCode.SUCCESS:
             return rc
-        return RcCode.SUCCESS
-    
-    def process_message_queue_event(self):
-        # handle the reply message sent from handler
-        for process_id in range(MAX_HANDLER_PROCESS):
-            # Receive the reply from the handler
-            rc, client_reply = self._receive_queue_message(process_id)
-            if rc != RcCode.SUCCESS:
-                # No such data to read. Process next queue
-                continue
 
-            # Handle the reply
-            rc = self._handle_client_reply(client_reply)
-            if rc != RcCode.SUCCESS:
-                continue
-        return RcCode.SUCCESS
-    
-    ##########################################################################################################
-    # Process Socket Data Relate API
-    ##########################################################################################################
+        # Update the DB
+        rc = self._update_request_information(reply, client_socket_obj)
+        if rc != RcCode.SUCCESS:
+            return rc
 
-    def _valid_baud_rate_config(self, client_request, client_socket_obj):
-        # Check the serial port ID is valid
-        if client_request.serial_port_id > self._num_of_serial_port:
-            self._logger.info(self._logger_system.set_logger_rc_code("Invalid serial prot number."))
-            rc = self._reply_client_message(
-                client_socket_obj, client_request, "failed", "Invalid serial prot number.")
+        if reply.request == ConsoleServerEvent.PORT_JOIN_GROUP:
+            rc = self._op_db.port_join_group(reply.serial_port_id, reply.data["group_name"])
             if rc != RcCode.SUCCESS:
-                return rc
-            return RcCode.INVALID_VALUE
-
-        # Check the serial port ID is valid
-        try:
-            baud_rate = client_request.data["baud_rate"]
-        except KeyError:
-            self._logger.info(self._logger_system.set_logger_rc_code("Invalid the data of the serial prot ID."))
-            rc = self._reply_client_message(
-                client_socket_obj, client_request, "failed", "Invalid the data of the serial prot ID.")
+                self._logger.error(self._logger_system.set_logger_rc_code(
+                    "Port can not join the group in the operation DB.", rc=rc))
+                return self._reply_client_message(client_socket_obj, reply,
+                                                  "failed", "Port can not join the group in the operation DB.")
+        else:
+            rc = self._op_db.port_leave_group(reply.serial_port_id, reply.data["group_name"])
             if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not reply the message.", rc=rc))
-                return rc
+                self._logger.error(self._logger_system.set_logger_rc_code(
+                    "Port can not leave the group in the operation DB.", rc=rc))
+                return self._reply_client_message(client_socket_obj, reply,
+                                                  "failed", "Port can not leave the group in the operation DB.")
+
+        # Reply the message to the user
+        return self._reply_client_message(client_socket_obj, reply, reply.result, reply.data)
+
+    def _handle_client_reply(self, reply, process_id):
+        self._logger.info(self._logger_system.set_logger_rc_code("Receive the request {}.".format(reply.request)))
+        # Only the requests processed by the handlers have the reply
+        rc, entry = self._get_request_entry(reply.request)
+        if rc != RcCode.SUCCESS or entry["reply_func"] is None:
             return RcCode.INVALID_VALUE
-        if baud_rate not in VALID_BAUD_RATE:
+
+        # Get the socket object
+        rc, client_socket_obj = self._op_db.get_client_socket(reply.socket_fd)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not find the socket in the DB for request {}.".format(reply.request), rc=rc))
+            return rc
+
+        # The client sent the request is disconnected and its fd is used by another client. Drop the stale reply.
+        rc, connection_id = self._op_db.get_client_connection_id(reply.socket_fd)
+        if rc != RcCode.SUCCESS:
+            return rc
+        if reply.connection_id != connection_id:
+            self._logger.warning(self._logger_system.set_logger_rc_code(
+                "Drop the reply of request {} for the closed connection.".format(reply.request)))
+            return RcCode.DATA_NOT_FOUND
+
+        # Do other action if request need, and reply the message to the user
+        return entry["reply_func"](reply, client_socket_obj, process_id)
+
+    def process_message_queue_event(self, process_id):
+        # handle all the reply messages sent from the handler
+        while True:
+            # Receive the reply from the handler
+            rc, client_reply = self._receive_queue_message(process_id)
+            if rc == RcCode.QUEUE_ENPTY:
+                # No such data to read
+                return RcCode.SUCCESS
+            elif rc != RcCode.SUCCESS:
+                return rc
+
+            # Handle the reply
+            rc = self._handle_client_reply(client_reply, process_id)
+            if rc != RcCode.SUCCESS:
+                continue
+    
+    ##########################################################################################################
+    # Process Socket Data Relate API
+    ##########################################################################################################
+
+    def _valid_baud_rate_config(self, client_request, client_socket_obj):
+        # Check the baud rate is valid
+        if client_request.data["baud_rate"] not in VALID_BAUD_RATE:
             self._logger.warning(self._logger_system.set_logger_rc_code("Not supported baud rate."))
             rc = self._reply_client_message(client_socket_obj, client_request,
                                             "failed", "Not supported baud rate.")
@@ -1074,11 +1264,6 @@ class ConsoleServer(multiprocessing.Process):
     def _process_config_baud_rate(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process baud rate request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["baud_rate"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         # Check if the baud rate is valid
         rc = self._valid_baud_rate_config(client_request, client_socket_obj)
         if rc == RcCode.INVALID_VALUE:
@@ -1104,7 +1289,8 @@ class ConsoleServer(multiprocessing.Process):
 
         # Send the request to the handler
         handler_request = RequestMsg(
-            client_request.request, client_request.serial_port_id, client_socket_fd, client_request.data)
+            client_request.request, client_request.serial_port_id, client_socket_fd, client_request.exec_user,
+            client_request.data, request_id=client_request.request_id, connection_id=client_request.connection_id)
         rc = message_queue.local_peer_send_msg(handler_request)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
@@ -1125,11 +1311,6 @@ class ConsoleServer(multiprocessing.Process):
     def _process_config_alias_name(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process config alias name request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["alias_name"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         rc = self._config_db.modify_serial_port(client_request.serial_port_id, "alias_name", client_request.data["alias_name"])
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
@@ -1185,13 +1366,39 @@ class ConsoleServer(multiprocessing.Process):
         self._logger.info(self._logger_system.set_logger_rc_code("Process get port config request successful."))
         return RcCode.SUCCESS
 
-    def _process_create_group(self, client_socket_fd, client_request, client_socket_obj):
-        self._logger.info(self._logger_system.set_logger_rc_code("Process create group request"))
+    def _process_get_port_counters(self, client_socket_fd, client_request, client_socket_obj):
+        self._logger.info(self._logger_system.set_logger_rc_code("Process get port counters request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["group_name", "role"]):
+        # Check the target handler
+        process_id = (client_request.serial_port_id - 1) % 8
+        rc, message_queue = self._op_db.get_process_queue(process_id)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not gert the message queue.", rc=rc))
+            return rc
+
+        # Send the request to the handler
+        handler_request = RequestMsg(
+            client_request.request, client_request.serial_port_id, client_socket_fd, client_request.exec_user, {},
+            request_id=client_request.request_id, connection_id=client_request.connection_id)
+        rc = message_queue.local_peer_send_msg(handler_request)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not send the message to the remote handler.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
+                                              "failed", "Can not send the message to remote handler.")
+
+        # Store the request sending to the handler
+        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not add the client request in the DB.")
+
+        self._logger.info(self._logger_system.set_logger_rc_code("Process get port counters request successful."))
+        return RcCode.SUCCESS
+
+    def _process_create_group(self, client_socket_fd, client_request, client_socket_obj):
+        self._logger.info(self._logger_system.set_logger_rc_code("Process create group request"))
 
         # Check if role is valid
         if not UserRole.is_valid(client_request.data["role"]):
@@ -1207,37 +1414,21 @@ class ConsoleServer(multiprocessing.Process):
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Can not create the group in the config DB.")
 
-        # Check the target handler
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            rc, message_queue = self._op_db.get_process_queue(process_id)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not get the message queue.", rc=rc))
-                return rc
-
-            # Send the request to the handler
-            handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, client_request.data)
-            rc = message_queue.local_peer_send_msg(handler_request)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code("Can not send the meesage to the remote handler.", rc=rc))
-                return self._reply_client_message(client_socket_obj, client_request,
-                                                  "failed", "Can not send the message to remote handler.")
-
-        # Create reply list
-        new_data = client_request.data
-        new_data["ready"] = {}
-        new_data["status"] = {}
-        for i in range(0, MAX_HANDLER_PROCESS):
-            new_data["ready"][i] = False
-            new_data["status"][i] = False
-
-        # Store the request sending to the handler
-        handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, new_data)
-        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        # Update the operation DB. The handlers read the accounts from the ACL snapshot when the user connects.
+        rc = self._op_db.create_group(client_request.data["group_name"], client_request.data["role"])
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not create the group in the operation DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Can not add the client request in the DB.")
+                                              "failed", "Can not create the group in the operation DB.")
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
+
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
+        if rc != RcCode.SUCCESS:
+            return rc
 
         self._logger.info(self._logger_system.set_logger_rc_code("Process add group request successful."))
         return RcCode.SUCCESS
@@ -1249,39 +1440,30 @@ class ConsoleServer(multiprocessing.Process):
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Should not delete the default group.")
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["group_name"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         group_name = client_request.data["group_name"]
 
         # Check if the user has been deleted from the group
-        rc, user_dict = self._op_db.get_user_account()
+        rc, user_set = self._op_db.get_group_user_set(group_name)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not get the users in the DB.", rc=rc))
+                "Can not get the users of the group in the DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Can not get the users in the DB.")
-        for username in user_dict:
-            if group_name in user_dict[username]["group_list"]:
-                self._logger.error(self._logger_system.set_logger_rc_code(
-                    "The group still has the user.", rc=rc))
-                return self._reply_client_message(client_socket_obj, client_request,
-                                                  "failed", "The group still has the user.")
+                                              "failed", "Can not get the users of the group in the DB.")
+        if len(user_set) != 0:
+            self._logger.error(self._logger_system.set_logger_rc_code("The group still has the user."))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "The group still has the user.")
 
-        rc, port_list = self._op_db.get_serial_port()
+        rc, port_set = self._op_db.get_group_port_set(group_name)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not get the serial ports in the DB.", rc=rc))
+                "Can not get the serial ports of the group in the DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Can not get the serial ports in the DB.")
-        for serial_port_id in port_list:
-            if group_name in port_list[serial_port_id]["group_list"]:
-                self._logger.error(self._logger_system.set_logger_rc_code(
-                    "The group still has the serial port.", rc=rc))
-                return self._reply_client_message(client_socket_obj, client_request,
-                                                  "failed", "The group still has the serial port.")
+                                              "failed", "Can not get the serial ports of the group in the DB.")
+        if len(port_set) != 0:
+            self._logger.error(self._logger_system.set_logger_rc_code("The group still has the serial port."))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "The group still has the serial port.")
 
         # Update the DB
         rc = self._config_db.destroy_group(group_name)
@@ -1291,37 +1473,21 @@ class ConsoleServer(multiprocessing.Process):
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Can not destroy the group in the config DB.")
 
-        # Check the target handler
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            rc, message_queue = self._op_db.get_process_queue(process_id)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not get the message queue.", rc=rc))
-                return rc
-
-            # Send the request to the handler
-            handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, client_request.data)
-            rc = message_queue.local_peer_send_msg(handler_request)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code(
-                    "Can not send the message to the remote handler.", rc=rc))
-                return self._reply_client_message(client_socket_obj, client_request,
-                                                  "failed", "Can not send the message to remote handler.")
-
-        # Create reply list
-        new_data = client_request.data
-        new_data["ready"] = {}
-        new_data["status"] = {}
-        for i in range(0, MAX_HANDLER_PROCESS):
-            new_data["ready"][i] = False
-            new_data["status"][i] = False
-
-        # Store the request sending to the handler
-        handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, new_data)
-        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        # Update the operation DB. The handlers read the accounts from the ACL snapshot when the user connects.
+        rc = self._op_db.destroy_group(group_name)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not destroy the group in the operation DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Can not add the client request in the DB.")
+                                              "failed", "Can not destroy the group in the operation DB.")
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
+
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
+        if rc != RcCode.SUCCESS:
+            return rc
 
         self._logger.info(self._logger_system.set_logger_rc_code("Process destroy group request successful."))
         return RcCode.SUCCESS
@@ -1333,11 +1499,6 @@ class ConsoleServer(multiprocessing.Process):
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Should not modify the default group.")
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["group_name", "role"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         group_name = client_request.data["group_name"]
         role = client_request.data["role"]
 
@@ -1349,38 +1510,44 @@ class ConsoleServer(multiprocessing.Process):
                                               "failed", "Can not destroy the group in the config DB.")
 
         # Update the role for the related user
-        rc, user_dict =  self._op_db.get_user_account()
+        rc, user_set = self._op_db.get_group_user_set(group_name)
         if rc != RcCode.SUCCESS:
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Can not get the users in the opeeration DB")
-        for username in user_dict:
-            if group_name in user_dict[username]["group_list"]:
-                # The group list has changed. Sync the user role
-                rc, update_role, msg = self._sync_user_role(username)
-                if rc != RcCode.SUCCESS:
-                    return self._reply_client_message(client_socket_obj, client_request, "failed", msg)
-                self._logger.info(self._logger_system.set_logger_rc_code("The new role {} applies to the operation DB".format(role)))
+        for username in user_set:
+            # The group list has changed. Sync the user role
+            rc, update_role, msg = self._sync_user_role(username)
+            if rc != RcCode.SUCCESS:
+                return self._reply_client_message(client_socket_obj, client_request, "failed", msg)
+            self._logger.info(self._logger_system.set_logger_rc_code("The new role {} applies to the operation DB".format(role)))
 
-                # Check the role has changed
-                rc, original_role = self._op_db.get_user_account_role(username)
+            # Check the role has changed
+            rc, original_role = self._op_db.get_user_account_role(username)
+            if rc != RcCode.SUCCESS:
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code("Can not get the user role in the operation DB.", rc=rc))
+                return self._reply_client_message(client_socket_obj, client_request,
+                                                "failed", "Can not get the user role in the operation DB.")
+            if original_role != update_role:
+                rc = self._op_db.modify_user_account_role(username, update_role)
                 if rc != RcCode.SUCCESS:
                     self._logger.error(
-                        self._logger_system.set_logger_rc_code("Can not get the user role in the operation DB.", rc=rc))
+                        self._logger_system.set_logger_rc_code("Can not set the user role in the operation DB.", rc=rc))
                     return self._reply_client_message(client_socket_obj, client_request,
-                                                    "failed", "Can not get the user role in the operation DB.")
-                if original_role != update_role:
-                    rc = self._op_db.modify_user_account_role(username, update_role)
-                    if rc != RcCode.SUCCESS:
-                        self._logger.error(
-                            self._logger_system.set_logger_rc_code("Can not set the user role in the operation DB.", rc=rc))
-                        return self._reply_client_message(client_socket_obj, client_request,
-                                                        "failed", "Can not set the user role in the operation DB.")
+                                                    "failed", "Can not set the user role in the operation DB.")
 
         rc = self._op_db.modify_group(group_name, role)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not destroy the group in the config DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Can not destroy the group in the config DB.")
+        self._invalidate_user_permission()
+
+        # Publish the new role to the handlers
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
 
         rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
         if rc != RcCode.SUCCESS:
@@ -1422,7 +1589,25 @@ class ConsoleServer(multiprocessing.Process):
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Can not get the group in the DB.")
 
-        rc = self._reply_client_message(client_socket_obj, client_request, "OK", group_dict)
+        # Add the members of the group by the reverse indexes
+        group_status_dict = {}
+        group_name_list = [group_name] if group_name is not None else list(group_dict)
+        for name in group_name_list:
+            rc, user_set = self._op_db.get_group_user_set(name)
+            if rc != RcCode.SUCCESS:
+                return self._reply_client_message(client_socket_obj, client_request,
+                                                  "failed", "Can not get the users of the group in the DB.")
+            rc, port_set = self._op_db.get_group_port_set(name)
+            if rc != RcCode.SUCCESS:
+                return self._reply_client_message(client_socket_obj, client_request,
+                                                  "failed", "Can not get the serial ports of the group in the DB.")
+            group = group_dict if group_name is not None else group_dict[name]
+            group_status_dict[name] = {"role": group["role"], "user_list": sorted(user_set),
+                                       "serial_port_list": sorted(port_set)}
+
+        if group_name is not None:
+            group_status_dict = group_status_dict[group_name]
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", group_status_dict)
         if rc != RcCode.SUCCESS:
             return rc
 
@@ -1432,16 +1617,13 @@ class ConsoleServer(multiprocessing.Process):
     def _process_add_user_account(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process add user request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["username", "role", "group_name"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         username = client_request.data["username"]
         group_name = client_request.data["group_name"]
         role = ""
 
-        # Check if role is valid
+        # Check if role is valid. The user without the role uses the role of the group.
+        if client_request.data.get("role") is None:
+            client_request.data["role"] = ""
         if client_request.data["role"] != "":
             if not UserRole.is_valid(client_request.data["role"]):
                 self._logger.error(self._logger_system.set_logger_rc_code("Invalid user role."))
@@ -1464,37 +1646,21 @@ class ConsoleServer(multiprocessing.Process):
                 return RcCode.SUCCESS
             client_request.data["role"] = group["role"]
 
-        # Check the target handler
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            rc, message_queue = self._op_db.get_process_queue(process_id)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not get the message queue.", rc=rc))
-                return rc
-
-            # Send the request to the handler
-            handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, client_request.data)
-            rc = message_queue.local_peer_send_msg(handler_request)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code("Can not send the message to the remote handler.", rc=rc))
-                return self._reply_client_message(client_socket_obj, client_request,
-                                                  "failed", "Can not send the message to remote handler.")
-
-        # Create reply list
-        new_data = client_request.data
-        new_data["ready"] = {}
-        new_data["status"] = {}
-        for i in range(0, MAX_HANDLER_PROCESS):
-            new_data["ready"][i] = False
-            new_data["status"][i] = False
-
-        # Store the request sending to the handler
-        handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, new_data)
-        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        # Update the operation DB. The handlers read the accounts from the ACL snapshot when the user connects.
+        rc = self._op_db.add_user_account(username, client_request.data["role"], group_name)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not add the user in the operation DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Can not add the client request in the DB.")
+                                              "failed", "Can not add the user in the operation DB.")
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
+
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
+        if rc != RcCode.SUCCESS:
+            return rc
 
         self._logger.info(self._logger_system.set_logger_rc_code("Process add user request successful."))
         return RcCode.SUCCESS
@@ -1506,12 +1672,6 @@ class ConsoleServer(multiprocessing.Process):
         if client_request.data["username"] == DEFAULT_USER_ACCOUNT:
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Should not delete the default user.")
-            
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["username"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
 
         # Update the DB
         rc = self._config_db.del_user_account(client_request.data["username"])
@@ -1520,37 +1680,22 @@ class ConsoleServer(multiprocessing.Process):
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Can not delete the user in the config DB.")
 
-        # Check the target handler
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            rc, message_queue = self._op_db.get_process_queue(process_id)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not gert the message queue.", rc=rc))
-                return rc
-
-            # Send the request to the handler
-            handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, client_request.data)
-            rc = message_queue.local_peer_send_msg(handler_request)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code(
-                    "Can not send the message to the remote handler.", rc=rc))
-                return self._reply_client_message(client_socket_obj, client_request,
-                                                  "failed", "Can not send the message to remote handler.")
-
-        # Create reply list
-        new_data = client_request.data
-        new_data["ready"] = {}
-        new_data["status"] = {}
-        for i in range(0, MAX_HANDLER_PROCESS):
-            new_data["ready"][i] = False
-            new_data["status"][i] = False
-
-        # Store the request sending to the handler
-        handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, new_data)
-        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        # Update the operation DB. The handlers read the accounts from the ACL snapshot when the user connects.
+        rc = self._op_db.del_user_account(client_request.data["username"])
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Can not delete the user in the operation DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Can not add the client request in the DB.")
+                                              "failed", "Can not delete the user in the operation DB.")
+        self._invalidate_user_permission(client_request.data["username"])
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
+
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
+        if rc != RcCode.SUCCESS:
+            return rc
 
         self._logger.info(self._logger_system.set_logger_rc_code("Process delete user request successful."))
         return RcCode.SUCCESS
@@ -1558,11 +1703,6 @@ class ConsoleServer(multiprocessing.Process):
     def _process_modify_user_role(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process modify user role request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["role"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         username = client_request.data["username"]
         role = client_request.data["role"]
 
@@ -1600,8 +1740,15 @@ class ConsoleServer(multiprocessing.Process):
                     self._logger_system.set_logger_rc_code("Can not set the user role in the operation DB.", rc=rc))
                 return self._reply_client_message(client_socket_obj, client_request,
                                                   "failed", "Can not set the user role in the operation DB.")
+        self._invalidate_user_permission(username)
 
         client_request.data["role"] = role
+        # Publish the new role to the handlers
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
+
         rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
         if rc != RcCode.SUCCESS:
             return rc
@@ -1647,6 +1794,23 @@ class ConsoleServer(multiprocessing.Process):
         self._logger.info(self._logger_system.set_logger_rc_code("Process new get port config request successful."))
         return RcCode.SUCCESS
     
+    def _process_get_permission_matrix(self, client_socket_fd, client_request, client_socket_obj):
+        self._logger.info(self._logger_system.set_logger_rc_code("Process get permission matrix request"))
+
+        # Dump the requests which each role can execute
+        permission_dict = {}
+        for role in UserRole.get_list():
+            permission = self._role_permission_list[UserRolePriorityDict[role]]
+            permission_dict[str(role)] = [str(entry["request"]) for entry in self._request_dispatch_table
+                                          if entry is not None and permission & (1 << entry["opcode"])]
+
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", permission_dict)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        self._logger.info(self._logger_system.set_logger_rc_code("Process get permission matrix request successful."))
+        return RcCode.SUCCESS
+
     def _process_user_join_group(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process user join group request {}".format(client_request.data)))
 
@@ -1654,11 +1818,6 @@ class ConsoleServer(multiprocessing.Process):
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Deafult user should not leave the default group.")
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["username", "group_name"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         username = client_request.data["username"]
         group_name = client_request.data["group_name"]
 
@@ -1687,37 +1846,22 @@ class ConsoleServer(multiprocessing.Process):
                 return self._reply_client_message(client_socket_obj, client_request,
                                                   "failed", "Can not set the user role in the operation DB.")
 
-        # Check the target handler
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            rc, message_queue = self._op_db.get_process_queue(process_id)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not gert the message queue.", rc=rc))
-                return rc
-
-            # Send the request to the handler
-            handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, client_request.data)
-            rc = message_queue.local_peer_send_msg(handler_request)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code("Can not send the message to the remote handler.", rc=rc))
-                return self._reply_client_message(
-                    client_socket_obj, client_request, "failed", "Can not send the message to remote handler.")
-
-        # Create reply list
-        new_data = client_request.data
-        new_data["ready"] = {}
-        new_data["status"] = {}
-        for i in range(0, MAX_HANDLER_PROCESS):
-            new_data["ready"][i] = False
-            new_data["status"][i] = False
-
-        # Store the request sending to the handler
-        handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, new_data)
-        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        # Update the operation DB. The handlers read the accounts from the ACL snapshot when the user connects.
+        rc = self._op_db.user_join_group(username, group_name)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "User can not join the group in the operation DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Can not add the client request in the DB.")
+                                              "failed", "User can not join the group in the operation DB.")
+        self._invalidate_user_permission(username)
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
+
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
+        if rc != RcCode.SUCCESS:
+            return rc
 
         self._logger.info(self._logger_system.set_logger_rc_code("Process user join group request successful."))
         return RcCode.SUCCESS
@@ -1725,49 +1869,50 @@ class ConsoleServer(multiprocessing.Process):
     def _process_user_leave_group(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process user leave group request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["username", "group_name"]):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
+        username = client_request.data["username"]
+        group_name = client_request.data["group_name"]
 
         # Update the DB
-        rc = self._config_db.user_leave_group(client_request.data["username"], client_request.data["group_name"])
+        rc = self._config_db.user_leave_group(username, group_name)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("User can not leave the group in the config DB.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "User can not leave the group in the config DB.")
 
-        # Check the target handler
-        for process_id in range(0, MAX_HANDLER_PROCESS):
-            rc, message_queue = self._op_db.get_process_queue(process_id)
-            if rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not gert the message queue.", rc=rc))
-                return rc
+        # The group list has changed. Sync the user role
+        rc, role, msg = self._sync_user_role(username)
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request, "failed", msg)
 
-            # Send the request to the handler
-            handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, client_request.data)
-            rc = message_queue.local_peer_send_msg(handler_request)
+        # Check the role has changed
+        rc, original_role = self._op_db.get_user_account_role(username)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not get the user role in the operation DB.", rc=rc))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not get the user role in the operation DB.")
+        if original_role != role:
+            rc = self._op_db.modify_user_account_role(username, role)
             if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code("Can not send the message to the remote handler.", rc=rc))
-                return self._reply_client_message(
-                    client_socket_obj, client_request, "failed", "Can not send the message to remote handler.")
+                self._logger.error(self._logger_system.set_logger_rc_code("Can not set the user role in the operation DB.", rc=rc))
+                return self._reply_client_message(client_socket_obj, client_request,
+                                                  "failed", "Can not set the user role in the operation DB.")
 
-        # Create reply list
-        new_data = client_request.data
-        new_data["ready"] = {}
-        new_data["status"] = {}
-        for i in range(0, MAX_HANDLER_PROCESS):
-            new_data["ready"][i] = False
-            new_data["status"][i] = False
+        # Update the operation DB. The handlers read the accounts from the ACL snapshot when the user connects.
+        rc = self._op_db.user_leave_group(username, group_name)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "User can not leave the group in the operation DB.", rc=rc))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "User can not leave the group in the operation DB.")
+        self._invalidate_user_permission(username)
+        rc = self._publish_account_change()
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
 
-        # Store the request sending to the handler
-        handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user, new_data)
-        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        rc = self._reply_client_message(client_socket_obj, client_request, "OK", client_request.data)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
-            return self._reply_client_message(
-                client_socket_obj, client_request, "failed", "Can not add the client request in the DB.")
+            return rc
 
         self._logger.info(self._logger_system.set_logger_rc_code("Process user leave group request successful."))
         return RcCode.SUCCESS
@@ -1775,11 +1920,6 @@ class ConsoleServer(multiprocessing.Process):
     def _process_port_join_group(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process port join group request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["group_name"], required_serial_port_id=True):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         # Update the DB
         rc = self._config_db.port_join_group(client_request.serial_port_id, client_request.data["group_name"])
         if rc != RcCode.SUCCESS:
@@ -1796,7 +1936,8 @@ class ConsoleServer(multiprocessing.Process):
 
         # Send the request to the handler
         handler_request = RequestMsg(
-            client_request.request, client_request.serial_port_id, client_socket_fd, client_request.exec_user, client_request.data)
+            client_request.request, client_request.serial_port_id, client_socket_fd, client_request.exec_user,
+            client_request.data, request_id=client_request.request_id, connection_id=client_request.connection_id)
         rc = message_queue.local_peer_send_msg(handler_request)
         if rc != RcCode.SUCCESS:
             self._logger.error(
@@ -1817,11 +1958,6 @@ class ConsoleServer(multiprocessing.Process):
     def _process_port_leave_group(self, client_socket_fd, client_request, client_socket_obj):
         self._logger.info(self._logger_system.set_logger_rc_code("Process port leave group request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(client_request, ["group_name"], required_serial_port_id=True):
-            return self._reply_client_message(client_socket_obj, client_request,
-                                              "failed", "Missing the required parameters.")
-
         # Update the DB
         rc = self._config_db.port_leave_group(client_request.serial_port_id, client_request.data["group_name"])
         if rc != RcCode.SUCCESS:
@@ -1839,7 +1975,8 @@ class ConsoleServer(multiprocessing.Process):
 
         # Send the request to the handler
         handler_request = RequestMsg(
-            client_request.request, client_request.serial_port_id, client_socket_fd, client_request.exec_user, client_request.data)
+            client_request.request, client_request.serial_port_id, client_socket_fd, client_request.exec_user,
+            client_request.data, request_id=client_request.request_id, connection_id=client_request.connection_id)
         rc = message_queue.local_peer_send_msg(handler_request)
         if rc != RcCode.SUCCESS:
             self._logger.error(
@@ -1858,47 +1995,513 @@ class ConsoleServer(multiprocessing.Process):
         self._logger.info(self._logger_system.set_logger_rc_code("Process port leave group request successful."))
         return RcCode.SUCCESS
 
-    def _check_permission(self, username, request):
+    ##########################################################################################################
+    # Process Batch Request Relate API
+    ##########################################################################################################
+
+    @staticmethod
+    def _get_batch_result(operation, result, data):
+        return {"request": operation.request, "serial_port_id": operation.serial_port_id, "result": result, "data": data}
+
+    def _parse_batch_operation(self, exec_user, operation):
+        # Convert the operation to the request
+        if not isinstance(operation, dict) or "request" not in operation:
+            return RcCode.INVALID_VALUE, None, "Invalid operation format."
+        if operation["request"] not in BATCH_OPERATION_LIST:
+            return RcCode.INVALID_VALUE, None, "Not supported operation {}.".format(operation["request"])
+        data = operation.get("data")
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return RcCode.INVALID_VALUE, None, "Invalid operation data."
+        operation_request = RequestMsg(
+            ConsoleServerEvent(operation["request"]), operation.get("serial_port_id"), None, exec_user, dict(data))
+
+        # Check the operation by the dispatch table as the request sent alone
+        rc, entry = self._get_request_entry(operation_request.request)
+        if rc != RcCode.SUCCESS:
+            return rc, None, "Not supported operation {}.".format(operation_request.request)
+        rc, result = self._check_request_permission(entry, exec_user)
+        if rc != RcCode.SUCCESS:
+            return rc, None, "Can not check the user permission."
+        if not result:
+            return RcCode.PERMISSION_DENIED, None, \
+                "User {} does not have permission to execute the request {}".format(exec_user, operation_request.request)
+        if not self._check_request_parameter(entry, operation_request):
+            return RcCode.INVALID_VALUE, None, "Missing the required parameters."
+        if entry["required_serial_port_id"] and not self._check_serial_port_id(operation_request.serial_port_id):
+            return RcCode.INVALID_VALUE, None, "Invalid serial prot number."
+        return RcCode.SUCCESS, operation_request, None
+
+    def _prepare_batch_operation(self, operation):
+        # Validate the operation and apply it to the config DB
+        match operation.request:
+            case ConsoleServerEvent.SET_BAUD_RATE:
+                if operation.data["baud_rate"] not in VALID_BAUD_RATE:
+                    return RcCode.INVALID_VALUE, "Not supported baud rate."
+                rc = self._config_db.modify_serial_port(operation.serial_port_id, "baud_rate", operation.data["baud_rate"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not update the baud rate of the port in the config DB."
+            case ConsoleServerEvent.SET_ALIAS_NAME:
+                rc = self._config_db.modify_serial_port(operation.serial_port_id, "alias_name", operation.data["alias_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not update the alias name of the port in the config DB."
+            case ConsoleServerEvent.PORT_JOIN_GROUP:
+                rc = self._config_db.port_join_group(operation.serial_port_id, operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Port can not join the group in the config DB."
+            case ConsoleServerEvent.PORT_LEAVE_GROUP:
+                rc = self._config_db.port_leave_group(operation.serial_port_id, operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Port can not leave the group in the config DB."
+            case ConsoleServerEvent.CREATE_GROUP:
+                if not UserRole.is_valid(operation.data["role"]):
+                    return RcCode.INVALID_VALUE, "Invalid user role."
+                rc = self._config_db.create_group(operation.data["group_name"], operation.data["role"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not create the group in the config DB."
+            case ConsoleServerEvent.DESTROY_GROUP:
+                group_name = operation.data["group_name"]
+                if group_name == DEFAULT_GROUP_NAME:
+                    return RcCode.INVALID_VALUE, "Should not delete the default group."
+
+                # The earlier operations of the batch are only in the config DB, so check the group by the config DB
+                rc, user_set = self._config_db.get_group_user_set(group_name)
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not get the users of the group in the config DB."
+                if len(user_set) != 0:
+                    return RcCode.INVALID_VALUE, "The group still has the user."
+                rc, port_set = self._config_db.get_group_port_set(group_name)
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not get the serial ports of the group in the config DB."
+                if len(port_set) != 0:
+                    return RcCode.INVALID_VALUE, "The group still has the serial port."
+                rc = self._config_db.destroy_group(group_name)
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not destroy the group in the config DB."
+            case ConsoleServerEvent.ADD_USER_ACCOUNT:
+                role = operation.data.get("role", "")
+                if role is None:
+                    role = ""
+                if role != "" and not UserRole.is_valid(role):
+                    return RcCode.INVALID_VALUE, "Invalid user role."
+                rc = self._config_db.add_user_account(operation.data["username"], role, operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not add the user in the config DB."
+
+                # The user without the role uses the role of the group
+                if role == "":
+                    rc, group = self._config_db.get_group(operation.data["group_name"])
+                    if rc != RcCode.SUCCESS:
+                        return rc, "Can not get the group from the config DB."
+                    role = group["role"]
+                operation.data["role"] = role
+            case ConsoleServerEvent.DEL_USER_ACCOUNT:
+                if operation.data["username"] == DEFAULT_USER_ACCOUNT:
+                    return RcCode.INVALID_VALUE, "Should not delete the default user."
+                rc = self._config_db.del_user_account(operation.data["username"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not delete the user in the config DB."
+            case ConsoleServerEvent.USER_JOIN_GROUP:
+                rc = self._config_db.user_join_group(operation.data["username"], operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "User can not join the group in the config DB."
+            case ConsoleServerEvent.USER_LEAVE_GROUP:
+                rc = self._config_db.user_leave_group(operation.data["username"], operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "User can not leave the group in the config DB."
+            case _:
+                return RcCode.INVALID_VALUE, "Not supported operation {}.".format(operation.request)
+        return RcCode.SUCCESS, None
+
+    def _commit_batch_operation(self, operation):
+        # Apply the operation to the operation DB after the handlers apply it
+        match operation.request:
+            case ConsoleServerEvent.SET_BAUD_RATE:
+                rc = self._op_db.modify_serial_port(operation.serial_port_id, "baud_rate", operation.data["baud_rate"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not update the baud rate of the port in the operation DB."
+            case ConsoleServerEvent.SET_ALIAS_NAME:
+                rc = self._op_db.modify_serial_port(operation.serial_port_id, "alias_name", operation.data["alias_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not update the alias name of the port in the operation DB."
+            case ConsoleServerEvent.PORT_JOIN_GROUP:
+                rc = self._op_db.port_join_group(operation.serial_port_id, operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Port can not join the group in the operation DB."
+            case ConsoleServerEvent.PORT_LEAVE_GROUP:
+                rc = self._op_db.port_leave_group(operation.serial_port_id, operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Port can not leave the group in the operation DB."
+            case ConsoleServerEvent.CREATE_GROUP:
+                rc = self._op_db.create_group(operation.data["group_name"], operation.data["role"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not create the group in the operation DB."
+            case ConsoleServerEvent.DESTROY_GROUP:
+                rc = self._op_db.destroy_group(operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not destroy the group in the operation DB."
+            case ConsoleServerEvent.ADD_USER_ACCOUNT:
+                rc = self._op_db.add_user_account(
+                    operation.data["username"], operation.data["role"], operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not add the user in the operation DB."
+            case ConsoleServerEvent.DEL_USER_ACCOUNT:
+                rc = self._op_db.del_user_account(operation.data["username"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not delete the user in the operation DB."
+            case ConsoleServerEvent.USER_JOIN_GROUP | ConsoleServerEvent.USER_LEAVE_GROUP:
+                if operation.request == ConsoleServerEvent.USER_JOIN_GROUP:
+                    rc = self._op_db.user_join_group(operation.data["username"], operation.data["group_name"])
+                else:
+                    rc = self._op_db.user_leave_group(operation.data["username"], operation.data["group_name"])
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not update the group of the user in the operation DB."
+
+                # The group list has changed. Sync the user role
+                rc, role, msg = self._sync_user_role(operation.data["username"])
+                if rc != RcCode.SUCCESS:
+                    return rc, msg
+                rc = self._op_db.modify_user_account_role(operation.data["username"], role)
+                if rc != RcCode.SUCCESS:
+                    return rc, "Can not set the user role in the operation DB."
+        return RcCode.SUCCESS, None
+
+    def _get_batch_operation_process(self, operation):
+        # The port operations are applied by the handler of the port. The alias name, the users and the groups are
+        # kept by the server, and the handlers read the users and the groups from the ACL snapshot.
+        rc, entry = self._get_request_entry(operation.request)
+        if rc == RcCode.SUCCESS and entry["scope"] == RequestScope.PORT_HANDLER:
+            return [(operation.serial_port_id - 1) % MAX_HANDLER_PROCESS]
+        return []
+
+    def _reply_batch_request(self, client_socket_obj, client_request, operation_list, result_list, config_undo_list):
+        # Apply the operations which all the handlers have applied to the operation DB
+        self._start_account_change()
+        status = True
+        for index, operation in enumerate(operation_list):
+            if result_list[index] is None:
+                rc, msg = self._commit_batch_operation(operation)
+                if rc != RcCode.SUCCESS:
+                    self._logger.error(self._logger_system.set_logger_rc_code(msg, rc=rc))
+                    result_list[index] = self._get_batch_result(operation, "failed", msg)
+                else:
+                    result_list[index] = self._get_batch_result(operation, "OK", operation.data)
+            status = status and result_list[index]["result"] == "OK"
+
+        # Publish the accounts which the batch has changed. The config DB has been changed when the batch is validated.
+        self._invalidate_user_permission()
+        rc = self._publish_account_change(config_undo_list)
+        if rc != RcCode.SUCCESS:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not publish the ACL snapshot.")
+        return self._reply_client_message(client_socket_obj, client_request, "OK" if status else "failed",
+                                          {"results": result_list})
+
+    def _process_batch(self, client_socket_fd, client_request, client_socket_obj):
+        self._logger.info(self._logger_system.set_logger_rc_code("Process batch request"))
+
+        # Check the operations
+        if not isinstance(client_request.data["operations"], list):
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Invalid operation format.")
+        if len(client_request.data["operations"]) > MAX_BATCH_OPERATION:
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Too many operations in the batch request.")
+
+        # Validate the operations against the config DB in order, and group them by the handler which applies them.
+        # The operation which fails is replied by its result, and the others are still applied.
+        operation_list = []
+        result_list = []
+        process_operation_dict = {}
+        for index, operation in enumerate(client_request.data["operations"]):
+            rc, operation_request, msg = self._parse_batch_operation(client_request.exec_user, operation)
+            if rc == RcCode.SUCCESS:
+                rc, msg = self._prepare_batch_operation(operation_request)
+            if rc != RcCode.SUCCESS:
+                self._logger.warning(self._logger_system.set_logger_rc_code(
+                    "Batch operation {} failed. {}".format(index, msg), rc=rc))
+                if operation_request is None:
+                    operation_request = RequestMsg(operation.get("request") if isinstance(operation, dict) else None,
+                                                   operation.get("serial_port_id") if isinstance(operation, dict) else None)
+                operation_list.append(operation_request)
+                result_list.append(self._get_batch_result(operation_request, "failed", msg))
+                continue
+            operation_list.append(operation_request)
+            result_list.append(None)
+            for process_id in self._get_batch_operation_process(operation_request):
+                if process_id not in process_operation_dict:
+                    process_operation_dict[process_id] = []
+                process_operation_dict[process_id].append(index)
+
+        # The account changes in the config DB are reverted with the operation DB if the batch can not be published
+        config_undo_list, _ = self._stop_account_change()
+
+        # No handler needs to apply the operations
+        if len(process_operation_dict) == 0:
+            return self._reply_batch_request(client_socket_obj, client_request, operation_list, result_list,
+                                             config_undo_list)
+
+        # Send the operations of each handler by one message
+        for process_id in process_operation_dict:
+            rc, message_queue = self._op_db.get_process_queue(process_id)
+            if rc != RcCode.SUCCESS:
+                self._logger.error(self._logger_system.set_logger_rc_code("Can not get the message queue.", rc=rc))
+                return rc
+
+            handler_operation_list = []
+            for index in process_operation_dict[process_id]:
+                operation = operation_list[index]
+                handler_operation_list.append({"index": index, "request": operation.request,
+                                               "serial_port_id": operation.serial_port_id, "data": operation.data})
+            handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user,
+                                         {"operations": handler_operation_list}, request_id=client_request.request_id,
+                                         connection_id=client_request.connection_id)
+            rc = message_queue.local_peer_send_msg(handler_request)
+            if rc != RcCode.SUCCESS:
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code("Can not send the message to the remote handler.", rc=rc))
+                return self._reply_client_message(client_socket_obj, client_request,
+                                                  "failed", "Can not send the message to remote handler.")
+
+        # Store the request sending to the handler
+        new_data = {
+            "operations": operation_list,
+            "results": result_list,
+            "process_operations": process_operation_dict,
+            "ready": {process_id: False for process_id in process_operation_dict},
+            "config_undo_list": config_undo_list
+        }
+        handler_request = RequestMsg(client_request.request, None, client_socket_fd, client_request.exec_user,
+                                     new_data, request_id=client_request.request_id,
+                                     connection_id=client_request.connection_id)
+        rc = self._op_db.add_client_request(client_socket_fd, handler_request)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not add the client request in the DB.", rc=rc))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Can not add the client request in the DB.")
+
+        self._logger.info(self._logger_system.set_logger_rc_code("Process batch request successful."))
+        return RcCode.SUCCESS
+
+    def _handle_batch_reply(self, reply, client_socket_obj, process_id):
+        # Get the source request
+        rc, request = self._op_db.get_client_request(reply.socket_fd, reply.request_id)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Get origin request fail.", rc=rc))
+            return self._reply_client_message(client_socket_obj, reply,
+                                              "failed", "Verify the data failed.")
+
+        # The handler is known by the queue which the reply arrives on, because the failed reply of the handler only
+        # carries the error message.
+        if process_id not in request.data["ready"]:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Handler {} does not process the batch request.".format(process_id)))
+            return RcCode.INVALID_VALUE
+        request.data["ready"][process_id] = True
+
+        # Merge the results of the handler. An operation fails if any handler fails to apply it.
+        operation_list = request.data["operations"]
+        result_list = request.data["results"]
+        if reply.result == "OK":
+            for item in reply.data["results"]:
+                index = item["index"]
+                if item["result"] != "OK" and result_list[index] is None:
+                    result_list[index] = self._get_batch_result(operation_list[index], "failed", item["data"])
+        else:
+            error_msg = reply.data if isinstance(reply.data, str) else "Handler the request failed."
+            for index in request.data["process_operations"][process_id]:
+                if result_list[index] is None:
+                    result_list[index] = self._get_batch_result(operation_list[index], "failed", error_msg)
+
+        for ready in request.data["ready"].values():
+            if not ready:
+                # The process does not still process the request.
+                return RcCode.SUCCESS
+        return self._reply_batch_request(client_socket_obj, request, operation_list, result_list,
+                                         request.data["config_undo_list"])
+
+    ##########################################################################################################
+    # Request Dispatch Relate API
+    ##########################################################################################################
+
+    def _register_request(self, request, func, key_list=None, required_serial_port_id=False,
+                          role=UserRole.ROLE_CONSOLE_USER, scope=RequestScope.SERVER, reply_func=None):
+        opcode = ConsoleServerEventOpcodeDict[request]
+        if self._request_dispatch_table[opcode] is not None:
+            return RcCode.DATA_EXIST
+
+        # The role is the lowest role which can execute the request
+        self._request_dispatch_table[opcode] = {
+            "request": request,
+            "opcode": opcode,
+            "func": func,
+            "key_list": key_list if key_list is not None else [],
+            "required_serial_port_id": required_serial_port_id,
+            "role": role,
+            "scope": scope,
+            "reply_func": reply_func
+        }
+        return RcCode.SUCCESS
+
+    def _init_request_dispatch_table(self):
+        # Serial port requests
+        self._register_request(ConsoleServerEvent.SET_BAUD_RATE, self._process_config_baud_rate,
+                               key_list=["baud_rate"], required_serial_port_id=True, role=UserRole.ROLE_OPERATOR,
+                               scope=RequestScope.PORT_HANDLER, reply_func=self._handle_config_baud_rate_reply)
+        self._register_request(ConsoleServerEvent.SET_ALIAS_NAME, self._process_config_alias_name,
+                               key_list=["alias_name"], required_serial_port_id=True, role=UserRole.ROLE_OPERATOR)
+        self._register_request(ConsoleServerEvent.GET_PORT_CONFIG, self._process_get_port_config)
+        self._register_request(ConsoleServerEvent.GET_PORT_STATUS, self._process_get_port_status)
+        self._register_request(ConsoleServerEvent.GET_PORT_COUNTERS, self._process_get_port_counters,
+                               required_serial_port_id=True, scope=RequestScope.PORT_HANDLER,
+                               reply_func=self._handle_port_counters_reply)
+
+        # Group requests
+        self._register_request(ConsoleServerEvent.CREATE_GROUP, self._process_create_group,
+                               key_list=["group_name", "role"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.DESTROY_GROUP, self._process_destroy_group,
+                               key_list=["group_name"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.MODIFY_GROUP, self._process_modify_group,
+                               key_list=["group_name", "role"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.GET_GROUP_CONFIG, self._process_get_group_config,
+                               role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.GET_GROUP_STATUS, self._process_get_group_status,
+                               role=UserRole.ROLE_ADMIN)
+
+        # User requests
+        self._register_request(ConsoleServerEvent.ADD_USER_ACCOUNT, self._process_add_user_account,
+                               key_list=["username", "group_name"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.DEL_USER_ACCOUNT, self._process_del_user_account,
+                               key_list=["username"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.MODIFY_USER_ROLE, self._process_modify_user_role,
+                               key_list=["username", "role"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.USER_JOIN_GROUP, self._process_user_join_group,
+                               key_list=["username", "group_name"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.USER_LEAVE_GROUP, self._process_user_leave_group,
+                               key_list=["username", "group_name"], role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.PORT_JOIN_GROUP, self._process_port_join_group,
+                               key_list=["group_name"], required_serial_port_id=True, role=UserRole.ROLE_ADMIN,
+                               scope=RequestScope.PORT_HANDLER, reply_func=self._handle_port_group_reply)
+        self._register_request(ConsoleServerEvent.PORT_LEAVE_GROUP, self._process_port_leave_group,
+                               key_list=["group_name"], required_serial_port_id=True, role=UserRole.ROLE_ADMIN,
+                               scope=RequestScope.PORT_HANDLER, reply_func=self._handle_port_group_reply)
+        self._register_request(ConsoleServerEvent.GET_USER_CONFIG, self._process_get_user_config,
+                               role=UserRole.ROLE_ADMIN)
+        self._register_request(ConsoleServerEvent.GET_USER_STATUS, self._process_get_user_status,
+                               role=UserRole.ROLE_ADMIN)
+
+        self._register_request(ConsoleServerEvent.GET_PERMISSION_MATRIX, self._process_get_permission_matrix,
+                               role=UserRole.ROLE_ADMIN)
+
+        # The permission of the batch request is checked for each operation
+        self._register_request(ConsoleServerEvent.BATCH, self._process_batch, key_list=["operations"],
+                               scope=RequestScope.BATCH_HANDLER, reply_func=self._handle_batch_reply)
+
+    def _init_permission_matrix(self):
+        # A role can execute the request if its priority is not lower than the role the request requires. The invalid
+        # role can not execute any request.
+        self._role_permission_list = [0] * len(UserRolePriorityDict)
+        for role, priority in UserRolePriorityDict.items():
+            if role == UserRole.ROLE_INVALID:
+                continue
+            permission = 0
+            for entry in self._request_dispatch_table:
+                if entry is not None and priority <= UserRolePriorityDict[entry["role"]]:
+                    permission = permission | (1 << entry["opcode"])
+            self._role_permission_list[priority] = permission
+
+    def _get_user_permission(self, username):
+        permission = self._user_permission_dict.get(username)
+        if permission is not None:
+            return RcCode.SUCCESS, permission
+
+        # Resolve the permission by the role of the user and keep it until the role of the user changes
         rc, role = self._op_db.get_user_account_role(username)
         if rc != RcCode.SUCCESS:
             return rc, None
+        priority = UserRolePriorityDict.get(role, UserRolePriorityDict[UserRole.ROLE_INVALID])
+        permission = self._role_permission_list[priority]
+        self._user_permission_dict[username] = permission
+        return RcCode.SUCCESS, permission
 
-        result = False
-        match request:
-            case ConsoleServerEvent.CONNECT_SERIAL_PORT | \
-                 ConsoleServerEvent.CREATE_GROUP | ConsoleServerEvent.DESTROY_GROUP | ConsoleServerEvent.MODIFY_GROUP |\
-                 ConsoleServerEvent.ADD_USER_ACCOUNT | ConsoleServerEvent.DEL_USER_ACCOUNT | ConsoleServerEvent.MODIFY_USER_ROLE | \
-                 ConsoleServerEvent.USER_JOIN_GROUP | ConsoleServerEvent.USER_LEAVE_GROUP | \
-                 ConsoleServerEvent.PORT_JOIN_GROUP | ConsoleServerEvent.PORT_LEAVE_GROUP | \
-                 ConsoleServerEvent.GET_GROUP_CONFIG | ConsoleServerEvent.GET_GROUP_STATUS | \
-                 ConsoleServerEvent.GET_USER_CONFIG | ConsoleServerEvent.GET_USER_STATUS:
-                if role == UserRole.ROLE_ADMIN:
-                    result = True
-            case ConsoleServerEvent.SET_BAUD_RATE | ConsoleServerEvent.SET_ALIAS_NAME:
-                if role == UserRole.ROLE_ADMIN or UserRole.ROLE_OPERATOR:
-                    result = True
-            case ConsoleServerEvent.GET_PORT_CONFIG | ConsoleServerEvent.GET_PORT_STATUS:
-                result = True
-        return RcCode.SUCCESS, result
-
-    def _handler_server_message(self, msg_str, client_socket_fd, client_socket_obj):
-        # Resolve the replay message received from the user
+    def _invalidate_user_permission(self, username=None):
+        # Drop the permission of the user, or all the users if the username is None
+        if username is None:
+            self._user_permission_dict.clear()
+        else:
+            self._user_permission_dict.pop(username, None)
+
+    def _get_request_entry(self, request):
+        # The request sent by the client may be any JSON value
+        if not isinstance(request, str):
+            return RcCode.INVALID_VALUE, None
+        opcode = ConsoleServerEventOpcodeDict.get(request)
+        if opcode is None or self._request_dispatch_table[opcode] is None:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._request_dispatch_table[opcode]
+
+    def _check_request_permission(self, entry, username):
+        rc, permission = self._get_user_permission(username)
+        if rc != RcCode.SUCCESS:
+            return rc, None
+        return RcCode.SUCCESS, permission & (1 << entry["opcode"]) != 0
+
+    @staticmethod
+    def _check_request_parameter(entry, request):
+        return check_all_required_parameter(request, entry["key_list"],
+                                            required_serial_port_id=entry["required_serial_port_id"])
+
+    def _check_serial_port_id(self, serial_port_id):
+        if not isinstance(serial_port_id, int) or not 1 <= serial_port_id <= self._num_of_serial_port:
+            return False
+        return True
+
+    def _handler_server_message(self, msg_byte, client_socket_fd, client_socket_obj):
+        # Resolve the replay message received from the user. The reply is sent by the codec which the request uses.
         self._logger.info(self._logger_system.set_logger_rc_code("Start process the request"))
-        rc, msg_dict = msg_deserialize(msg_str)
+        rc, codec, msg_dict = msg_decode(msg_byte)
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code("Can not serialize the data.", rc=rc))
-            return self._reply_client_message(client_socket_obj, msg_dict,
-                                              "failed", "Can not serialize the data.")
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not deserialize the data.", rc=rc))
+            return rc
+        rc = self._op_db.set_client_codec(client_socket_fd, codec)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not set the codec of the client.", rc=rc))
+            return rc
         self._logger.info(self._logger_system.set_logger_rc_code("resolve the request"))
         client_request = RequestMsg()
         rc = client_request.set_msg(msg_dict)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Invalid message format.", rc=rc))
-            return self._reply_client_message(client_socket_obj, msg_dict,
+            return self._reply_client_message(client_socket_obj, client_request,
                                               "failed", "Invalid message format.")
 
+        # The connection ID is set by the server, so the replies of the handlers can be matched with this connection
+        rc, client_request.connection_id = self._op_db.get_client_connection_id(client_socket_fd)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not get the connection ID of the client.", rc=rc))
+            return rc
+
+        # The reply can not be matched if the request ID is used by a request which is still processed. Reject the
+        # request only, and keep the outstanding request with the same ID.
+        rc, _ = self._op_db.get_client_request(client_socket_fd, client_request.request_id)
+        if rc == RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "The request ID {} is in use.".format(client_request.request_id)))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "The request ID {} is in use.".format(client_request.request_id),
+                                              finish_request=False)
+
+        # Look up the request in the dispatch table
+        rc, entry = self._get_request_entry(client_request.request)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code(
+                "Not supported request {}.".format(client_request.request), rc=rc))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Not supported request {}.".format(client_request.request))
+
         # Check permission
-        rc, result = self._check_permission(client_request.exec_user, client_request.request)
+        rc, result = self._check_request_permission(entry, client_request.exec_user)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not check the user permission.", rc=rc))
             return self._reply_client_message(client_socket_obj, client_request,
@@ -1907,53 +2510,23 @@ class ConsoleServer(multiprocessing.Process):
         if not result:
             self._logger.error(self._logger_system.set_logger_rc_code(
                 "User {} does not have permission to execute the request {}".format(client_request.exec_user, client_request.request)))
-            return self._reply_client_message(client_socket_obj, msg_str,
+            return self._reply_client_message(client_socket_obj, client_request,
                                               "failed",
                                               "User {} does not have permission to execute the request {}".format(client_request.exec_user, client_request.request))
 
-        call_func = None
-        # Dispatch the request
-        match client_request.request:
-            case ConsoleServerEvent.SET_BAUD_RATE:
-                call_func = self._process_config_baud_rate
-            case ConsoleServerEvent.SET_ALIAS_NAME:
-                call_func = self._process_config_alias_name
-            case ConsoleServerEvent.GET_PORT_CONFIG:
-                call_func = self._process_get_port_config
-            case ConsoleServerEvent.GET_PORT_STATUS:
-                call_func = self._process_get_port_status
-            case ConsoleServerEvent.CREATE_GROUP:
-                call_func = self._process_create_group
-            case ConsoleServerEvent.DESTROY_GROUP:
-                call_func = self._process_destroy_group
-            case ConsoleServerEvent.MODIFY_GROUP:
-                call_func = self._process_modify_group
-            case ConsoleServerEvent.GET_GROUP_CONFIG:
-                call_func = self._process_get_group_config
-            case ConsoleServerEvent.GET_GROUP_STATUS:
-                call_func = self._process_get_group_status
-            case ConsoleServerEvent.ADD_USER_ACCOUNT:
-                call_func = self._process_add_user_account
-            case ConsoleServerEvent.DEL_USER_ACCOUNT:
-                call_func = self._process_del_user_account
-            case ConsoleServerEvent.MODIFY_USER_ROLE:
-                call_func = self._process_modify_user_role
-            case ConsoleServerEvent.USER_JOIN_GROUP:
-                call_func = self._process_user_join_group
-            case ConsoleServerEvent.USER_LEAVE_GROUP:
-                call_func = self._process_user_leave_group
-            case ConsoleServerEvent.PORT_JOIN_GROUP:
-                call_func = self._process_port_join_group
-            case ConsoleServerEvent.PORT_LEAVE_GROUP:
-                call_func = self._process_port_leave_group
-            case ConsoleServerEvent.GET_USER_CONFIG:
-                call_func = self._process_get_user_config
-            case ConsoleServerEvent.GET_USER_STATUS:
-                call_func = self._process_get_user_status
-            case ConsoleServerEvent.INIT_HANDLER | ConsoleServerEvent.INIT_SERIAL_PORT | ConsoleServerEvent.CONNECT_SERIAL_PORT:
-                return RcCode.PERMISSION_DENIED
-        
-        rc = call_func(client_socket_fd, client_request, client_socket_obj)
+        # Check if the Required parameters are in the message
+        if not self._check_request_parameter(entry, client_request):
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Missing the required parameters.")
+        if entry["required_serial_port_id"] and not self._check_serial_port_id(client_request.serial_port_id):
+            self._logger.info(self._logger_system.set_logger_rc_code("Invalid serial prot number."))
+            return self._reply_client_message(client_socket_obj, client_request,
+                                              "failed", "Invalid serial prot number.")
+
+        # Dispatch the request. The account changes of the request are recorded until the request publishes them.
+        self._start_account_change()
+        rc = entry["func"](client_socket_fd, client_request, client_socket_obj)
+        self._stop_account_change()
         if rc != RcCode.SUCCESS:
             return rc
         return RcCode.SUCCESS
@@ -2022,7 +2595,7 @@ class ConsoleServer(multiprocessing.Process):
             return RcCode.SUCCESS
 
         # Receive the data from the socket
-        rc, data = client_socket_obj.uds_client_socket_recv(1024)
+        rc, data = client_socket_obj.uds_client_socket_recv(MAX_CLIENT_RECV_SIZE)
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("Can not receive the data from the socket", rc=rc))
@@ -2040,48 +2613,92 @@ class ConsoleServer(multiprocessing.Process):
                 return rc
             return RcCode.SUCCESS
 
-        # Process the data
-        rc = self._handler_server_message(data.decode('utf-8'), socket_fd, client_socket_obj)
+        # Process the requests once they arrive completely
+        rc, frame_decoder = self._op_db.get_client_frame_decoder(socket_fd)
         if rc != RcCode.SUCCESS:
-            rc = self._close_client_socket(client_socket_obj)
+            return rc
+        rc = frame_decoder.feed(data)
+        if rc != RcCode.SUCCESS:
+            return rc
+        return self._process_client_frame(socket_fd, client_socket_obj)
+
+    def _process_client_frame(self, socket_fd, client_socket_obj):
+        rc, frame_decoder = self._op_db.get_client_frame_decoder(socket_fd)
+        if rc != RcCode.SUCCESS:
+            return RcCode.SUCCESS
+
+        # The requests are processed in order. The replies of the requests with the request ID may be sent out of order.
+        # A request without the request ID holds the following requests until it is replied.
+        while True:
+            rc, request_blocked = self._op_db.get_client_request_blocked(socket_fd)
+            if rc != RcCode.SUCCESS or request_blocked:
+                return RcCode.SUCCESS
+            rc, frame = frame_decoder.get_frame()
+            if rc == RcCode.DATA_NOT_READY:
+                return RcCode.SUCCESS
+            if rc != RcCode.SUCCESS:
+                self._logger.error(self._logger_system.set_logger_rc_code("Invalid frame from the client.", rc=rc))
+                return self._close_client_socket(client_socket_obj)
+
+            # Process the data
+            rc = self._handler_server_message(frame, socket_fd, client_socket_obj)
+            if rc != RcCode.SUCCESS:
+                return self._close_client_socket(client_socket_obj)
+
+    def process_resume_client_socket(self):
+        rc, resume_client_socket_set = self._op_db.pop_resume_client_socket()
+        if rc != RcCode.SUCCESS:
+            return rc
+        for socket_fd in resume_client_socket_set:
+            rc, client_socket_obj = self._op_db.get_client_socket(socket_fd)
+            if rc != RcCode.SUCCESS:
+                continue
+            rc = self._process_client_frame(socket_fd, client_socket_obj)
             if rc != RcCode.SUCCESS:
                 return rc
         return RcCode.SUCCESS
 
-    def process_server_socket_event(self):
-        events = self._server_mgmt_epoll.poll(self._processing_time)
-        for socket_fd, event in events:
-            if socket_fd == self._server_mgmt_socket_fd:
+    def process_server_event(self):
+        # Sleep until a client request or a handler reply arrives
+        events = self._server_mgmt_epoll.poll()
+        for fd, event in events:
+            if fd == self._server_mgmt_socket_fd:
                 rc = self._accept_client_socket()
                 if rc != RcCode.SUCCESS:
                     return rc
-            elif event & select.EPOLLIN:
-                rc = self._receive_client_data(socket_fd)
+                continue
+
+            # Communicate with the handler by message queue
+            rc, process_id = self._op_db.get_process_id_by_queue_fd(fd)
+            if rc == RcCode.SUCCESS:
+                rc = self.process_message_queue_event(process_id)
                 if rc != RcCode.SUCCESS:
+                    self._logger.error(
+                        self._logger_system.set_logger_rc_code(
+                            "Process the data reading from message queue failed.", rc=rc))
                     return rc
-        return RcCode.SUCCESS
+                continue
+
+            # Communicate with the user by socket
+            if event & select.EPOLLIN:
+                rc = self._receive_client_data(fd)
+                if rc != RcCode.SUCCESS:
+                    return rc
+
+        # Continue the requests which wait for the previous request of the same client
+        return self.process_resume_client_socket()
     
     ##########################################################################################################
     # Daemon Main Process
     ##########################################################################################################
 
     def daemon_main(self):
-        # Communicate with the user by socket
-        rc = self.process_server_socket_event()
+        rc = self.process_server_event()
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code(
-                    "Process the data reading from socket failed.", rc=rc))
+                    "Process the data reading from socket or message queue failed.", rc=rc))
             return rc
-
-        # Communicate with the handler by message queue
-        rc = self.process_message_queue_event()
-        if rc != RcCode.SUCCESS:
-            self._logger.error(
-                self._logger_system.set_logger_rc_code(
-                    "Process the data reading from message queue failed.", rc=rc))
-            return rc
-
         return RcCode.SUCCESS
 
     def run(self):
@@ -2105,13 +2722,10 @@ class ConsoleServer(multiprocessing.Process):
         # Daemon main process
         while True:
             try:
-                start_time = time.perf_counter()
                 rc = self.daemon_main()
                 if rc != RcCode.SUCCESS:
                     self._logger.error(
                         self._logger_system.set_logger_rc_code("The daemon occurs the error.", rc=rc))
-                end_time = time.perf_counter()
-                self._processing_time = end_time - start_time
             except Exception as e:
                 self._logger.critical(
                         self._logger_system.set_logger_rc_code(e))
@@ -1,20 +1,33 @@
-from enum import StrEnum
+from enum import IntEnum, StrEnum
 
 
 VALID_BAUD_RATE = [50, 75, 110, 134, 150, 200, 300, 600, 1200, 1800, 2400, 4800, 9600, 19200, 38400, 57600, 115200,
                    230400, 460800, 500000, 576000, 921600, 1000000, 1152000, 1500000, 2000000, 2500000, 3000000, 3500000, 4000000]
 
+# The size of the scrollback kept for each serial port and replayed to the new session
+DEFAULT_SCROLLBACK_SIZE = 64 * 1024
+
+# The maximum bytes queued for a client socket before the slow consumer policy is applied
+DEFAULT_CLIENT_OUTPUT_LIMIT = 256 * 1024
+
+# The seconds which the data arriving from a serial port is held so that the consecutive chunks are sent together
+DEFAULT_SERIAL_RX_COALESCE_WINDOW = 0.002
+
+# The seconds waited before a failed serial port is opened again. The delay is doubled after each failure.
+SERIAL_PORT_OPEN_BACKOFF_MIN = 0.5
+SERIAL_PORT_OPEN_BACKOFF_MAX = 30
+
 
 class ConsoleServerEvent(StrEnum):
     INIT_HANDLER = "init_handler"
     INIT_SERIAL_PORT = "init_serial_port"
-    INIT_DEFAULT_ACCOUNT = "init_default_account"
 
     CONNECT_SERIAL_PORT = "connect_serial_port"
     SET_BAUD_RATE = "set_baud_rate"
     SET_ALIAS_NAME = "set_alias_name"
     GET_PORT_CONFIG = "get_port_config"
     GET_PORT_STATUS = "get_port_status"
+    GET_PORT_COUNTERS = "get_port_counters"
 
     CREATE_GROUP = "create_group"
     DESTROY_GROUP = "destroy_group"
@@ -32,6 +45,82 @@ class ConsoleServerEvent(StrEnum):
     GET_USER_CONFIG = "get_user_config"
     GET_USER_STATUS = "get_user_status"
 
+    BATCH = "batch"
+    GET_PERMISSION_MATRIX = "get_permission_matrix"
+
+
+class ConsoleServerOpcode(IntEnum):
+    INIT_HANDLER = 0
+    INIT_SERIAL_PORT = 1
+
+    CONNECT_SERIAL_PORT = 2
+    SET_BAUD_RATE = 3
+    SET_ALIAS_NAME = 4
+    GET_PORT_CONFIG = 5
+    GET_PORT_STATUS = 6
+    GET_PORT_COUNTERS = 7
+
+    CREATE_GROUP = 8
+    DESTROY_GROUP = 9
+    MODIFY_GROUP = 10
+    GET_GROUP_CONFIG = 11
+    GET_GROUP_STATUS = 12
+
+    ADD_USER_ACCOUNT = 13
+    DEL_USER_ACCOUNT = 14
+    MODIFY_USER_ROLE = 15
+    USER_JOIN_GROUP = 16
+    USER_LEAVE_GROUP = 17
+    PORT_JOIN_GROUP = 18
+    PORT_LEAVE_GROUP = 19
+    GET_USER_CONFIG = 20
+    GET_USER_STATUS = 21
+
+    BATCH = 22
+    GET_PERMISSION_MATRIX = 23
+
+
+# The opcode which indexes the dispatch tables for each request on the wire
+ConsoleServerEventOpcodeDict = {event: ConsoleServerOpcode[event.name] for event in ConsoleServerEvent}
+
+
+class RequestScope(IntEnum):
+    # The server processes the request by itself
+    SERVER = 0
+    # The handler of the serial port in the request processes the request
+    PORT_HANDLER = 1
+    # The handlers of the serial ports in the operations process the request
+    BATCH_HANDLER = 2
+
+
+class HandlerFdType(IntEnum):
+    SERVER_SOCKET = 0
+    PENDING_CONNECTION = 1
+    CLIENT_SOCKET = 2
+    SERIAL_PORT = 3
+    MESSAGE_QUEUE = 4
+
+
+class SlowConsumerPolicy(StrEnum):
+    DROP_OLDEST = "drop_oldest"
+    DISCONNECT = "disconnect"
+    COALESCE = "coalesce"
+
+    @classmethod
+    def is_valid(cls, policy):
+        match policy:
+            case cls.DROP_OLDEST | cls.DISCONNECT | cls.COALESCE:
+                return True
+        return False
+
+
+class SerialPortState(StrEnum):
+    CLOSED = "closed"
+    OPENING = "opening"
+    OPEN = "open"
+    ERROR = "error"
+    BACKOFF = "backoff"
+
 
 class UserRole(StrEnum):
     ROLE_ADMIN = "admin"
@@ -1,42 +1,229 @@
+import collections
 import multiprocessing
 import select
 import time
 
 from src.common.logger_system import LoggerSystem
-from src.common.msg import ReplyMsg, RequestMsg, msg_serialize, check_all_required_parameter
+from src.common.msg import ReplyMsg, RequestMsg, check_all_required_parameter
+from src.common.msg_codec import MsgCodec, msg_decode, msg_encode
 from src.common.rc_code import RcCode
-from src.common.uds_lib import UnixDomainConnectedClientSocket, UnixDomainServerSocket
+from src.common.ring_buffer import RingBuffer
+from src.common.uds_lib import UnixDomainConnectedClientSocket, UnixDomainServerSocket, UdsFrameDecoder
 from src.common.utiliity import TEST_MODE
-from src.console_server.processing.console_server_definition import ConsoleServerEvent
+from src.console_server.processing.console_server_definition import ConsoleServerEvent, ConsoleServerOpcode, \
+    ConsoleServerEventOpcodeDict, HandlerFdType, SerialPortState, SlowConsumerPolicy, DEFAULT_SCROLLBACK_SIZE, DEFAULT_CLIENT_OUTPUT_LIMIT, \
+    DEFAULT_SERIAL_RX_COALESCE_WINDOW
 from src.console_server.processing.console_server_port import ConsoleServerSerialPort
 
 
 class _ConsolerServerHandlerDb:
-    def __init__(self):
+    def __init__(self, scrollback_size):
+        self._scrollback_size = scrollback_size
         self._uds_server_socket_obj = None
         self._serial_port_info_dict = {}
         self._pending_conn_dict = {}
-        self._server_socket_epoll = select.epoll()
+        self._pending_conn_frame_decoder_dict = {}
         self._client_socket_dict = {}
-        self._client_socket_epoll = select.epoll()
-        self._group_dict = {}
-        self._user_dict = {}
+        self._serial_port_fd_dict = {}
+        self._ready_serial_port_deque = collections.deque()
+        self._ready_serial_port_set = set()
+        self._paced_serial_port_set = set()
+        self._coalescing_serial_port_set = set()
+        self._opening_serial_port_set = set()
+        self._message_queue_fd = -1
+
+        # All the fds of the handler are monitored by a single epoll
+        self._handler_epoll = select.epoll()
+        self._fd_type_dict = {}
+
+    def _register_fd(self, fd, fd_type, event_mask=select.EPOLLIN):
+        self._handler_epoll.register(fd, event_mask)
+        self._fd_type_dict[fd] = fd_type
+
+    def _unregister_fd(self, fd):
+        self._handler_epoll.unregister(fd)
+        del self._fd_type_dict[fd]
+
+    def _modify_fd(self, fd, event_mask):
+        self._handler_epoll.modify(fd, event_mask)
+
+    def get_handler_epoll(self):
+        return RcCode.SUCCESS, self._handler_epoll
+
+    def get_fd_type(self, fd):
+        if fd not in self._fd_type_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._fd_type_dict[fd]
+
+    def add_message_queue_fd(self, message_queue_fd):
+        if self._message_queue_fd != -1:
+            return RcCode.DATA_EXIST
+        self._message_queue_fd = message_queue_fd
+        self._register_fd(message_queue_fd, HandlerFdType.MESSAGE_QUEUE)
+        return RcCode.SUCCESS
     
     def add_serial_port(self, serial_port_id, serial_port_obj):
         if serial_port_id in self._serial_port_info_dict:
             return RcCode.DATA_EXIST
         self._serial_port_info_dict[serial_port_id] = {
             "serial_port_obj": serial_port_obj, 
+            "serial_port_fd": -1,
+            "scrollback": RingBuffer(self._scrollback_size),
+            "rx_buffer": bytearray(SERIAL_PORT_READ_BUFFER_MIN_SIZE),
+            "rx_pending": bytearray(),
+            "rx_deadline": 0.0,
+            "tx_queue": collections.deque(),
+            "tx_size": 0,
+            "tx_limit": 0,
+            "tx_next_time": 0.0,
+            "tx_pacing": False,
+            "tx_monitor": False,
+            "input_paused": False,
+            "open_deadline": 0.0,
+            "counters": {
+                "tx_bytes": 0,
+                "tx_dropped_bytes": 0,
+                "sent_bytes": 0,
+                "dropped_bytes": 0,
+                "dropped_chunks": 0,
+                "coalesced": 0,
+                "slow_consumer_disconnects": 0
+            },
             "fd_dict": {},
-            "group_list": []
+            "group_set": set()
         }
         return RcCode.SUCCESS
     
     def del_serial_port(self, serial_port_id):
         if serial_port_id not in self._serial_port_info_dict:
             return RcCode.DATA_NOT_FOUND
+        if self._serial_port_info_dict[serial_port_id]["serial_port_fd"] != -1:
+            self.del_serial_port_fd(serial_port_id)
+        if serial_port_id in self._ready_serial_port_set:
+            self._ready_serial_port_set.discard(serial_port_id)
+            self._ready_serial_port_deque.remove(serial_port_id)
+        self._paced_serial_port_set.discard(serial_port_id)
+        self._coalescing_serial_port_set.discard(serial_port_id)
+        self._opening_serial_port_set.discard(serial_port_id)
         del self._serial_port_info_dict[serial_port_id]
         return RcCode.SUCCESS
+
+    def add_serial_port_fd(self, serial_port_id, serial_port_fd):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        if serial_port_fd in self._serial_port_fd_dict:
+            return RcCode.DATA_EXIST
+        self._serial_port_info_dict[serial_port_id]["serial_port_fd"] = serial_port_fd
+        self._serial_port_fd_dict[serial_port_fd] = serial_port_id
+        self._register_fd(serial_port_fd, HandlerFdType.SERIAL_PORT)
+        return RcCode.SUCCESS
+
+    def del_serial_port_fd(self, serial_port_id):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        serial_port_fd = self._serial_port_info_dict[serial_port_id]["serial_port_fd"]
+        if serial_port_fd not in self._serial_port_fd_dict:
+            return RcCode.DATA_NOT_FOUND
+        self._unregister_fd(serial_port_fd)
+        del self._serial_port_fd_dict[serial_port_fd]
+        self._serial_port_info_dict[serial_port_id]["serial_port_fd"] = -1
+        self._serial_port_info_dict[serial_port_id]["tx_monitor"] = False
+        return RcCode.SUCCESS
+
+    def set_serial_port_output_monitor(self, serial_port_id, enable):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        serial_port_dict = self._serial_port_info_dict[serial_port_id]
+        if serial_port_dict["serial_port_fd"] == -1 or serial_port_dict["tx_monitor"] == enable:
+            return RcCode.SUCCESS
+        self._modify_fd(serial_port_dict["serial_port_fd"], select.EPOLLIN | select.EPOLLOUT if enable else select.EPOLLIN)
+        serial_port_dict["tx_monitor"] = enable
+        return RcCode.SUCCESS
+
+    def set_serial_port_tx_limit(self, serial_port_id, tx_limit):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        self._serial_port_info_dict[serial_port_id]["tx_limit"] = tx_limit
+        return RcCode.SUCCESS
+
+    def set_serial_port_tx_pacing(self, serial_port_id, tx_pacing):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        self._serial_port_info_dict[serial_port_id]["tx_pacing"] = tx_pacing
+        if not tx_pacing:
+            self._paced_serial_port_set.discard(serial_port_id)
+        return RcCode.SUCCESS
+
+    def set_serial_port_rx_buffer_size(self, serial_port_id, rx_buffer_size):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        if len(self._serial_port_info_dict[serial_port_id]["rx_buffer"]) != rx_buffer_size:
+            self._serial_port_info_dict[serial_port_id]["rx_buffer"] = bytearray(rx_buffer_size)
+        return RcCode.SUCCESS
+
+    def add_coalescing_serial_port(self, serial_port_id):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        self._coalescing_serial_port_set.add(serial_port_id)
+        return RcCode.SUCCESS
+
+    def del_coalescing_serial_port(self, serial_port_id):
+        self._coalescing_serial_port_set.discard(serial_port_id)
+        return RcCode.SUCCESS
+
+    def get_coalescing_serial_port(self):
+        return RcCode.SUCCESS, self._coalescing_serial_port_set
+
+    def add_paced_serial_port(self, serial_port_id):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        self._paced_serial_port_set.add(serial_port_id)
+        return RcCode.SUCCESS
+
+    def del_paced_serial_port(self, serial_port_id):
+        self._paced_serial_port_set.discard(serial_port_id)
+        return RcCode.SUCCESS
+
+    def get_paced_serial_port(self):
+        return RcCode.SUCCESS, self._paced_serial_port_set
+
+    def add_opening_serial_port(self, serial_port_id, open_deadline):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        self._serial_port_info_dict[serial_port_id]["open_deadline"] = open_deadline
+        self._opening_serial_port_set.add(serial_port_id)
+        return RcCode.SUCCESS
+
+    def del_opening_serial_port(self, serial_port_id):
+        self._opening_serial_port_set.discard(serial_port_id)
+        return RcCode.SUCCESS
+
+    def get_opening_serial_port(self):
+        return RcCode.SUCCESS, self._opening_serial_port_set
+
+    def add_ready_serial_port(self, serial_port_id):
+        if serial_port_id not in self._serial_port_info_dict:
+            return RcCode.DATA_NOT_FOUND
+        if serial_port_id in self._ready_serial_port_set:
+            return RcCode.SUCCESS
+        self._ready_serial_port_set.add(serial_port_id)
+        self._ready_serial_port_deque.append(serial_port_id)
+        return RcCode.SUCCESS
+
+    def pop_ready_serial_port(self):
+        if not self._ready_serial_port_deque:
+            return RcCode.DATA_NOT_FOUND, None
+        serial_port_id = self._ready_serial_port_deque.popleft()
+        self._ready_serial_port_set.discard(serial_port_id)
+        return RcCode.SUCCESS, serial_port_id
+
+    def get_ready_serial_port_count(self):
+        return RcCode.SUCCESS, len(self._ready_serial_port_deque)
+
+    def get_serial_port_by_fd(self, serial_port_fd):
+        if serial_port_fd not in self._serial_port_fd_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._serial_port_fd_dict[serial_port_fd]
     
     def get_serial_port(self, serial_port_id=None):
         if serial_port_id is None:
@@ -59,9 +246,19 @@ class _ConsolerServerHandlerDb:
         self._client_socket_dict[socket_fd] = {
             "socket_obj": uds_client_socket_obj, 
             "serial_port_id": serial_port_id, 
-            "username": username
+            "username": username,
+            "output_queue": collections.deque(),
+            "output_size": 0,
+            "input_monitor": True,
+            "output_monitor": False,
+            "counters": {
+                "sent_bytes": 0,
+                "dropped_bytes": 0,
+                "dropped_chunks": 0,
+                "coalesced": 0
+            }
         }
-        self._client_socket_epoll.register(socket_fd, select.EPOLLIN)
+        self._register_fd(socket_fd, HandlerFdType.CLIENT_SOCKET)
         return RcCode.SUCCESS
     
     def del_serial_port_access_socket(self, serial_port_id, socket_fd):
@@ -70,7 +267,7 @@ class _ConsolerServerHandlerDb:
         if socket_fd not in self._serial_port_info_dict[serial_port_id]["fd_dict"]:
             return RcCode.DATA_NOT_FOUND
         socket_fd_dict = self._serial_port_info_dict[serial_port_id]["fd_dict"]
-        self._client_socket_epoll.unregister(socket_fd)
+        self._unregister_fd(socket_fd)
         del socket_fd_dict[socket_fd]
         del self._client_socket_dict[socket_fd]
         return RcCode.SUCCESS
@@ -85,9 +282,27 @@ class _ConsolerServerHandlerDb:
     
     def get_client_socket(self):
         return RcCode.SUCCESS, self._client_socket_dict
-    
-    def get_client_epoll(self):
-        return RcCode.SUCCESS, self._client_socket_epoll
+
+    def _set_client_socket_monitor(self, socket_fd, monitor, enable):
+        if socket_fd not in self._client_socket_dict:
+            return RcCode.DATA_NOT_FOUND
+        client_socket_dict = self._client_socket_dict[socket_fd]
+        if client_socket_dict[monitor] == enable:
+            return RcCode.SUCCESS
+        client_socket_dict[monitor] = enable
+        event_mask = 0
+        if client_socket_dict["input_monitor"]:
+            event_mask = event_mask | select.EPOLLIN
+        if client_socket_dict["output_monitor"]:
+            event_mask = event_mask | select.EPOLLOUT
+        self._modify_fd(socket_fd, event_mask)
+        return RcCode.SUCCESS
+
+    def set_client_socket_input_monitor(self, socket_fd, enable):
+        return self._set_client_socket_monitor(socket_fd, "input_monitor", enable)
+
+    def set_client_socket_output_monitor(self, socket_fd, enable):
+        return self._set_client_socket_monitor(socket_fd, "output_monitor", enable)
     
     def get_serial_port_info(self):
         return RcCode.SUCCESS, self._serial_port_info_dict
@@ -96,13 +311,13 @@ class _ConsolerServerHandlerDb:
         if self._uds_server_socket_obj is not None:
             return RcCode.DATA_EXIST
         self._uds_server_socket_obj = uds_server_socket_obj
-        self._server_socket_epoll.register(uds_server_socket_obj.uds_server_socket_fd_get(), select.EPOLLIN)
+        self._register_fd(uds_server_socket_obj.uds_server_socket_fd_get(), HandlerFdType.SERVER_SOCKET)
         return RcCode.SUCCESS
 
     def del_server_socket(self, uds_server_socket_obj):
         if self._uds_server_socket_obj is None:
             return RcCode.DATA_NOT_FOUND
-        self._server_socket_epoll.unregister(uds_server_socket_obj.uds_client_socket_fd_get())
+        self._unregister_fd(uds_server_socket_obj.uds_server_socket_fd_get())
         self._uds_server_socket_obj = None
         return RcCode.SUCCESS
 
@@ -111,24 +326,28 @@ class _ConsolerServerHandlerDb:
             return RcCode.DATA_NOT_FOUND, None
         return RcCode.SUCCESS, self._uds_server_socket_obj
 
-    def get_server_epoll(self):
-        return RcCode.SUCCESS, self._server_socket_epoll
-
     def add_pending_connection(self, uds_connected_socket):
         socket_fd = uds_connected_socket.uds_client_socket_fd_get()
         if socket_fd in self._pending_conn_dict:
             return RcCode.DATA_EXIST
         self._pending_conn_dict[socket_fd] = uds_connected_socket
-        self._server_socket_epoll.register(socket_fd, select.EPOLLIN)
+        self._pending_conn_frame_decoder_dict[socket_fd] = UdsFrameDecoder()
+        self._register_fd(socket_fd, HandlerFdType.PENDING_CONNECTION)
         return RcCode.SUCCESS
 
     def del_pending_connection(self, client_socket_fd):
         if client_socket_fd not in self._pending_conn_dict:
             return RcCode.DATA_NOT_FOUND
         del self._pending_conn_dict[client_socket_fd]
-        self._server_socket_epoll.unregister(client_socket_fd)
+        del self._pending_conn_frame_decoder_dict[client_socket_fd]
+        self._unregister_fd(client_socket_fd)
         return RcCode.SUCCESS
 
+    def get_pending_connection_frame_decoder(self, client_socket_fd):
+        if client_socket_fd not in self._pending_conn_frame_decoder_dict:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._pending_conn_frame_decoder_dict[client_socket_fd]
+
     def get_pending_connections(self, client_socket_fd=None):
         if client_socket_fd is None:
             return RcCode.SUCCESS, self._pending_conn_dict
@@ -136,101 +355,75 @@ class _ConsolerServerHandlerDb:
             return RcCode.DATA_NOT_FOUND, None
         return RcCode.SUCCESS, self._pending_conn_dict[client_socket_fd]
     
-    def add_user_account(self, username, group_name):
-        if username in self._user_dict:
-            return RcCode.DATA_EXIST
-        if group_name not in self._group_dict:
-            return RcCode.DATA_NOT_FOUND
-        self._user_dict[username] = {"group_list": [group_name]}
-        return RcCode.SUCCESS
-    
-    def del_user_account(self, username):
-        if username not in self._user_dict:
-            return RcCode.DATA_NOT_FOUND
-        del self._user_dict[username]
-        return RcCode.SUCCESS
-    
-    def get_user_account(self, username=None):
-        if username is None:
-            return RcCode.SUCCESS, self._user_dict
-        if username not in self._user_dict:
-            return RcCode.DATA_NOT_FOUND, None
-        return RcCode.SUCCESS, self._user_dict[username]
-    
-    def create_group(self, group_name):
-        if group_name in self._group_dict:
-            return RcCode.DATA_EXIST
-        self._group_dict[group_name] = {}
-        return RcCode.SUCCESS
-    
-    def destroy_group(self, group_name):
-        if group_name not in self._group_dict:
-            return RcCode.DATA_NOT_FOUND
-        del self._group_dict[group_name]
-        return RcCode.SUCCESS
-    
-    def get_group(self, group_name=None):
-        if group_name is None:
-            return RcCode.SUCCESS, self._group_dict
-        if group_name not in self._group_dict:
-            return RcCode.DATA_NOT_FOUND, None
-        return RcCode.SUCCESS, self._group_dict[group_name]
-    
-    def user_join_group(self, username, group_name):
-        if username not in self._user_dict:
-            return RcCode.DATA_NOT_FOUND
-        group_list = self._user_dict[username]["group_list"]
-        if group_name in group_list:
-            return RcCode.DATA_EXIST
-        group_list.append(group_name)
-        return RcCode.SUCCESS
-    
-    def user_leave_group(self, username, group_name):
-        if username not in self._user_dict:
-            return RcCode.DATA_NOT_FOUND
-        group_list = self._user_dict[username]["group_list"]
-        if group_name not in group_list:
-            return RcCode.DATA_NOT_FOUND
-        group_list.remove(group_name)
-        return RcCode.SUCCESS
-    
     def port_join_group(self, serial_port_id, group_name):
         if serial_port_id not in self._serial_port_info_dict:
             return RcCode.DATA_NOT_FOUND
-        if group_name in self._serial_port_info_dict[serial_port_id]["group_list"]:
+        if group_name in self._serial_port_info_dict[serial_port_id]["group_set"]:
             return RcCode.DATA_EXIST
-        self._serial_port_info_dict[serial_port_id]["group_list"].append(group_name)
+        self._serial_port_info_dict[serial_port_id]["group_set"].add(group_name)
         return RcCode.SUCCESS
     
     def port_leave_group(self, serial_port_id, group_name):
         if serial_port_id not in self._serial_port_info_dict:
             return RcCode.DATA_NOT_FOUND
-        if group_name in self._serial_port_info_dict[serial_port_id]["group_list"]:
+        if group_name not in self._serial_port_info_dict[serial_port_id]["group_set"]:
             return RcCode.DATA_NOT_FOUND
-        self._serial_port_info_dict[serial_port_id]["group_list"].remove(group_name)
+        self._serial_port_info_dict[serial_port_id]["group_set"].discard(group_name)
         return RcCode.SUCCESS
 
 
 MAX_MSG_SIZE = 1024
 
+# The read buffer of a serial port holds the data arriving at the line rate in this period. It is also the maximum
+# bytes reading from a serial port before the next ready serial port is served.
+SERIAL_PORT_READ_BUFFER_SECONDS = 0.1
+SERIAL_PORT_READ_BUFFER_MIN_SIZE = 1024
+
+# The TX queue of a serial port holds the data which can be sent at the line rate in this period
+SERIAL_PORT_TX_QUEUE_SECONDS = 10
+SERIAL_PORT_TX_QUEUE_MIN_SIZE = 4096
+
+# The bytes written at a time to the serial port which paces the writes
+SERIAL_PORT_TX_PACE_CHUNK_SIZE = 16
+
+# The maximum bytes of the queued chunks merged into a single write to the serial port
+SERIAL_PORT_TX_BATCH_SIZE = 4096
+
 
 class ConsolerServerHandler(multiprocessing.Process):
-    def __init__(self, process_id, tx_queue_func, rx_queue_func):
+    def __init__(self, process_id, tx_queue_func, rx_queue_func, rx_queue_fd_func,
+                 scrollback_size=DEFAULT_SCROLLBACK_SIZE, client_output_limit=DEFAULT_CLIENT_OUTPUT_LIMIT,
+                 slow_consumer_policy=SlowConsumerPolicy.DROP_OLDEST, serial_tx_pacing=False,
+                 serial_rx_coalesce_window=DEFAULT_SERIAL_RX_COALESCE_WINDOW, acl_snapshot=None):
         self._process_id = process_id
+        self._acl_snapshot = acl_snapshot
+        self._serial_rx_coalesce_window = serial_rx_coalesce_window
+        self._serial_tx_pacing = serial_tx_pacing
+        self._client_output_limit = client_output_limit
+        self._slow_consumer_policy = slow_consumer_policy
         self._tx_queue_func = tx_queue_func
         self._rx_queue_func = rx_queue_func
+        self._rx_queue_fd_func = rx_queue_fd_func
         multiprocessing.Process.__init__(self)
 
         self._logger_system = LoggerSystem("ConsolerServerHandler_{}".format(process_id))
         self._logger = self._logger_system.get_logger()
 
-        self._db = _ConsolerServerHandlerDb()
+        self._db = _ConsolerServerHandlerDb(scrollback_size)
 
         self._pending_client_socket_dict = {}
 
+        # The replies of the operations when the handler processes a batch request
+        self._batch_reply_list = None
+
+        # The function and the required parameters of each request from the server indexed by the opcode
+        self._queue_request_dispatch_table = [None] * len(ConsoleServerOpcode)
+        self._init_queue_request_dispatch_table()
+
         self._is_server_running = True
 
-        self._processing_time = 0.01
+        # Block until one of the fds is ready
+        self._poll_timeout = -1
     
     def _close_client_socket(self, serial_port_id, uds_socket_obj):
         socket_fd = uds_socket_obj.uds_client_socket_fd_get()
@@ -288,6 +481,18 @@ class ConsolerServerHandler(multiprocessing.Process):
             return rc
         self._logger.info(self._logger_system.set_logger_rc_code("Init server socket complete."))
 
+        # Wake up the handler when the console server sends the message through the queue
+        rc, message_queue_fd = self._rx_queue_fd_func()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not get the fd of the message queue.", rc=rc))
+            return rc
+        rc = self._db.add_message_queue_fd(message_queue_fd)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not add the fd of the message queue to the DB.", rc=rc))
+            return rc
+
         # Init the port group
 
         # Notify the console server that process has processed completely
@@ -304,9 +509,14 @@ class ConsolerServerHandler(multiprocessing.Process):
     ##########################################################################################################
 
     def _reply_queue_message(self, client_request, data, result):
+        # The operations of a batch request are replied together by the batch request
+        if self._batch_reply_list is not None:
+            self._batch_reply_list.append((result, data))
+            return RcCode.SUCCESS
+
         reply_msg = ReplyMsg(
             client_request.request, client_request.serial_port_id, client_request.socket_fd, client_request.exec_user,
-            data, result)
+            data, result, client_request.request_id, client_request.connection_id)
         rc = self._tx_queue_func(reply_msg)
         if rc != RcCode.SUCCESS:
             self._logger.error(
@@ -335,15 +545,42 @@ class ConsolerServerHandler(multiprocessing.Process):
                 self._logger_system.set_logger_rc_code(
                     "Can not add the serial port object to DB.", rc=rc))
             return rc
+
+        # Size the TX queue and the read buffer by the line rate
+        rc = self._db.set_serial_port_tx_limit(serial_port_id, self._get_serial_port_tx_limit(baud_rate))
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Can not set the TX queue size of the serial port.", rc=rc))
+            return rc
+        rc = self._db.set_serial_port_rx_buffer_size(serial_port_id, self._get_serial_port_rx_buffer_size(baud_rate))
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Can not set the read buffer size of the serial port.", rc=rc))
+            return rc
+
+        # The serial port paces its output if it is configured, otherwise the handler default is used
+        rc = self._db.set_serial_port_tx_pacing(serial_port_id, serial_port_info.get("tx_pacing", self._serial_tx_pacing))
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Can not set the TX pacing of the serial port.", rc=rc))
+            return rc
         return RcCode.SUCCESS
 
+    @staticmethod
+    def _get_serial_port_rx_buffer_size(baud_rate):
+        return max(SERIAL_PORT_READ_BUFFER_MIN_SIZE, int(baud_rate // 10 * SERIAL_PORT_READ_BUFFER_SECONDS))
+
+    @staticmethod
+    def _get_serial_port_tx_limit(baud_rate):
+        # A character takes 10 bits on the line: start bit, 8 data bits and stop bit
+        return max(SERIAL_PORT_TX_QUEUE_MIN_SIZE, baud_rate // 10 * SERIAL_PORT_TX_QUEUE_SECONDS)
+
     def _process_init_serial_port_event(self, msg_dict):
         self._logger.info(self._logger_system.set_logger_rc_code("Initialize the serial port"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["serial_port_config", "group_name"], required_exec_user=False):
-            return self._reply_queue_message(msg_dict, "Missing the required parameters.", "Failed")
-
         serial_port_config = msg_dict.data["serial_port_config"]
         group_name = msg_dict.data["group_name"]
 
@@ -359,6 +596,15 @@ class ConsolerServerHandler(multiprocessing.Process):
             if rc != RcCode.SUCCESS:
                 self._logger.error(self._logger_system.set_logger_rc_code("Port can not join the default group.", rc=rc))
                 return self._reply_queue_message(msg_dict, "Port can not join the default group.", "Failed")
+
+            # Open the port by the event loop before any session is attached, so the scrollback keeps the boot logs
+            if not TEST_MODE:
+                rc = self._schedule_serial_port_open(serial_port_id, 0)
+                if rc != RcCode.SUCCESS:
+                    self._logger.error(self._logger_system.set_logger_rc_code(
+                        "Can not schedule opening the serial port {}.".format(serial_port_id), rc=rc))
+                    return self._reply_queue_message(
+                        msg_dict, "Can not open the serial port {}.".format(serial_port_id), "Failed")
             self._logger.info(
                 self._logger_system.set_logger_rc_code("Initialize the serial port {} successful.".format(serial_port_id)))
 
@@ -367,42 +613,9 @@ class ConsolerServerHandler(multiprocessing.Process):
             "Notify the server that serial port has initialized completely."))
         return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
 
-    def _process_init_default_account_event(self, msg_dict):
-        self._logger.info(self._logger_system.set_logger_rc_code("Initialize the default user account"))
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["username", "group_name"], required_exec_user=False):
-            return self._reply_queue_message(msg_dict, "Missing the required parameters.", "Failed")
-
-        username = msg_dict.data["username"]
-        group_name = msg_dict.data["group_name"]
-        role = msg_dict.data["role"]
-
-        # Create the group in the DB
-        rc = self._db.create_group(group_name)
-        if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not add the group {} to DB".format(group_name), rc=rc))
-            return self._reply_queue_message(msg_dict, "Can not add the group {} to DB".format(group_name),
-                                                 "Failed")
-
-        # Create the user in the DB
-        rc = self._db.add_user_account(username, group_name)
-        if rc != RcCode.SUCCESS:
-            return self._reply_queue_message(msg_dict, "Can not add the user in the DB.", "failed")
-
-        # Notify the console server that serial port initialization is complete.
-        self._logger.info(self._logger_system.set_logger_rc_code(
-            "Notify the server that default user initialized completely."))
-        return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
-
     def _process_config_baud_rate(self, msg_dict):
         self._logger.info(self._logger_system.set_logger_rc_code("Process baud rate request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["baud_rate"], required_serial_port_id=True):
-            return self._reply_queue_message(msg_dict, "Missing the required parameters.", "Failed")
-
         serial_port_id = msg_dict.serial_port_id
         baud_rate = msg_dict.data["baud_rate"]
 
@@ -422,200 +635,67 @@ class ConsolerServerHandler(multiprocessing.Process):
                 "Set the baud rate top the serial port {} fail".format(serial_port_id), rc=rc))
             return self._reply_queue_message(msg_dict, "Can not get the serial port object the DB.", "Failed")
 
-        self._logger.info(self._logger_system.set_logger_rc_code(
-            "Set the new baud rate to the serial port {} successful.".format(serial_port_id)))
-
-        # Notify the console server that serial has configured the new baud rate
-        return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
-    
-    def _process_add_user_account(self, msg_dict):
-        self._logger.info(self._logger_system.set_logger_rc_code("Process add username request"))
-
-        # Set the reply process ID
-        msg_dict.data["process_id"] = self._process_id
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["username", "group_name"]):
-            msg_dict.data["error_msg"] = "Missing the required parameters."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-
-        username = msg_dict.data["username"]
-        group_name = msg_dict.data["group_name"]
-
-        rc = self._db.add_user_account(username, group_name)
-        if rc != RcCode.SUCCESS:
-            return self._reply_queue_message(msg_dict, "Can not add the user in the DB.", "failed")
-
-        self._logger.info(self._logger_system.set_logger_rc_code(
-            "Add the user {} and the group {} successful.".format(username, group_name)))
-
-        # Notify the console server that the user has been created
-        return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
-    
-    def _process_del_user_account(self, msg_dict):
-        self._logger.info(self._logger_system.set_logger_rc_code("Process delete username request"))
-
-        # Set the reply process ID
-        msg_dict.data["process_id"] = self._process_id
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["username"]):
-            msg_dict.data["error_msg"] = "Missing the required parameters."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-
-        username = msg_dict.data["username"]
-
-        # Delete the username to DB
-        rc = self._db.del_user_account(username)
+        # Resize the TX queue and the read buffer for the new line rate
+        rc = self._db.set_serial_port_tx_limit(serial_port_id, self._get_serial_port_tx_limit(baud_rate))
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not add the username {} to DB".format(username), rc=rc))
-            return self._reply_queue_message(msg_dict, "Can not add the username {} to DB".format(username), "Failed")
-
-        self._logger.info(self._logger_system.set_logger_rc_code("Delete the user {} successful.".format(username)))
-
-        # Notify the console server that serial has configured the new baud rate
-        return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
-    
-    def _process_add_group(self, msg_dict):
-        self._logger.info(self._logger_system.set_logger_rc_code("Process add group request {}".format(msg_dict.data)))
-
-        # Set the reply process ID
-        msg_dict.data["process_id"] = self._process_id
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["group_name", "role"]):
-            msg_dict.data["error_msg"] = "Missing the required parameters."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-
-        group_name = msg_dict.data["group_name"]
-        role = msg_dict.data["role"]
-
-        # Create the group in the DB
-        rc = self._db.create_group(group_name)
+                "Set the TX queue size of the serial port {} fail".format(serial_port_id), rc=rc))
+            return self._reply_queue_message(msg_dict, "Can not set the TX queue size of the serial port.", "Failed")
+        rc = self._db.set_serial_port_rx_buffer_size(serial_port_id, self._get_serial_port_rx_buffer_size(baud_rate))
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not add the group {} to DB".format(group_name), rc=rc))
-            return self._reply_queue_message(msg_dict, "Can not add the group {} to DB".format(group_name), "Failed")
+                "Set the read buffer size of the serial port {} fail".format(serial_port_id), rc=rc))
+            return self._reply_queue_message(msg_dict, "Can not set the read buffer size of the serial port.", "Failed")
 
-        self._logger.info(self._logger_system.set_logger_rc_code("Add the group {} successful.".format(group_name)))
+        self._logger.info(self._logger_system.set_logger_rc_code(
+            "Set the new baud rate to the serial port {} successful.".format(serial_port_id)))
 
         # Notify the console server that serial has configured the new baud rate
         return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
+    
+    def _process_get_port_counters(self, msg_dict):
+        self._logger.info(self._logger_system.set_logger_rc_code("Process get port counters request"))
 
-    def _process_del_group(self, msg_dict):
-        self._logger.info(self._logger_system.set_logger_rc_code("Process delete group request"))
-
-        # Set the reply process ID
-        msg_dict.data["process_id"] = self._process_id
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["group_name"]):
-            msg_dict.data["error_msg"] = "Missing the required parameters."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-
-        group_name = msg_dict.data["group_name"]
-
-        # Check if the user has been deleted from the group
-        rc, user_dict = self._db.get_user_account()
-        if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not get the users in the DB.", rc=rc))
-            msg_dict.data["error_msg"] = "Can not get the users in the DB."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-        for username in user_dict:
-            if group_name in user_dict[username]["group_list"]:
-                self._logger.error(self._logger_system.set_logger_rc_code(
-                    "The group still has the user.", rc=rc))
-                msg_dict.data["error_msg"] = "The group still has the user."
-                return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-
-        rc, port_list = self._db.get_serial_port()
+        serial_port_id = msg_dict.serial_port_id
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not get the serial ports in the DB.", rc=rc))
-            msg_dict.data["error_msg"] = "Can not get the serial ports in the DB."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-        for serial_port_id in port_list:
-            if group_name in port_list[serial_port_id]["group_list"]:
-                self._logger.error(self._logger_system.set_logger_rc_code(
-                    "The group still has the serial port.", rc=rc))
-                msg_dict.data["error_msg"] = "The group still has the serial port."
-                return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
+                "Get the serial port {} from the DB fail".format(serial_port_id), rc=rc))
+            return self._reply_queue_message(msg_dict, "Can not get the serial port object the DB.", "Failed")
 
-        # Delete the username to DB
-        rc = self._db.destroy_group(group_name)
+        rc, client_socket_dict = self._db.get_client_socket()
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code(
-                "Can not delete the group {} from DB".format(group_name), rc=rc))
-            return self._reply_queue_message(msg_dict, "Can not delete the group {} from DB".format(group_name), "Failed")
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not get the client socket.", rc=rc))
+            return self._reply_queue_message(msg_dict, "Can not get the client socket from the DB.", "Failed")
 
-        self._logger.info(self._logger_system.set_logger_rc_code("Delete the group {} successful.".format(group_name)))
-
-        # Notify the console server that serial has configured the new baud rate
-        return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
-
-    def _process_user_join_group(self, msg_dict):
-        self._logger.info(self._logger_system.set_logger_rc_code("Process user join group request"))
-
-        # Set the reply process ID
-        msg_dict.data["process_id"] = self._process_id
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["group_name", "username"]):
-            msg_dict.data["error_msg"] = "Missing the required parameters."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-
-        group_name = msg_dict.data["group_name"]
-        username = msg_dict.data["username"]
+        client_counters_list = []
+        for socket_fd in serial_port_dict["fd_dict"]:
+            client_counters = dict(client_socket_dict[socket_fd]["counters"])
+            client_counters["username"] = client_socket_dict[socket_fd]["username"]
+            client_counters["queued_bytes"] = client_socket_dict[socket_fd]["output_size"]
+            client_counters_list.append(client_counters)
 
-        # Delete the username to DB
-        rc = self._db.user_join_group(username, group_name)
+        serial_port_obj = serial_port_dict["serial_port_obj"]
+        rc, port_state = serial_port_obj.get_com_port_state()
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code(
-                "User {} can not join the group {}".format(username, group_name), rc=rc))
-            return self._reply_queue_message(msg_dict, "User {} can not join the group {}".format(username, group_name), "Failed")
-
-        self._logger.info(self._logger_system.set_logger_rc_code(
-            "User {} join group {} successful.".format(username, group_name)))
-
-        # Notify the console server that serial has configured the new baud rate
-        return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
-
-    def _process_user_leave_group(self, msg_dict):
-        self._logger.info(self._logger_system.set_logger_rc_code("Process user leave group request"))
-
-        # Set the reply process ID
-        msg_dict.data["process_id"] = self._process_id
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["group_name", "username"]):
-            msg_dict.data["error_msg"] = "Missing the required parameters."
-            return self._reply_queue_message(msg_dict, msg_dict.data, "Failed")
-
-        group_name = msg_dict.data["group_name"]
-        username = msg_dict.data["username"]
-
-        # Delete the username to DB
-        rc = self._db.user_leave_group(username, group_name)
+            return self._reply_queue_message(msg_dict, "Can not get the state of the serial port.", "Failed")
+        rc, syscall_counters = serial_port_obj.get_com_port_syscall_counters()
         if rc != RcCode.SUCCESS:
-            self._logger.error(self._logger_system.set_logger_rc_code(
-                "User {} can not leave the group {}".format(username, group_name), rc=rc))
-            return self._reply_queue_message(msg_dict, "User {} can not leave the group {}".format(username, group_name), "Failed")
-
-        self._logger.info(self._logger_system.set_logger_rc_code(
-            "User {} leave group {} successful.".format(username, group_name)))
-
-        # Notify the console server that serial has configured the new baud rate
-        return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
+            return self._reply_queue_message(msg_dict, "Can not get the system call counters of the serial port.", "Failed")
+
+        data = {
+            "port_state": str(port_state),
+            "syscall_counters": syscall_counters,
+            "slow_consumer_policy": str(self._slow_consumer_policy),
+            "client_output_limit": self._client_output_limit,
+            "port_counters": dict(serial_port_dict["counters"]),
+            "client_counters": client_counters_list
+        }
+        return self._reply_queue_message(msg_dict, data, "OK")
 
     def _process_port_join_group(self, msg_dict):
         self._logger.info(self._logger_system.set_logger_rc_code("Process port join group request"))
 
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["group_name"], required_serial_port_id=True):
-            return self._reply_queue_message(msg_dict, "Missing the required parameters.", "Failed")
-
         group_name = msg_dict.data["group_name"]
         serial_port_id = msg_dict.serial_port_id
 
@@ -635,18 +715,11 @@ class ConsolerServerHandler(multiprocessing.Process):
     def _process_port_leave_group(self, msg_dict):
         self._logger.info(self._logger_system.set_logger_rc_code("Process port leave group request"))
 
-        # Set the reply process ID
-        msg_dict.data["process_id"] = self._process_id
-
-        # Parse the message and check if the Required parameters are in the message
-        if not check_all_required_parameter(msg_dict, ["group_name"], required_serial_port_id=True):
-            return self._reply_queue_message(msg_dict, "Missing the required parameters.", "Failed")
-
         group_name = msg_dict.data["group_name"]
         serial_port_id = msg_dict.serial_port_id
 
-        # Delete the username to DB
-        rc = self._db.port_join_group(serial_port_id, group_name)
+        # Delete the group from the port
+        rc = self._db.port_leave_group(serial_port_id, group_name)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code(
                 "Port {} can not leave the group {}".format(serial_port_id, group_name), rc=rc))
@@ -659,87 +732,130 @@ class ConsolerServerHandler(multiprocessing.Process):
         return self._reply_queue_message(msg_dict, msg_dict.data, "OK")
     
     def process_message_queue_data(self):
-        rc, msg_dict = self._rx_queue_func()
-        if rc == RcCode.QUEUE_ENPTY:
-            # No such data to read from the queue
-            return RcCode.SUCCESS
-        elif rc != RcCode.SUCCESS:
-            return rc
+        while True:
+            rc, msg_dict = self._rx_queue_func()
+            if rc == RcCode.QUEUE_ENPTY:
+                # No such data to read from the queue
+                return RcCode.SUCCESS
+            elif rc != RcCode.SUCCESS:
+                return rc
 
-        # Process the request
-        match msg_dict.request:
-            case ConsoleServerEvent.INIT_SERIAL_PORT:
-                call_func = self._process_init_serial_port_event
-            case ConsoleServerEvent.INIT_DEFAULT_ACCOUNT:
-                call_func = self._process_init_default_account_event
-            case ConsoleServerEvent.SET_BAUD_RATE:
-                call_func = self._process_config_baud_rate
-            case ConsoleServerEvent.CREATE_GROUP:
-                call_func = self._process_add_group
-            case ConsoleServerEvent.DESTROY_GROUP:
-                call_func = self._process_del_group
-            case ConsoleServerEvent.ADD_USER_ACCOUNT:
-                call_func = self._process_add_user_account
-            case ConsoleServerEvent.DEL_USER_ACCOUNT:
-                call_func = self._process_del_user_account
-            case ConsoleServerEvent.USER_JOIN_GROUP:
-                call_func = self._process_user_join_group
-            case ConsoleServerEvent.USER_LEAVE_GROUP:
-                call_func = self._process_user_leave_group
-            case ConsoleServerEvent.PORT_JOIN_GROUP:
-                call_func = self._process_port_join_group
-            case ConsoleServerEvent.PORT_LEAVE_GROUP:
-                call_func = self._process_port_leave_group
-            case _:
-                # Notify the console server that the request is invalid
-                rc = self._reply_queue_message(msg_dict, "Invalid the request", "failed")
-                if rc != RcCode.SUCCESS:
-                    return rc
+            rc = self._process_message_queue_request(msg_dict)
+            if rc != RcCode.SUCCESS:
                 return rc
-        rc = call_func(msg_dict)
-        if rc != RcCode.SUCCESS:
-            return rc
-        return RcCode.SUCCESS
-    
-    ##########################################################################################################
-    # Process Server Socket Data Relate API
-    ##########################################################################################################
 
-    def _reply_client_message(self, client_socket_obj, client_request, data=None, result=None):
-        # Create reply message
-        reply_msg = ReplyMsg(client_request.request, client_request.serial_port_id, client_request.socket_fd, 
-                             client_request.exec_user, data, result)
-        rc, msg_dict = reply_msg.get_msg()
+    def _process_batch(self, msg_dict):
+        self._logger.info(self._logger_system.set_logger_rc_code("Process batch request"))
+
+        # Apply the operations in order, and collect the result of each operation
+        result_list = []
+        for operation in msg_dict.data["operations"]:
+            operation_request = RequestMsg(operation["request"], operation["serial_port_id"], msg_dict.socket_fd,
+                                           msg_dict.exec_user, operation["data"], msg_dict.request_id,
+                                           msg_dict.connection_id)
+            self._batch_reply_list = []
+            rc = self._process_message_queue_request(operation_request)
+            batch_reply_list = self._batch_reply_list
+            self._batch_reply_list = None
+            if rc != RcCode.SUCCESS or len(batch_reply_list) == 0:
+                result_list.append(
+                    {"index": operation["index"], "result": "failed", "data": "Handler the operation failed."})
+                continue
+
+            result, data = batch_reply_list[-1]
+            if result == "OK":
+                result_list.append({"index": operation["index"], "result": "OK", "data": None})
+            else:
+                if isinstance(data, dict):
+                    data = data.get("error_msg", "Handler the operation failed.")
+                result_list.append({"index": operation["index"], "result": "failed", "data": data})
+
+        self._logger.info(self._logger_system.set_logger_rc_code(
+            "Apply {} operations of the batch request.".format(len(result_list))))
+        return self._reply_queue_message(msg_dict, {"process_id": self._process_id, "results": result_list}, "OK")
+
+    def _register_queue_request(self, request, func, key_list=None, required_exec_user=True,
+                                required_serial_port_id=False):
+        opcode = ConsoleServerEventOpcodeDict[request]
+        if self._queue_request_dispatch_table[opcode] is not None:
+            return RcCode.DATA_EXIST
+        self._queue_request_dispatch_table[opcode] = {
+            "request": request,
+            "func": func,
+            "key_list": key_list if key_list is not None else [],
+            "required_exec_user": required_exec_user,
+            "required_serial_port_id": required_serial_port_id
+        }
+        return RcCode.SUCCESS
+
+    def _init_queue_request_dispatch_table(self):
+        self._register_queue_request(ConsoleServerEvent.INIT_SERIAL_PORT, self._process_init_serial_port_event,
+                                     key_list=["serial_port_config", "group_name"], required_exec_user=False)
+        self._register_queue_request(ConsoleServerEvent.SET_BAUD_RATE, self._process_config_baud_rate,
+                                     key_list=["baud_rate"], required_serial_port_id=True)
+        self._register_queue_request(ConsoleServerEvent.GET_PORT_COUNTERS, self._process_get_port_counters,
+                                     required_serial_port_id=True)
+        self._register_queue_request(ConsoleServerEvent.PORT_JOIN_GROUP, self._process_port_join_group,
+                                     key_list=["group_name"], required_serial_port_id=True)
+        self._register_queue_request(ConsoleServerEvent.PORT_LEAVE_GROUP, self._process_port_leave_group,
+                                     key_list=["group_name"], required_serial_port_id=True)
+        self._register_queue_request(ConsoleServerEvent.BATCH, self._process_batch, key_list=["operations"])
+
+    def _get_queue_request_entry(self, request):
+        if not isinstance(request, str):
+            return RcCode.INVALID_VALUE, None
+        opcode = ConsoleServerEventOpcodeDict.get(request)
+        if opcode is None or self._queue_request_dispatch_table[opcode] is None:
+            return RcCode.DATA_NOT_FOUND, None
+        return RcCode.SUCCESS, self._queue_request_dispatch_table[opcode]
+
+    def _process_message_queue_request(self, msg_dict):
+        # Look up the request in the dispatch table
+        rc, entry = self._get_queue_request_entry(msg_dict.request)
+        if rc != RcCode.SUCCESS:
+            # Notify the console server that the request is invalid
+            return self._reply_queue_message(msg_dict, "Invalid the request", "failed")
+
+        # Check if the Required parameters are in the message
+        if not check_all_required_parameter(msg_dict, entry["key_list"], required_exec_user=entry["required_exec_user"],
+                                            required_serial_port_id=entry["required_serial_port_id"]):
+            return self._reply_queue_message(msg_dict, "Missing the required parameters.", "Failed")
+
+        # Process the request
+        rc = entry["func"](msg_dict)
         if rc != RcCode.SUCCESS:
-            self._logger.error(
-                self._logger_system.set_logger_rc_code(
-                    "Can not convert the data to the dictionary.", rc=rc))
             return rc
+        return RcCode.SUCCESS
+    
+    ##########################################################################################################
+    # Process Server Socket Data Relate API
+    ##########################################################################################################
 
-        # Message serialize
-        rc, msg_str = msg_serialize(msg_dict)
+    def _reply_client_message(self, client_socket_obj, client_request, data=None, result=None, codec=MsgCodec.JSON):
+        # Create reply message
+        reply_msg = ReplyMsg(client_request.request, client_request.serial_port_id, client_request.socket_fd, 
+                             client_request.exec_user, data, result, client_request.request_id)
+        rc, msg_dict = reply_msg.get_msg()
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code(
-                    "Can not serialize the data.", rc=rc))
+                    "Can not convert the data to the dictionary.", rc=rc))
             return rc
 
-        # Send the total size of the message by socket
-        data_len = len(msg_str)
-        data_byte = data_len.to_bytes(4, byteorder='little')
-        rc = client_socket_obj.uds_client_socket_send(data_byte)
+        # Message serialize
+        rc, msg_byte = msg_encode(msg_dict, codec)
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code(
                     "Can not serialize the data.", rc=rc))
             return rc
 
-        # Send the message by socket
-        rc = client_socket_obj.uds_client_socket_send(bytes(msg_str, 'utf-8'))
+        # Send the total size and the message by socket
+        rc = client_socket_obj.uds_client_socket_send_frame(msg_byte)
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code(
-                    "Can not serialize the data.", rc=rc))
+                    "Can not send the data.", rc=rc))
             return rc
         return RcCode.SUCCESS
 
@@ -763,21 +879,19 @@ class ConsolerServerHandler(multiprocessing.Process):
                 return rc
         return RcCode.SUCCESS
 
-    def _connect_serial_port(self, pending_connection, request):
+    def _connect_serial_port(self, pending_connection, request, codec):
         serial_port_id = request.serial_port_id
         exec_user = request.exec_user
 
-        # Update the request information in the DB
-        rc = self._update_request_information(pending_connection, serial_port_id, exec_user)
-        if rc != RcCode.SUCCESS:
-            return rc
-
-        rc, user_dict = self._db.get_user_account(exec_user)
+        # The accounts are published by the console server
+        rc, acl_snapshot = self._acl_snapshot.get_snapshot()
         if rc != RcCode.SUCCESS:
-            self._logger.error(
-                self._logger_system.set_logger_rc_code("Can not get the user {} account".format(exec_user), rc=rc))
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not get the ACL snapshot.", rc=rc))
             return rc
-        user_group_list = user_dict["group_list"]
+        if exec_user not in acl_snapshot["user"]:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not get the user {} account".format(exec_user)))
+            return RcCode.DATA_NOT_FOUND
+        user_group_list = acl_snapshot["user"][exec_user]["group_list"]
 
         # Check if port and user are in the same group.
         rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
@@ -785,35 +899,145 @@ class ConsolerServerHandler(multiprocessing.Process):
             self._logger.error(
                 self._logger_system.set_logger_rc_code("Get the serial port {} from the DB fail".format(serial_port_id), rc=rc))
             return rc
-        port_group_list = serial_port_dict["group_list"]
-        if len(list(set(port_group_list).intersection(user_group_list))):
-            rc = self._reply_client_message(pending_connection, request, 
-                                            "Port {} does not allow user {} to access.".format(serial_port_id, exec_user), "Fail")
+        if serial_port_dict["group_set"].isdisjoint(user_group_list):
+            rc = self._reply_client_message(pending_connection, request,
+                                            "Port {} does not allow user {} to access.".format(serial_port_id, exec_user),
+                                            "Fail", codec)
             if rc != RcCode.SUCCESS:
                 return rc
+            return RcCode.PERMISSION_DENIED
 
-        serial_port_obj = serial_port_dict["serial_port_obj"]
-        rc, status = serial_port_obj.is_open_com_port()
+        # Update the request information in the DB
+        rc = self._update_request_information(pending_connection, serial_port_id, exec_user)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # The closed or failed serial port is opened by the event loop so that the other ports are not blocked. The port
+        # which waits for the next retry is retried at once for the new session. The session is attached now and
+        # receives the data once the port is open.
+        rc, port_state = serial_port_dict["serial_port_obj"].get_com_port_state()
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not get the port status.", rc=rc))
             return rc
-        if not status:
-            rc = serial_port_obj.open_com_port() if not TEST_MODE else RcCode.SUCCESS
+        if port_state in (SerialPortState.CLOSED, SerialPortState.ERROR, SerialPortState.BACKOFF) and not TEST_MODE:
+            rc = self._schedule_serial_port_open(serial_port_id, 0)
             if rc != RcCode.SUCCESS:
                 self._logger.error(
                     self._logger_system.set_logger_rc_code("Can not open serial port {}".format(serial_port_id), rc=rc))
                 return rc
 
-        rc = self._reply_client_message(pending_connection, request, request.data, "OK")
+        rc = self._reply_client_message(pending_connection, request, request.data, "OK", codec)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # The data of the serial port is queued and sent when the client socket is writable
+        rc = pending_connection.uds_client_socket_set_blocking(False)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not set the client socket to non-blocking mode.", rc=rc))
+            return rc
+
+        # Replay the data which the serial port output before the session is attached
+        rc = self._replay_scrollback(pending_connection, serial_port_id, serial_port_dict["scrollback"])
         if rc != RcCode.SUCCESS:
             return rc
         self._logger.info(
             self._logger_system.set_logger_rc_code("Connect with serial port {} successful.".format(request.serial_port_id)))
         return RcCode.SUCCESS
 
+    def _replay_scrollback(self, client_socket_obj, serial_port_id, scrollback):
+        rc, data = scrollback.read()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Can not read the scrollback of serial port {}.".format(serial_port_id), rc=rc))
+            return rc
+        if not data:
+            return RcCode.SUCCESS
+        socket_fd = client_socket_obj.uds_client_socket_fd_get()
+        rc = self._queue_client_output(serial_port_id, socket_fd, data)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Can not replay the scrollback of serial port {}.".format(serial_port_id), rc=rc))
+            return rc
+        return self._flush_client_output(serial_port_id, socket_fd)
+
+    def _register_serial_port_fd(self, serial_port_id, serial_port_obj):
+        rc, serial_port_fd = serial_port_obj.get_com_port_fd()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not get the fd of serial port {}".format(serial_port_id), rc=rc))
+            return rc
+        rc = self._db.add_serial_port_fd(serial_port_id, serial_port_fd)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Can not add the fd of serial port {} to the DB.".format(serial_port_id), rc=rc))
+            return rc
+        return RcCode.SUCCESS
+
+    def _schedule_serial_port_open(self, serial_port_id, delay):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+        if delay == 0:
+            rc = serial_port_dict["serial_port_obj"].set_com_port_opening()
+            if rc != RcCode.SUCCESS:
+                return RcCode.SUCCESS
+        return self._db.add_opening_serial_port(serial_port_id, time.monotonic() + delay)
+
+    def _open_serial_port(self, serial_port_id):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+        serial_port_obj = serial_port_dict["serial_port_obj"]
+        rc = self._db.del_opening_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # Try to open the port once, whether or not a session is attached, so the scrollback keeps the output. The port
+        # is retried later with a longer delay if it is still not ready.
+        rc = serial_port_obj.open_com_port()
+        if rc != RcCode.SUCCESS:
+            rc, delay = serial_port_obj.set_com_port_backoff()
+            if rc != RcCode.SUCCESS:
+                return rc
+            self._logger.warning(
+                self._logger_system.set_logger_rc_code(
+                    "Serial port {} is retried after {} seconds.".format(serial_port_id, delay)))
+            return self._schedule_serial_port_open(serial_port_id, delay)
+
+        # Monitor the tty of the serial port so that it is read only when the data arrives
+        if serial_port_dict["serial_port_fd"] == -1:
+            return self._register_serial_port_fd(serial_port_id, serial_port_obj)
+        return RcCode.SUCCESS
+
+    def process_opening_serial_port(self):
+        rc, opening_serial_port_set = self._db.get_opening_serial_port()
+        if rc != RcCode.SUCCESS:
+            return rc
+        current_time = time.monotonic()
+        for serial_port_id in list(opening_serial_port_set):
+            rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+            if rc != RcCode.SUCCESS:
+                return rc
+            if current_time < serial_port_dict["open_deadline"]:
+                continue
+            rc = self._open_serial_port(serial_port_id)
+            if rc != RcCode.SUCCESS:
+                return rc
+        return RcCode.SUCCESS
+
     def _process_server_socket_event(self, msg, pending_connection):
+        # The reply is sent by the codec which the request uses
+        rc, codec, msg_dict = msg_decode(msg)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Invalid request format.", rc=rc))
+            return rc
         request = RequestMsg()
-        rc = request.deserialize(msg)
+        rc = request.set_msg(msg_dict)
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("Invalid request format.", rc=rc))
@@ -821,7 +1045,7 @@ class ConsolerServerHandler(multiprocessing.Process):
 
         match request.request:
             case ConsoleServerEvent.CONNECT_SERIAL_PORT:
-                rc = self._connect_serial_port(pending_connection, request)
+                rc = self._connect_serial_port(pending_connection, request, codec)
                 if rc != RcCode.SUCCESS:
                     return rc
             case _:
@@ -874,22 +1098,49 @@ class ConsolerServerHandler(multiprocessing.Process):
             return RcCode.SUCCESS
 
         # If the socket receive the data successful but no data can be processed, it means that socket has been closed
-        if data == "":
+        if data == b"":
             self._logger.info(self._logger_system.set_logger_rc_code("Client socket has been closed", rc=rc))
             rc_reply_msg = self._close_pending_connection(pending_connection)
             if rc_reply_msg != RcCode.SUCCESS:
                 return rc_reply_msg
             return RcCode.SUCCESS
 
-        # Send the data to serial port
-        rc = self._process_server_socket_event(data.decode('utf-8'), pending_connection)
+        # Wait until the request arrives completely
+        socket_fd = pending_connection.uds_client_socket_fd_get()
+        rc, frame_decoder = self._db.get_pending_connection_frame_decoder(socket_fd)
+        if rc != RcCode.SUCCESS:
+            return rc
+        frame_decoder.feed(data)
+        rc, frame = frame_decoder.get_frame()
+        if rc == RcCode.DATA_NOT_READY:
+            return RcCode.SUCCESS
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Invalid frame from the client.", rc=rc))
+            return self._close_pending_connection(pending_connection)
+
+        # The data following the request is the input of the serial port
+        rc, remaining_data = frame_decoder.pop_remaining_data()
+        if rc != RcCode.SUCCESS:
+            return rc
+        rc = self._process_server_socket_event(frame, pending_connection)
         if rc != RcCode.SUCCESS:
             rc_reply_msg = self._close_pending_connection(pending_connection)
             if rc_reply_msg != RcCode.SUCCESS:
                 return rc_reply_msg
+            return RcCode.SUCCESS
+        if remaining_data:
+            return self._forward_client_data(socket_fd, remaining_data)
         return RcCode.SUCCESS
 
-    def process_server_socket_event(self):
+    def _forward_client_data(self, socket_fd, data):
+        rc, client_socket_dict = self._db.get_client_socket()
+        if rc != RcCode.SUCCESS:
+            return rc
+        if socket_fd not in client_socket_dict:
+            return RcCode.SUCCESS
+        return self._socket_data_handle(client_socket_dict[socket_fd]["serial_port_id"], data)
+
+    def process_server_socket_event(self, socket_fd, event):
         # Get the server socket
         rc, server_socket_obj = self._db.get_server_socket()
         if rc != RcCode.SUCCESS:
@@ -897,38 +1148,22 @@ class ConsolerServerHandler(multiprocessing.Process):
                 self._logger_system.set_logger_rc_code("Can not get the server socket.", rc=rc))
             return rc
 
-        # Get the server EPOLL
-        rc, server_socket_epoll = self._db.get_server_epoll()
-        if rc != RcCode.SUCCESS:
-            self._logger.error(
-                self._logger_system.set_logger_rc_code("Can not get the server socket epoll.", rc=rc))
-            return rc
+        if socket_fd == server_socket_obj.uds_server_socket_fd_get():
+            return self._accept_new_client(server_socket_obj)
 
         # Get the pending connection
-        rc, pending_connection_dict = self._db.get_pending_connections()
+        rc, pending_connection = self._db.get_pending_connections(socket_fd)
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("Can not get the pending connection.", rc=rc))
             return rc
-
-        # Receive the socket event
-        events = server_socket_epoll.poll(self._processing_time)
-        for socket_fd, event in events:
-            if socket_fd == server_socket_obj.uds_server_socket_fd_get():
-                rc = self._accept_new_client(server_socket_obj)
-                if rc != RcCode.SUCCESS:
-                    return rc
-            elif socket_fd in pending_connection_dict and event & select.EPOLLIN:
-                rc = self._handle_server_socket_data(pending_connection_dict[socket_fd])
-                if rc != RcCode.SUCCESS:
-                    return rc
+        if event & (select.EPOLLIN | select.EPOLLHUP | select.EPOLLERR):
+            return self._handle_server_socket_data(pending_connection)
         return RcCode.SUCCESS
 
-    def _handle_client_socket_data(self, client_socket_obj, serial_port_id):
-        self._logger.info("The new data has arrived.")
-
+    def _handle_client_socket_data(self, client_socket_obj, serial_port_id, max_size):
         # Receive the data from the socket
-        rc, data = client_socket_obj.uds_client_socket_recv(MAX_MSG_SIZE)
+        rc, data = client_socket_obj.uds_client_socket_recv(max_size)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not receive the data from the socket", rc=rc))
             rc = self._close_client_socket(serial_port_id, client_socket_obj)
@@ -952,154 +1187,571 @@ class ConsolerServerHandler(multiprocessing.Process):
                 return rc
         return RcCode.SUCCESS
 
-    def process_client_socket_data(self):
+    def process_client_socket_data(self, socket_fd, event):
         rc, client_socket_dict = self._db.get_client_socket()
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("Can not get the client socket.", rc=rc))
             return rc
-        
-        rc, client_socket_epoll = self._db.get_client_epoll()
+
+        # The client socket can accept more queued data
+        if socket_fd in client_socket_dict and event & select.EPOLLOUT:
+            rc = self._flush_client_output(client_socket_dict[socket_fd]["serial_port_id"], socket_fd)
+            if rc != RcCode.SUCCESS:
+                return rc
+
+        if socket_fd in client_socket_dict and event & (select.EPOLLIN | select.EPOLLHUP | select.EPOLLERR):
+            serial_port_id = client_socket_dict[socket_fd]["serial_port_id"]
+            uds_client_socket_obj = client_socket_dict[socket_fd]["socket_obj"]
+
+            # Only read the data which the TX queue of the serial port can hold. The data of a closing socket is
+            # still read so that the socket can be closed.
+            rc, tx_free_size = self._get_serial_port_tx_free_size(serial_port_id)
+            if rc != RcCode.SUCCESS:
+                return rc
+            if tx_free_size <= 0 and not event & (select.EPOLLHUP | select.EPOLLERR):
+                return self._pause_serial_port_input(serial_port_id, True)
+
+            rc = self._handle_client_socket_data(
+                uds_client_socket_obj, serial_port_id, min(MAX_MSG_SIZE, tx_free_size) if tx_free_size > 0 else MAX_MSG_SIZE)
+            if rc != RcCode.SUCCESS:
+                return rc
+        return RcCode.SUCCESS
+
+    def _get_serial_port_tx_free_size(self, serial_port_id):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
         if rc != RcCode.SUCCESS:
             self._logger.error(
-                self._logger_system.set_logger_rc_code("Can not get the client socket epoll.", rc=rc))
+                self._logger_system.set_logger_rc_code("Can not get the serial port {}".format(serial_port_id), rc=rc))
+            return rc, 0
+        return RcCode.SUCCESS, serial_port_dict["tx_limit"] - serial_port_dict["tx_size"]
+
+    def _pause_serial_port_input(self, serial_port_id, pause):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
             return rc
-        
-        events = client_socket_epoll.poll(0.01)
-        for socket_fd, event in events:
-            if socket_fd in client_socket_dict and event & select.EPOLLIN:
-                serial_port_id = client_socket_dict[socket_fd]["serial_port_id"]
-                uds_client_socket_obj = client_socket_dict[socket_fd]["socket_obj"]
 
-                rc = self._handle_client_socket_data(uds_client_socket_obj, serial_port_id)
-                if rc != RcCode.SUCCESS:
-                    return rc
+        # Stop reading from the clients of the serial port until the TX queue has the space
+        for socket_fd in serial_port_dict["fd_dict"]:
+            rc = self._db.set_client_socket_input_monitor(socket_fd, not pause)
+            if rc != RcCode.SUCCESS:
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code(
+                        "Can not change the input monitor of the client of serial port {}.".format(serial_port_id), rc=rc))
+                return rc
+        serial_port_dict["input_paused"] = pause
         return RcCode.SUCCESS
     
     ##########################################################################################################
     # Process Client Socket Data Relate API
     ##########################################################################################################
     
-    def _handle_serial_port_data(self, serial_port_id, socket_dict,  msg):
-        for socket_fd in socket_dict:
-            rc = socket_dict[socket_fd].uds_client_socket_send(msg)
-            if rc != RcCode.SUCCESS:
-                rc, socket_fd = socket_dict[socket_fd].uds_client_socket_fd_get()
-                if rc != RcCode.SUCCESS:
-                    return rc
-                rc = self._close_client_socket(serial_port_id, socket_dict[socket_fd])
+    def _drop_client_output(self, serial_port_id, client_socket_dict, msg):
+        output_queue = client_socket_dict["output_queue"]
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc, None
+        port_counters = serial_port_dict["counters"]
+        client_counters = client_socket_dict["counters"]
+
+        dropped_bytes = 0
+        dropped_chunks = 0
+        match self._slow_consumer_policy:
+            case SlowConsumerPolicy.COALESCE:
+                # Merge the pending data into a single chunk which keeps the latest output only
+                data = b"".join(output_queue) + msg
+                msg = data[-self._client_output_limit:]
+                dropped_bytes = len(data) - len(msg)
+                output_queue.clear()
+                client_socket_dict["output_size"] = 0
+                client_counters["coalesced"] += 1
+                port_counters["coalesced"] += 1
+            case _:
+                # Drop the oldest chunks until the new data can be queued
+                while output_queue and client_socket_dict["output_size"] + len(msg) > self._client_output_limit:
+                    chunk = output_queue.popleft()
+                    client_socket_dict["output_size"] -= len(chunk)
+                    dropped_bytes += len(chunk)
+                    dropped_chunks += 1
+                if len(msg) > self._client_output_limit:
+                    dropped_bytes += len(msg) - self._client_output_limit
+                    msg = msg[-self._client_output_limit:]
+        client_counters["dropped_bytes"] += dropped_bytes
+        client_counters["dropped_chunks"] += dropped_chunks
+        port_counters["dropped_bytes"] += dropped_bytes
+        port_counters["dropped_chunks"] += dropped_chunks
+        return RcCode.SUCCESS, msg
+
+    def _queue_client_output(self, serial_port_id, socket_fd, msg):
+        rc, client_socket_dict = self._db.get_client_socket()
+        if rc != RcCode.SUCCESS:
+            return rc
+        if socket_fd not in client_socket_dict:
+            return RcCode.SUCCESS
+        client_socket_dict = client_socket_dict[socket_fd]
+
+        # Apply the slow consumer policy if the client can not consume the data in time
+        if client_socket_dict["output_size"] + len(msg) > self._client_output_limit:
+            if self._slow_consumer_policy == SlowConsumerPolicy.DISCONNECT:
+                self._logger.warning(
+                    self._logger_system.set_logger_rc_code(
+                        "Disconnect the slow client of serial port {}.".format(serial_port_id)))
+                rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
                 if rc != RcCode.SUCCESS:
                     return rc
+                serial_port_dict["counters"]["slow_consumer_disconnects"] += 1
+                return self._close_client_socket(serial_port_id, client_socket_dict["socket_obj"])
+            rc, msg = self._drop_client_output(serial_port_id, client_socket_dict, msg)
+            if rc != RcCode.SUCCESS:
+                return rc
+
+        client_socket_dict["output_queue"].append(msg)
+        client_socket_dict["output_size"] += len(msg)
+        return RcCode.SUCCESS
+
+    def _flush_client_output(self, serial_port_id, socket_fd):
+        rc, client_socket_dict = self._db.get_client_socket()
+        if rc != RcCode.SUCCESS:
+            return rc
+        if socket_fd not in client_socket_dict:
+            return RcCode.SUCCESS
+        client_socket_dict = client_socket_dict[socket_fd]
+        client_socket_obj = client_socket_dict["socket_obj"]
+        output_queue = client_socket_dict["output_queue"]
+
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # Send the queued data until the socket buffer is full
+        while output_queue:
+            chunk = output_queue[0]
+            rc, size = client_socket_obj.uds_client_socket_send_nonblocking(chunk)
+            if rc == RcCode.DATA_NOT_READY:
+                break
+            if rc != RcCode.SUCCESS:
+                self._logger.warning(
+                    self._logger_system.set_logger_rc_code(
+                        "Can not send the data of serial port {} to the client.".format(serial_port_id), rc=rc))
+                return self._close_client_socket(serial_port_id, client_socket_obj)
+            client_socket_dict["output_size"] -= size
+            client_socket_dict["counters"]["sent_bytes"] += size
+            serial_port_dict["counters"]["sent_bytes"] += size
+            if size < len(chunk):
+                output_queue[0] = memoryview(chunk)[size:]
+                break
+            output_queue.popleft()
+
+        # Wait for EPOLLOUT only when some data is still queued
+        return self._db.set_client_socket_output_monitor(socket_fd, len(output_queue) > 0)
+
+    def _handle_serial_port_data(self, serial_port_id, socket_dict,  msg):
+        # The client may be disconnected while the data is queued, so iterate over a copy of the fd
+        for socket_fd in list(socket_dict):
+            rc = self._queue_client_output(serial_port_id, socket_fd, msg)
+            if rc != RcCode.SUCCESS:
+                return rc
+            rc = self._flush_client_output(serial_port_id, socket_fd)
+            if rc != RcCode.SUCCESS:
+                return rc
         return RcCode.SUCCESS
     
     def _socket_data_handle(self, serial_port_id, msg):
-        # Send the data to serial port
         rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("Can not get the serial port object".format(serial_port_id), rc=rc))
             return rc
+
+        # The data is not sent if the serial port is not monitored
+        if serial_port_dict["serial_port_fd"] == -1:
+            serial_port_dict["counters"]["tx_dropped_bytes"] += len(msg)
+            return RcCode.SUCCESS
+
+        # Queue the data for the serial port. The data over the limit is only read from a closing socket.
+        tx_free_size = serial_port_dict["tx_limit"] - serial_port_dict["tx_size"]
+        if len(msg) > tx_free_size:
+            serial_port_dict["counters"]["tx_dropped_bytes"] += len(msg) - max(tx_free_size, 0)
+            msg = msg[:max(tx_free_size, 0)]
+        if msg:
+            serial_port_dict["tx_queue"].append(msg)
+            serial_port_dict["tx_size"] += len(msg)
+        return self._flush_serial_port_output(serial_port_id)
+
+    def _flush_serial_port_output(self, serial_port_id):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
         serial_port_obj = serial_port_dict["serial_port_obj"]
-        
-        # If serial port is busy, drop this data
-        rc, status = serial_port_obj.output_buffer_is_waiting() if not TEST_MODE else (RcCode.SUCCESS, False)
+        tx_queue = serial_port_dict["tx_queue"]
+        tx_pacing = serial_port_dict["tx_pacing"]
+
+        # The paced serial port is written again when its time slot arrives
+        current_time = time.monotonic()
+        if tx_pacing and current_time < serial_port_dict["tx_next_time"]:
+            return self._db.set_serial_port_output_monitor(serial_port_id, False)
+
+        is_tty_full = False
+        while tx_queue:
+            if tx_pacing:
+                data = tx_queue[0][:SERIAL_PORT_TX_PACE_CHUNK_SIZE]
+            else:
+                data = self._get_serial_port_tx_batch(tx_queue)
+            rc, size = serial_port_obj.write_com_port_data(data)
+            if rc == RcCode.DATA_NOT_READY:
+                is_tty_full = True
+                break
+            if rc != RcCode.SUCCESS:
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code(
+                        "Serial port {} can not write the data.".format(serial_port_id), rc=rc))
+                return self._handle_serial_port_error(serial_port_id)
+            serial_port_dict["tx_size"] -= size
+            serial_port_dict["counters"]["tx_bytes"] += size
+
+            # Remove the written data from the queue
+            written_size = size
+            while written_size > 0:
+                if written_size < len(tx_queue[0]):
+                    tx_queue[0] = tx_queue[0][written_size:]
+                    break
+                written_size -= len(tx_queue[0])
+                tx_queue.popleft()
+
+            if tx_pacing:
+                # Wait for the time which the written data takes on the line
+                rc, baud_rate = serial_port_obj.get_com_port_baud_rate()
+                if rc != RcCode.SUCCESS:
+                    return rc
+                serial_port_dict["tx_next_time"] = current_time + size * 10 / baud_rate
+                break
+
+        # Wait for the tty to be writable only when data is still queued and no pace is waited. The full tty is waited
+        # by EPOLLOUT instead of the time slot, otherwise the expired time slot wakes up the poll at once.
+        is_paced = tx_pacing and len(tx_queue) > 0 and not is_tty_full
+        rc = self._db.add_paced_serial_port(serial_port_id) if is_paced else self._db.del_paced_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+        rc = self._db.set_serial_port_output_monitor(serial_port_id, len(tx_queue) > 0 and not is_paced)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # Resume reading from the clients if the TX queue has the space
+        if serial_port_dict["input_paused"] and serial_port_dict["tx_size"] < serial_port_dict["tx_limit"]:
+            return self._pause_serial_port_input(serial_port_id, False)
+        return RcCode.SUCCESS
+
+    @staticmethod
+    def _get_serial_port_tx_batch(tx_queue):
+        # Merge the small chunks, e.g. the keystrokes, so that they are written by a single system call
+        if len(tx_queue) == 1 or len(tx_queue[0]) >= SERIAL_PORT_TX_BATCH_SIZE:
+            return tx_queue[0]
+        batch = []
+        batch_size = 0
+        for chunk in tx_queue:
+            if batch_size + len(chunk) > SERIAL_PORT_TX_BATCH_SIZE:
+                break
+            batch.append(chunk)
+            batch_size += len(chunk)
+        return b"".join(batch)
+
+    def _handle_serial_port_error(self, serial_port_id):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # The tty has gone away. Stop monitoring it until the port is opened again.
+        rc = serial_port_dict["serial_port_obj"].set_com_port_error()
+        if rc != RcCode.SUCCESS:
+            return rc
+        if serial_port_dict["serial_port_fd"] != -1:
+            rc = self._db.del_serial_port_fd(serial_port_id)
+            if rc != RcCode.SUCCESS:
+                return rc
+
+        # Send the data which has been read, and discard the data which can not be written
+        rc = self._send_serial_port_data(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+        rc = self._discard_serial_port_output(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # Open the port again after a while, e.g. the USB adapter is re-plugged. The port is retried even if no session
+        # is attached, so the scrollback keeps the output until a session is attached.
+        rc, delay = serial_port_dict["serial_port_obj"].set_com_port_backoff()
+        if rc != RcCode.SUCCESS:
+            return rc
+        return self._schedule_serial_port_open(serial_port_id, delay)
+
+    def _discard_serial_port_output(self, serial_port_id):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+        serial_port_dict["counters"]["tx_dropped_bytes"] += serial_port_dict["tx_size"]
+        serial_port_dict["tx_queue"].clear()
+        serial_port_dict["tx_size"] = 0
+
+        rc = self._db.del_paced_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+        rc = self._db.set_serial_port_output_monitor(serial_port_id, False)
+        if rc != RcCode.SUCCESS:
+            return rc
+        if serial_port_dict["input_paused"]:
+            return self._pause_serial_port_input(serial_port_id, False)
+        return RcCode.SUCCESS
+
+    def process_paced_serial_port(self):
+        rc, paced_serial_port_set = self._db.get_paced_serial_port()
+        if rc != RcCode.SUCCESS:
+            return rc
+        for serial_port_id in list(paced_serial_port_set):
+            rc = self._flush_serial_port_output(serial_port_id)
+            if rc != RcCode.SUCCESS:
+                return rc
+        return RcCode.SUCCESS
+
+    def _get_poll_timeout(self):
+        # Do not block if some serial ports still have the data to be read
+        rc, ready_count = self._db.get_ready_serial_port_count()
+        if rc != RcCode.SUCCESS:
+            return rc, 0
+        if ready_count:
+            return RcCode.SUCCESS, 0
+
+        # Wake up when the next paced serial port can be written, the coalesced data has to be sent or the failed serial
+        # port has to be opened again
+        rc, paced_serial_port_set = self._db.get_paced_serial_port()
+        if rc != RcCode.SUCCESS:
+            return rc, 0
+        rc, coalescing_serial_port_set = self._db.get_coalescing_serial_port()
+        if rc != RcCode.SUCCESS:
+            return rc, 0
+        rc, opening_serial_port_set = self._db.get_opening_serial_port()
+        if rc != RcCode.SUCCESS:
+            return rc, 0
+        poll_timeout = self._poll_timeout
+        current_time = time.monotonic()
+        for serial_port_set, deadline_key in ((paced_serial_port_set, "tx_next_time"),
+                                              (coalescing_serial_port_set, "rx_deadline"),
+                                              (opening_serial_port_set, "open_deadline")):
+            for serial_port_id in serial_port_set:
+                rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+                if rc != RcCode.SUCCESS:
+                    return rc, 0
+                timeout = max(serial_port_dict[deadline_key] - current_time, 0)
+                poll_timeout = timeout if poll_timeout < 0 else min(poll_timeout, timeout)
+        return RcCode.SUCCESS, poll_timeout
+
+    def _read_serial_port_data(self, serial_port_id):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not get the serial port {}".format(serial_port_id), rc=rc))
+            return rc, 0
+        serial_port_obj = serial_port_dict["serial_port_obj"]
+        rx_buffer = serial_port_dict["rx_buffer"]
+        rx_pending = serial_port_dict["rx_pending"]
+
+        # The serial port may have been hung up after it has been scheduled
+        if serial_port_dict["serial_port_fd"] == -1:
+            return RcCode.SUCCESS, 0
+
+        # receive the data from serial port
+        rc, read_size = serial_port_obj.read_com_port_data(rx_buffer)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Serial port {} can not read the data.".format(serial_port_id), rc=rc))
+            return self._handle_serial_port_error(serial_port_id), 0
+        if read_size == 0:
+            return RcCode.SUCCESS, 0
+
+        # Hold the data for the coalescing window so that the consecutive chunks are sent to the clients together
+        if not rx_pending:
+            serial_port_dict["rx_deadline"] = time.monotonic() + self._serial_rx_coalesce_window
+        rx_pending += memoryview(rx_buffer)[:read_size]
+        if len(rx_pending) >= len(rx_buffer) or self._serial_rx_coalesce_window <= 0:
+            rc = self._send_serial_port_data(serial_port_id)
+        else:
+            rc = self._db.add_coalescing_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc, 0
+        return RcCode.SUCCESS, read_size
+
+    def _send_serial_port_data(self, serial_port_id):
+        rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
         if rc != RcCode.SUCCESS:
             self._logger.error(
-                self._logger_system.set_logger_rc_code("Serial port {} is busy.".format(serial_port_id), rc=rc))
+                self._logger_system.set_logger_rc_code("Can not get the serial port {}".format(serial_port_id), rc=rc))
             return rc
-        if status:
+        rc = self._db.del_coalescing_serial_port(serial_port_id)
+        if rc != RcCode.SUCCESS:
+            return rc
+        if not serial_port_dict["rx_pending"]:
             return RcCode.SUCCESS
-        
-        # Send the data to serial port
-        rc = serial_port_obj.write_com_port_data(msg) if not TEST_MODE else RcCode.SUCCESS
+        msg = bytes(serial_port_dict["rx_pending"])
+        serial_port_dict["rx_pending"].clear()
+
+        # Keep the data so that it can be replayed to the session attached later
+        rc = serial_port_dict["scrollback"].write(msg)
         if rc != RcCode.SUCCESS:
             self._logger.error(
                 self._logger_system.set_logger_rc_code(
-                    "Serial port {} can not write the data.".format(serial_port_id), rc=rc))
+                    "Can not keep the data of serial port {} in the scrollback.".format(serial_port_id), rc=rc))
             return rc
-        return RcCode.SUCCESS
-    
-    def process_serial_port_data(self):
-        rc, serial_port_dict = self._db.get_serial_port_info()
+
+        rc = self._handle_serial_port_data(serial_port_id, serial_port_dict["fd_dict"], msg)
         if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "Can not broadcast the data reading from the serial port {} to client socket".format(serial_port_id), rc=rc))
             return rc
-        
-        for serial_port_id in serial_port_dict:
-            serial_port_obj = serial_port_dict[serial_port_id]["serial_port_obj"]
+        return RcCode.SUCCESS
 
-            # If serial port is closed, get the next serial port
-            rc, status = serial_port_obj.is_open_com_port()
+    def process_coalescing_serial_port(self):
+        rc, coalescing_serial_port_set = self._db.get_coalescing_serial_port()
+        if rc != RcCode.SUCCESS:
+            return rc
+        current_time = time.monotonic()
+        for serial_port_id in list(coalescing_serial_port_set):
+            rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
             if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Can not get serial port {} status".format(serial_port_id), rc=rc))
                 return rc
-            if not status:
-                return RcCode.SUCCESS
-        
-            # If serial port is busy, drop this data
-            rc, status = serial_port_obj.in_buffer_is_waiting()
+            if current_time < serial_port_dict["rx_deadline"]:
+                continue
+            rc = self._send_serial_port_data(serial_port_id)
             if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Serial port {} has not data.".format(serial_port_id), rc=rc))
                 return rc
-            if not status:
-                return RcCode.SUCCESS
-            
-            # receive the data to serial port
-            rc, msg = serial_port_obj.read_com_port_data()
+        return RcCode.SUCCESS
+
+    def process_serial_port_data(self, serial_port_fd, event):
+        rc, serial_port_id = self._db.get_serial_port_by_fd(serial_port_fd)
+        if rc != RcCode.SUCCESS:
+            return RcCode.SUCCESS
+
+        if event & (select.EPOLLERR | select.EPOLLHUP):
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Serial port {} is hung up.".format(serial_port_id)))
+            return self._handle_serial_port_error(serial_port_id)
+
+        # The tty can accept more queued data
+        if event & select.EPOLLOUT:
+            rc = self._flush_serial_port_output(serial_port_id)
             if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Serial port {} can not write the data.".format(serial_port_id), rc=rc))
                 return rc
-            
-            rc = self._handle_serial_port_data(serial_port_id, serial_port_dict[serial_port_id]["fd_dict"], msg)
+
+        # Schedule the serial port. It is read when the ready serial ports are served.
+        if event & select.EPOLLIN:
+            return self._db.add_ready_serial_port(serial_port_id)
+        return RcCode.SUCCESS
+
+    def process_ready_serial_port(self):
+        rc, ready_count = self._db.get_ready_serial_port_count()
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        # Serve each ready serial port once in round-robin order. A serial port which fills up its read buffer may have
+        # more data, so it is scheduled again behind the other ready serial ports.
+        for _ in range(ready_count):
+            rc, serial_port_id = self._db.pop_ready_serial_port()
+            if rc != RcCode.SUCCESS:
+                break
+            rc, serial_port_dict = self._db.get_serial_port(serial_port_id)
+            if rc != RcCode.SUCCESS:
+                return rc
+            rc, read_size = self._read_serial_port_data(serial_port_id)
             if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Can not broadcast the data reading from the serial port {} to client socket".format(serial_port_id), rc=rc))
                 return rc
+            if read_size >= len(serial_port_dict["rx_buffer"]):
+                rc = self._db.add_ready_serial_port(serial_port_id)
+                if rc != RcCode.SUCCESS:
+                    return rc
         return RcCode.SUCCESS
     
     ##########################################################################################################
     # Daemon Relate API
     ##########################################################################################################
     
-    def run(self):
-        rc = self.init_console_server_handler()
+    def process_handler_event(self):
+        rc, handler_epoll = self._db.get_handler_epoll()
         if rc != RcCode.SUCCESS:
-            return
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not get the handler epoll.", rc=rc))
+            return rc
 
-        while self._is_server_running:
-            rc = self.process_server_socket_event()
+        rc, poll_timeout = self._get_poll_timeout()
+        if rc != RcCode.SUCCESS:
+            return rc
+        events = handler_epoll.poll(poll_timeout)
+        for fd, event in events:
+            # The fd may have been closed when the previous event was processed
+            rc, fd_type = self._db.get_fd_type(fd)
             if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Process data reading from server socket failed.", rc=rc))
-                break
+                continue
+
+            match fd_type:
+                case HandlerFdType.SERVER_SOCKET | HandlerFdType.PENDING_CONNECTION:
+                    rc = self.process_server_socket_event(fd, event)
+                    if rc != RcCode.SUCCESS:
+                        self._logger.error(
+                            self._logger_system.set_logger_rc_code(
+                                "Process data reading from server socket failed.", rc=rc))
+                        return rc
+                case HandlerFdType.MESSAGE_QUEUE:
+                    rc = self.process_message_queue_data()
+                    if rc != RcCode.SUCCESS:
+                        self._logger.error(
+                            self._logger_system.set_logger_rc_code(
+                                "Process data reading from message queue failed.", rc=rc))
+                        return rc
+                case HandlerFdType.CLIENT_SOCKET:
+                    rc = self.process_client_socket_data(fd, event)
+                    if rc != RcCode.SUCCESS:
+                        self._logger.error(
+                            self._logger_system.set_logger_rc_code(
+                                "Process data reading from client socket failed.", rc=rc))
+                        return rc
+                case HandlerFdType.SERIAL_PORT:
+                    rc = self.process_serial_port_data(fd, event)
+                    if rc != RcCode.SUCCESS:
+                        self._logger.error(
+                            self._logger_system.set_logger_rc_code(
+                                "Process data reading from serial port failed.", rc=rc))
+                        return rc
+
+        rc = self.process_ready_serial_port()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Process data reading from serial port failed.", rc=rc))
+            return rc
 
-            start_time = time.perf_counter()
-            rc = self.process_message_queue_data()
-            if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Process data reading from message queue failed.", rc=rc))
-                break
+        rc = self.process_coalescing_serial_port()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Process data reading from serial port failed.", rc=rc))
+            return rc
 
-            rc = self.process_client_socket_data()
-            if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Process data reading from client socket failed.", rc=rc))
-                break
+        rc = self.process_paced_serial_port()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Process data writing to serial port failed.", rc=rc))
+            return rc
+
+        rc = self.process_opening_serial_port()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Process opening serial port failed.", rc=rc))
+            return rc
+        return RcCode.SUCCESS
 
-            rc = self.process_serial_port_data()
+    def run(self):
+        rc = self.init_console_server_handler()
+        if rc != RcCode.SUCCESS:
+            return
+
+        while self._is_server_running:
+            rc = self.process_handler_event()
             if rc != RcCode.SUCCESS:
-                self._logger.error(
-                    self._logger_system.set_logger_rc_code(
-                        "Process data reading from serial port failed.", rc=rc))
                 break
-            end_time = time.perf_counter()
-            self._processing_time = end_time - start_time
@@ -1,8 +1,11 @@
+import logging
 import os
 import time
 from serial import Serial, SerialException
 
 from src.common.rc_code import RcCode
+from src.console_server.processing.console_server_definition import SerialPortState, SERIAL_PORT_OPEN_BACKOFF_MIN, \
+    SERIAL_PORT_OPEN_BACKOFF_MAX
 
 
 class ConsoleServerSerialPort:
@@ -17,6 +20,16 @@ class ConsoleServerSerialPort:
         self._current_user = 0
         self._serial_port_description = ""
 
+        # The state of the port is tracked here so that it can be checked without accessing the tty
+        self._port_state = SerialPortState.CLOSED
+        self._com_port_fd = -1
+        self._open_failure_count = 0
+
+        # Count the system calls issued to the tty
+        self._syscall_counter_dict = {"open": 0, "close": 0, "read": 0, "write": 0, "ioctl": 0}
+        self._syscall_snapshot_dict = dict(self._syscall_counter_dict)
+        self._syscall_snapshot_time = time.monotonic()
+
     def __del__(self):
         self.close_com_port()
 
@@ -33,11 +46,52 @@ class ConsoleServerSerialPort:
         }
         return RcCode.SUCCESS
 
+    def _set_com_port_state(self, state):
+        if self._port_state != state:
+            self._logger.info(
+                self._logger_system.set_logger_rc_code(
+                    "The serial port {} state changes from {} to {}".format(self._serial_port_id, self._port_state, state)))
+        self._port_state = state
+        if state == SerialPortState.OPEN:
+            self._com_port_fd = self._serial_config["com_port"].fileno()
+        else:
+            self._com_port_fd = -1
+
+    def set_com_port_error(self):
+        self._set_com_port_state(SerialPortState.ERROR)
+        return RcCode.SUCCESS
+
+    def get_com_port_state(self):
+        return RcCode.SUCCESS, self._port_state
+
+    def set_com_port_opening(self):
+        # The port is waiting for the event loop to open it
+        if self._port_state == SerialPortState.OPEN:
+            return RcCode.FAILURE
+        self._set_com_port_state(SerialPortState.OPENING)
+        return RcCode.SUCCESS
+
+    def set_com_port_backoff(self):
+        # Wait longer after each consecutive failure so that an absent tty is not opened repeatedly
+        delay = min(SERIAL_PORT_OPEN_BACKOFF_MIN * (2 ** self._open_failure_count), SERIAL_PORT_OPEN_BACKOFF_MAX)
+        self._open_failure_count = self._open_failure_count + 1
+        self._set_com_port_state(SerialPortState.BACKOFF)
+        return RcCode.SUCCESS, delay
+
     def open_com_port(self):
         # Port has been open by other user
-        if self._current_user > 0:
+        if self._current_user > 0 and self._port_state == SerialPortState.OPEN:
             return RcCode.SUCCESS
 
+        # The tty has failed. Release it before it is opened again.
+        if self._port_state in (SerialPortState.OPENING, SerialPortState.ERROR, SerialPortState.BACKOFF):
+            try:
+                self._syscall_counter_dict["close"] += 1
+                self._serial_config["com_port"].close()
+            except (OSError, SerialException):
+                pass
+            self._current_user = 0
+
         # Test if the serial exists.
         rc = self.test_com_port_read(self._serial_port_id)
         if rc != RcCode.SUCCESS:
@@ -52,6 +106,7 @@ class ConsoleServerSerialPort:
             self._serial_config["com_port"].port = self._serial_config["dev_port"]
             self._serial_config["com_port"].rts = False
             self._serial_config["com_port"].dtr = False
+            self._syscall_counter_dict["open"] += 1
             self._serial_config["com_port"].open()
         except SerialException as e:
             self._logger.error(
@@ -61,18 +116,18 @@ class ConsoleServerSerialPort:
                     "The dev port path is {}".format(self._serial_config["dev_port"])))
             self._logger.error(
                 self._logger_system.set_logger_rc_code(e))
+            self._set_com_port_state(SerialPortState.ERROR)
             return RcCode.DEVICE_NOT_FOUND
 
-        # Check if serial port has been opened.
-        cnt = 0
-        while not self._serial_config["com_port"].is_open and cnt < 5:
-            time.sleep(1)
-            cnt = cnt + 1
-        if cnt >= 5:
+        # Check if serial port has been opened. The event loop retries the port later if it is not ready.
+        if not self._serial_config["com_port"].is_open:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("The serial port {} is not ready.".format(self._serial_port_id)))
+            self._set_com_port_state(SerialPortState.ERROR)
             return RcCode.FAILURE
         self._current_user = self._current_user + 1
+        self._open_failure_count = 0
+        self._set_com_port_state(SerialPortState.OPEN)
         self._logger.info("Serial port {} is opened.".format(self._serial_port_id))
         return RcCode.SUCCESS
 
@@ -86,6 +141,7 @@ class ConsoleServerSerialPort:
 
         # Close the serial port.
         try:
+            self._syscall_counter_dict["close"] += 1
             self._serial_config["com_port"].close()
             rc = RcCode.SUCCESS
         except OSError:
@@ -93,6 +149,7 @@ class ConsoleServerSerialPort:
                 self._logger_system.set_logger_rc_code("The serial port {} can not close".format(self._serial_port_id)))
             rc = RcCode.DEVICE_NOT_FOUND
         self._current_user = self._current_user - 1
+        self._set_com_port_state(SerialPortState.CLOSED)
         self._logger.info("Serial port {} is cloded.".format(self._serial_port_id))
         return rc
     
@@ -107,6 +164,8 @@ class ConsoleServerSerialPort:
             self._serial_config["com_port"].rts = False
             self._serial_config["com_port"].dtr = False
             self._logger.info(self._serial_config["com_port"])
+            self._syscall_counter_dict["close"] += 1
+            self._syscall_counter_dict["open"] += 1
             self._serial_config["com_port"].open()
             rc = RcCode.SUCCESS
         except SerialException as e:
@@ -117,45 +176,61 @@ class ConsoleServerSerialPort:
                     "The dev port path is {}".format(self._serial_config["dev_port"])))
             self._logger.error(
                 self._logger_system.set_logger_rc_code(e))
+            self._set_com_port_state(SerialPortState.ERROR)
             return RcCode.DEVICE_NOT_FOUND
 
-        # Check if serial port has been opened.
-        cnt = 0
-        while not self._serial_config["com_port"].is_open and cnt < 5:
-            time.sleep(1)
-            cnt = cnt + 1
-        if cnt >= 5:
+        # Check if serial port has been opened. The event loop retries the port later if it is not ready.
+        if not self._serial_config["com_port"].is_open:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("The serial port {} is not ready.".format(self._serial_port_id)))
+            self._set_com_port_state(SerialPortState.ERROR)
             return RcCode.FAILURE
         self._current_user = self._current_user + 1
+        self._open_failure_count = 0
+        self._set_com_port_state(SerialPortState.OPEN)
         return rc
 
-    def read_com_port_data(self, buf_size=1024):
-        data = None
+    def read_com_port_data(self, buffer):
+        # Read the arrived data into the buffer of the caller by a single non-blocking system call
+        self._syscall_counter_dict["read"] += 1
         try:
-            data = self._serial_config["com_port"].read(size=buf_size)
+            size = os.readv(self._com_port_fd, [buffer])
+            rc = RcCode.SUCCESS
+        except BlockingIOError:
+            size = 0
             rc = RcCode.SUCCESS
         except OSError:
             self._logger.warning(
                 self._logger_system.set_logger_rc_code("Can not access serial port {}".format(self._serial_port_id)))
+            self._set_com_port_state(SerialPortState.ERROR)
+            size = 0
             rc = RcCode.FAILURE
-        return rc, data
+        return rc, size
 
     def write_com_port_data(self, data):
+        # The tty is opened in non-blocking mode, so the data is written as much as the kernel buffer can hold.
+        # The UART drains the kernel buffer by itself, so the caller is never blocked by the line rate.
+        self._syscall_counter_dict["write"] += 1
         try:
-            self._logger.info("Write data from {} data {}".format(self._serial_config["dev_port"], data))
-            self._serial_config["com_port"].write(data)
-            self._serial_config["com_port"].flush()
+            size = os.write(self._com_port_fd, data)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(
+                    "Write data to {} data {}".format(self._serial_config["dev_port"], bytes(data[:size])))
             rc = RcCode.SUCCESS
+        except BlockingIOError:
+            size = 0
+            rc = RcCode.DATA_NOT_READY
         except OSError:
             self._logger.warning(
                 self._logger_system.set_logger_rc_code("Can not access serial port {}".format(self._serial_port_id)))
+            self._set_com_port_state(SerialPortState.ERROR)
+            size = 0
             rc = RcCode.FAILURE
-        return rc
+        return rc, size
 
     def in_buffer_is_waiting(self):
         count = 0
+        self._syscall_counter_dict["ioctl"] += 1
         try:
             count = self._serial_config["com_port"].in_waiting
             rc = RcCode.SUCCESS
@@ -167,6 +242,7 @@ class ConsoleServerSerialPort:
 
     def output_buffer_is_waiting(self):
         count = 0
+        self._syscall_counter_dict["ioctl"] += 1
         try:
             count = self._serial_config["com_port"].out_waiting
             rc = RcCode.SUCCESS
@@ -176,16 +252,32 @@ class ConsoleServerSerialPort:
             rc = RcCode.FAILURE
         return rc, True if count else False
 
-    def is_open_com_port(self):
-        try:
-            state = self._serial_config["com_port"].is_open
-            rc = RcCode.SUCCESS
-        except OSError:
+    def get_com_port_fd(self):
+        if self._com_port_fd == -1:
             self._logger.warning(
-                self._logger_system.set_logger_rc_code("Can not access serial port {}".format(self._serial_port_id)))
-            state = False
-            rc = RcCode.FAILURE
-        return rc, state
+                self._logger_system.set_logger_rc_code("Can not get the fd of serial port {}".format(self._serial_port_id)))
+            return RcCode.FAILURE, -1
+        return RcCode.SUCCESS, self._com_port_fd
+
+    def is_open_com_port(self):
+        return RcCode.SUCCESS, self._port_state == SerialPortState.OPEN
+
+    def get_com_port_syscall_counters(self):
+        # The rates are calculated since the previous query
+        current_time = time.monotonic()
+        elapsed_time = current_time - self._syscall_snapshot_time
+        counter_dict = {}
+        for name, count in self._syscall_counter_dict.items():
+            counter_dict[name] = {
+                "total": count,
+                "per_second": round((count - self._syscall_snapshot_dict[name]) / elapsed_time, 2) if elapsed_time > 0 else 0
+            }
+        self._syscall_snapshot_dict = dict(self._syscall_counter_dict)
+        self._syscall_snapshot_time = current_time
+        return RcCode.SUCCESS, counter_dict
+
+    def get_com_port_baud_rate(self):
+        return RcCode.SUCCESS, self._serial_config["baud_rate"]
 
     def set_com_port_baud_rate(self, rate):
         if rate > 230400 or (rate % 1200) != 0:
@@ -2,6 +2,7 @@ import os
 import time
 
 from src.common.msg import SetAliasNameRequest, SetBaudRateRequest, ConnectSerialPortRequest, GetPortConfigRequest, ReplyMsg, RequestMsg
+from src.common.msg_codec import MsgCodec, msg_decode, msg_encode
 from src.common.rc_code import RcCode
 from src.common.uds_lib import UnixDomainClientSocket
 from src.console_server.processing.console_server_definition import ConsoleServerEvent
@@ -12,6 +13,10 @@ from src.server_control.server_control_menu import SERVER_CONTROL_ALIAS_NAME_PRO
     SERVER_CONTROL_USER_CONFIG_PROMPT, server_control_port_config_menu
 
 
+# The seconds between two synchronizations of the port config in the port menus
+SERVER_CONTROL_SYNC_INTERVAL = 10
+
+
 class ServerControlMode:
     MAX_BUFFER_SIZE = 1024
     def __init__(self, trans_func_dict, logger_system):
@@ -19,6 +24,8 @@ class ServerControlMode:
         self._tx_func = self._trans_func_dict["tx_func"]
         self._rx_func = self._trans_func_dict["rx_func"]
         self._rx_ready_func = self._trans_func_dict["rx_ready_func"]
+        # The frontend which watches the event fds on another thread stops watching the fd before it is closed
+        self._event_fd_release_func = self._trans_func_dict.get("event_fd_release_func")
         self._logger_system = logger_system
 
         self._logger = self._logger_system.get_logger()
@@ -92,13 +99,31 @@ class ServerControlMode:
         self._tx_func(self._server_prompt)
         return RcCode.SUCCESS
 
+    def get_event_fd_list(self):
+        # The file descriptors, except the SSH channel, whose data has to be processed by the mode
+        return []
+
+    def get_wait_timeout(self):
+        # The seconds until the mode has to run without any input. None means that the mode only waits for the input.
+        return None
+
+    def _release_event_fd(self, fd):
+        if self._event_fd_release_func is not None and fd >= 0:
+            self._event_fd_release_func(fd)
+
     def _send_uds_socket_request_data(self, client_socket_obj, request):
-        rc, request_str = request.serialize()
+        # The servers reply by the same codec, so the compact binary codec is used
+        rc, msg_dict = request.get_msg()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not convert request to the dictionary.", rc=rc))
+            return rc
+        rc, request_byte = msg_encode(msg_dict, MsgCodec.BINARY)
         if rc != RcCode.SUCCESS:
             self._logger.error(
-                self._logger_system.set_logger_rc_code("Can not convert request to string."), rc=rc)
+                self._logger_system.set_logger_rc_code("Can not convert request to bytes.", rc=rc))
             return rc
-        rc = client_socket_obj.uds_client_socket_send(request_str)
+        rc = client_socket_obj.uds_client_socket_send_frame(request_byte)
         if rc != RcCode.SUCCESS:
             self._logger.warning(self._logger_system.set_logger_rc_code("Can not send the message to server."))
             return rc
@@ -106,34 +131,25 @@ class ServerControlMode:
 
     def _receive_uds_socket_reply_data(self, client_socket_obj, request_msg):
         # Receive the reply for the message
-        rc, data = client_socket_obj.uds_client_socket_recv(4)
+        rc, data_byte = client_socket_obj.uds_client_socket_recv_frame()
         if rc == RcCode.DATA_NOT_READY:
             return RcCode.SUCCESS, None
         if rc != RcCode.SUCCESS:
             self._logger.error(
-                self._logger_system.set_logger_rc_code("Can not receive the data size.", rc=rc))
+                self._logger_system.set_logger_rc_code("Can not receive the reply.", rc=rc))
             return rc, None
-        receive_size = int.from_bytes(data, byteorder='little')
-
-        # Receive the server reply
-        data_str = ""
-        while receive_size > 0:
-            rc, reply_str = client_socket_obj.uds_client_socket_recv(receive_size)
-            if rc == RcCode.DATA_NOT_READY:
-                continue
-            elif rc != RcCode.SUCCESS:
-                self._logger.error(self._logger_system.set_logger_rc_code("Can not send the message to server."))
-                return rc, None
-            if reply_str == b"":
-                self._logger.warning(self._logger_system.set_logger_rc_code("Socket has closed."))
-                client_socket_obj.uds_client_socket_close()
-                return RcCode.EXIT_MENU, None
-            data_str = data_str + reply_str.decode('utf-8')
-            receive_size = receive_size - len(data_str)
+        if data_byte == b"":
+            self._logger.warning(self._logger_system.set_logger_rc_code("Socket has closed."))
+            client_socket_obj.uds_client_socket_close()
+            return RcCode.EXIT_MENU, None
 
         # Retrieve the data from request
+        rc, _, msg_dict = msg_decode(data_byte)
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not convert reply to object"))
+            return rc, None
         reply = ReplyMsg()
-        rc = reply.deserialize(data_str)
+        rc = reply.set_msg(msg_dict)
         if rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Can not convert reply to object"))
             return rc, None
@@ -321,6 +337,12 @@ class ServerControlPortAccessMode(ServerControlMode):
         self._tx_func(self._clear_screen())
         return super().init_control_mode()
 
+    def get_wait_timeout(self):
+        # Wake up to synchronize the port config
+        if self._time_stamp == 0:
+            return 0
+        return max(0, self._time_stamp + SERVER_CONTROL_SYNC_INTERVAL - time.time())
+
     def _update_menu(self):
         rc = self._send_uds_socket_request_data(self._uds_mgmt_socket, GetPortConfigRequest())
         if rc != RcCode.SUCCESS:
@@ -352,7 +374,7 @@ class ServerControlPortAccessMode(ServerControlMode):
         return RcCode.SUCCESS
 
     def run_system(self):
-        if self._time_stamp == 0 or (time.time() - self._time_stamp) > 10:
+        if self._time_stamp == 0 or (time.time() - self._time_stamp) > SERVER_CONTROL_SYNC_INTERVAL:
             self._start_sync = True
             self._time_stamp = time.time()
 
@@ -415,6 +437,26 @@ class ServerControlSerialAccessMode(ServerControlMode):
         self._tx_func(self._clear_screen())
         return RcCode.SUCCESS
 
+    def get_event_fd_list(self):
+        # The console data arrives from the console server after the serial port is connected
+        if not self._port_access_flow_complete:
+            return []
+        fd = self._uds_client_socket.uds_client_socket_fd_get()
+        if fd < 0:
+            return []
+        return [fd]
+
+    def get_wait_timeout(self):
+        # Connect the serial port without waiting for the input
+        if not self._port_access_flow_complete:
+            return 0
+        return None
+
+    def _close_uds_client_socket(self):
+        # The fd may be reused once it is closed, so it is not watched any more before it is closed
+        self._release_event_fd(self._uds_client_socket.uds_client_socket_fd_get())
+        return self._uds_client_socket.uds_client_socket_close()
+
     def _handle_ssh_server_data(self):
         if self._rx_ready_func is None or self._rx_ready_func():
             self._logger.info("Start to read ssh channel")
@@ -423,7 +465,7 @@ class ServerControlSerialAccessMode(ServerControlMode):
             for ascii_val in read_str:
                 if ascii_val == 0x14:
                     self._logger.info("Receive the exit signal, close the socket.")
-                    rc = self._uds_client_socket.uds_client_socket_close()
+                    rc = self._close_uds_client_socket()
                     if rc != RcCode.SUCCESS:
                         self._logger.error(
                             self._logger_system.set_logger_rc_code("Can not close the client socket"), rc=rc)
@@ -440,6 +482,10 @@ class ServerControlSerialAccessMode(ServerControlMode):
     def _handle_console_server_data(self):
         rc, data = self._uds_client_socket.uds_client_socket_recv(self.MAX_BUFFER_SIZE)
         if rc == RcCode.SUCCESS:
+            if data == b"":
+                # The socket keeps readable after the console server closes it
+                self._logger.warning(self._logger_system.set_logger_rc_code("Console server has closed the socket."))
+                return RcCode.EXIT_MENU
             if data != "":
                 try:
                     self._tx_func(data)
@@ -459,6 +505,13 @@ class ServerControlSerialAccessMode(ServerControlMode):
         rc, _  = self._receive_uds_socket_reply_data(self._uds_client_socket, ConsoleServerEvent.CONNECT_SERIAL_PORT)
         if rc != RcCode.SUCCESS:
             return rc
+
+        # The console data, e.g. the scrollback, may arrive together with the reply
+        rc, data = self._uds_client_socket.uds_client_socket_pop_remaining_data()
+        if rc != RcCode.SUCCESS:
+            return rc
+        if data:
+            self._tx_func(data)
         return RcCode.SUCCESS
 
     def run_system(self):
@@ -484,7 +537,7 @@ class ServerControlSerialAccessMode(ServerControlMode):
         rc = self._handle_ssh_server_data()
         if rc == RcCode.EXIT_MENU:
             self._logger.info(self._logger_system.set_logger_rc_code("Receive stop event"))
-            rc = self._uds_client_socket.uds_client_socket_close()
+            rc = self._close_uds_client_socket()
             if rc != RcCode.SUCCESS:
                 self._logger.error(self._logger_system.set_logger_rc_code("Can not close the socket", rc=rc))
             return RcCode.EXIT_MENU
@@ -493,7 +546,12 @@ class ServerControlSerialAccessMode(ServerControlMode):
             return rc
 
         rc = self._handle_console_server_data()
-        if rc != RcCode.SUCCESS:
+        if rc == RcCode.EXIT_MENU:
+            rc = self._close_uds_client_socket()
+            if rc != RcCode.SUCCESS:
+                self._logger.error(self._logger_system.set_logger_rc_code("Can not close the socket", rc=rc))
+            return RcCode.EXIT_MENU
+        elif rc != RcCode.SUCCESS:
             self._logger.error(self._logger_system.set_logger_rc_code("Process Console data fail. rc: {}".format(rc)))
             return rc
         return RcCode.SUCCESS
@@ -634,6 +692,12 @@ class ServerControlPortConfigMode(ServerControlMode):
         self._input_buffer = ""
         return rc
 
+    def get_wait_timeout(self):
+        # Wake up to synchronize the port config
+        if self._time_stamp == 0:
+            return 0
+        return max(0, self._time_stamp + SERVER_CONTROL_SYNC_INTERVAL - time.time())
+
     def _update_menu(self):
         rc = self._send_uds_socket_request_data(self._uds_mgmt_socket, GetPortConfigRequest())
         if rc != RcCode.SUCCESS:
@@ -673,7 +737,7 @@ class ServerControlPortConfigMode(ServerControlMode):
         return RcCode.SUCCESS
 
     def run_system(self):
-        if self._time_stamp == 0 or (time.time() - self._time_stamp) > 10:
+        if self._time_stamp == 0 or (time.time() - self._time_stamp) > SERVER_CONTROL_SYNC_INTERVAL:
             self._start_sync = True
             self._time_stamp = time.time()
 
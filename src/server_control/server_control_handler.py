@@ -57,6 +57,17 @@ class ServerControlHandlerMenuMode:
         self._logger.info(self._logger_system.set_logger_rc_code("New client is login the SSH menu {}".format(self._current_menu)))
         return RcCode.SUCCESS
 
+    def get_event_fd_list(self):
+        if not self._login:
+            return []
+        return self._server_control_mode.get_event_fd_list()
+
+    def get_wait_timeout(self):
+        # Log in the menu without waiting for the input
+        if not self._login:
+            return 0
+        return self._server_control_mode.get_wait_timeout()
+
     def handler(self, *args, **kwargs):
         if not self._login:
             self._logger.info(self._logger_system.set_logger_rc_code("Start to login server to control menu."))
@@ -227,6 +238,17 @@ class ServerControlHandlerDirectAccessMode:
                 "New Clinet is login the SSH No Password server. Open serial port {}.", rc=rc))
         return RcCode.SUCCESS
 
+    def get_event_fd_list(self):
+        if not self._login:
+            return []
+        return self._server_control_mode.get_event_fd_list()
+
+    def get_wait_timeout(self):
+        # Log in the serial port without waiting for the input
+        if not self._login:
+            return 0
+        return self._server_control_mode.get_wait_timeout()
+
     def handler(self, *args, **kwargs):
         if not self._login:
             rc = self._login_system()
@@ -2,6 +2,9 @@ import threading
 
 from src.common.logger_system import LoggerSystem
 from src.common.rc_code import RcCode
+from src.ssh_server.ssh_server_async_subsystem import SshServerAsyncSubsystem
+from src.ssh_server.ssh_server_authenticator import SshKeyHandler, SSH_SERVER_HOST_KEY_FILE_LIST
+from src.ssh_server.ssh_server_handshake_executor import SshHandshakeExecutor, SSH_HANDSHAKE_STATISTICS_INTERVAL
 from src.ssh_server.ssh_server_mgmt.ssh_server_account_mgr import SshServerAccountMgr
 from src.ssh_server.ssh_server_mgmt.ssh_server_network_mgr import SshServerNetworkMgr
 from src.ssh_server.ssh_server_mgmt.ssh_server_serial_port_mgr import SshServerSerialPortMgr
@@ -12,8 +15,9 @@ NUM_OF_SERIAL_PORT = 48
 
 
 class SshServer(threading.Thread):
-    def __init__(self, daemon_id):
+    def __init__(self, daemon_id, async_frontend=False):
         self._daemon_id = daemon_id
+        self._async_frontend = async_frontend
         threading.Thread.__init__(self, name="SshServer_{}".format(daemon_id))
 
         self._logger_system = LoggerSystem(self.name)
@@ -24,6 +28,7 @@ class SshServer(threading.Thread):
         self._ssh_server_network_mgr = None
         self._ssh_passwd_auth_subsystem = None
         self._ssh_none_auth_subsystem_list = []
+        self._ssh_async_subsystem = None
         self._ssh_port_list = []
         for i in range(8):
             self._ssh_port_list.append([])
@@ -56,6 +61,24 @@ class SshServer(threading.Thread):
             self._logger(self._logger_system.set_logger_rc_code("Can not get the server IP address.", rc))
             return rc
 
+        # Load the server keys and the DH moduli once for all the subsystems
+        self._ssh_server_mgr_dict["ssh_key_handler"] = SshKeyHandler(SSH_SERVER_HOST_KEY_FILE_LIST, self._logger_system)
+        rc = self._ssh_server_mgr_dict["ssh_key_handler"].init_key_handler()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not load the server keys", rc=rc))
+            return rc
+
+        # Serve all the SSH ports by the asyncio loop instead of the subsystem threads
+        if self._async_frontend:
+            return self._init_ssh_async_subsystem(ip_addr)
+
+        # Create the executor which runs the SSH handshake of all the subsystems
+        self._ssh_server_mgr_dict["ssh_handshake_executor"] = SshHandshakeExecutor()
+        rc = self._ssh_server_mgr_dict["ssh_handshake_executor"].init_executor()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not init the handshake executor", rc=rc))
+            return rc
+
         subsystem_id = 0
 
         # Create SSH server subsystem which verifies the user.
@@ -87,7 +110,7 @@ class SshServer(threading.Thread):
                                            ip_addr,
                                            self._ssh_port_list[group_id],
                                            len(self._ssh_port_list[group_id]) * 3,
-                                           0.01,
+                                           1,
                                            self._ssh_server_mgr_dict,
                                            self._subsystem_stop_event))
             ssh_server_none_auth_subsystem.start()
@@ -95,16 +118,67 @@ class SshServer(threading.Thread):
             subsystem_id = subsystem_id + 1
         return RcCode.SUCCESS
 
+    def _init_ssh_async_subsystem(self, ip_addr):
+        ssh_port_list = []
+        for serial_port_id in range(1, NUM_OF_SERIAL_PORT + 1):
+            rc, ssh_port = (
+                self._ssh_server_mgr_dict["ssh_server_network_mgr"].get_ssh_port_direct_access_serial_port(serial_port_id))
+            if rc != RcCode.SUCCESS:
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code("Can not get port list of the direct access port.", rc=rc))
+                return rc
+            ssh_port_list.append(ssh_port)
+
+        self._ssh_async_subsystem = SshServerAsyncSubsystem(1,
+                                                            ip_addr,
+                                                            [2222],
+                                                            ssh_port_list,
+                                                            self._ssh_server_mgr_dict,
+                                                            self._subsystem_stop_event)
+        self._ssh_async_subsystem.start()
+        return RcCode.SUCCESS
+
+    def reload_ssh_key(self):
+        if "ssh_key_handler" not in self._ssh_server_mgr_dict:
+            return RcCode.DATA_NOT_READY
+        rc = self._ssh_server_mgr_dict["ssh_key_handler"].reload_key_handler()
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("Can not reload the server keys", rc=rc))
+            return rc
+        if self._ssh_async_subsystem is not None:
+            self._ssh_async_subsystem.reload_server_key()
+        return RcCode.SUCCESS
+
+    def _log_handshake_statistics(self, last_statistics_dict):
+        # Log the statistics only when the handshakes have changed them
+        rc, statistics_dict = self._ssh_server_mgr_dict["ssh_handshake_executor"].get_statistics()
+        if rc != RcCode.SUCCESS:
+            return rc, last_statistics_dict
+        if statistics_dict != last_statistics_dict:
+            self._logger.info(
+                self._logger_system.set_logger_rc_code("Handshake statistics: {}".format(statistics_dict)))
+        return RcCode.SUCCESS, statistics_dict
+
     def run(self):
         rc = self._init_ssh_server()
         if rc != RcCode.SUCCESS:
             return rc
-        
-        self._subsystem_stop_event.wait()
+
+        # The queue depth and the rejected connections of the handshake executor are logged periodically
+        last_statistics_dict = None
+        while not self._subsystem_stop_event.wait(SSH_HANDSHAKE_STATISTICS_INTERVAL):
+            if "ssh_handshake_executor" in self._ssh_server_mgr_dict:
+                _, last_statistics_dict = self._log_handshake_statistics(last_statistics_dict)
+
+        if self._ssh_async_subsystem is not None:
+            self._ssh_async_subsystem.stop_subsystem()
+            self._ssh_async_subsystem.join()
+            return RcCode.SUCCESS
 
         if self._ssh_passwd_auth_subsystem.running:
-            self._ssh_passwd_auth_subsystem.running = False
+            self._ssh_passwd_auth_subsystem.stop_subsystem()
             self._ssh_passwd_auth_subsystem.join()
         for ssh_none_auth_subsystem in self._ssh_none_auth_subsystem_list:
-            ssh_none_auth_subsystem.running = False
+            ssh_none_auth_subsystem.stop_subsystem()
             ssh_none_auth_subsystem.join()
+        self._ssh_server_mgr_dict["ssh_handshake_executor"].stop_executor()
@@ -0,0 +1,309 @@
+import asyncio
+import concurrent.futures
+import functools
+import threading
+
+import pam
+
+# asyncssh is an optional dependency which is only needed by the asyncio frontend (server --async-ssh). Install it by
+# "pip install asyncssh".
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+from src.common.logger_system import LoggerSystem
+from src.common.rc_code import RcCode
+from src.server_control.server_control_handler import ServerControlHandlerMenuMode, ServerControlHandlerDirectAccessMode
+from src.ssh_server.ssh_server_subsystem import SESSION_RETRY_INTERVAL
+
+
+# The max bytes which are read from the SSH channel at once
+SSH_ASYNC_READ_SIZE = 1024
+
+# The number of the threads which run the server control of the sessions. The server control sends its management
+# requests by the blocking sockets, so it does not run on the loop.
+SSH_ASYNC_SESSION_WORKER = 16
+
+# The seconds a session thread waits for the loop to stop watching the fd which the session closes. The loop only
+# misses it while the subsystem is stopping.
+SSH_ASYNC_FD_RELEASE_TIMEOUT = 1
+
+# The asyncssh servers are only defined when asyncssh is installed
+_SshAsyncServerBase = asyncssh.SSHServer if asyncssh is not None else object
+
+
+class _SshAsyncPassWdAuthServer(_SshAsyncServerBase):
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    async def validate_password(self, username, password):
+        # PAM blocks, so it runs in the default executor of the loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, pam.pam().authenticate, username, password)
+
+
+class _SshAsyncNoneAuthServer(_SshAsyncServerBase):
+    def begin_auth(self, username):
+        # TBD: implement the user authorized
+        return False
+
+
+def is_async_frontend_supported():
+    return asyncssh is not None
+
+
+class _SshAsyncSessionChannel:
+    # Provide the functions of the paramiko channel which the server control uses. The input is buffered by a task which
+    # reads the SSH channel, and the event is set when the session has the data to process. The server control runs on
+    # the session threads, so the output is written by the loop and the input buffer is shared under the lock.
+    # The fds of the server control are watched by the loop. The session thread releases the fd on the loop before it
+    # closes the fd, otherwise another session could get the same fd and lose its reader.
+    def __init__(self, process, loop):
+        self._process = process
+        self._loop = loop
+        self._rx_buffer = bytearray()
+        self._rx_lock = threading.Lock()
+        self._event_fd_list = []
+        self.event = asyncio.Event()
+        self.closed = False
+
+    def get_trans_func_dict(self):
+        return {
+            "tx_func": self.send,
+            "rx_func": self.recv,
+            "rx_ready_func": self.recv_ready,
+            "event_fd_release_func": self.release_event_fd
+        }
+
+    def update_event_fd_list(self, fd_list):
+        # Run on the loop after the server control returns, so the fds are still open
+        for fd in self._event_fd_list:
+            if fd not in fd_list:
+                self._loop.remove_reader(fd)
+        for fd in fd_list:
+            if fd not in self._event_fd_list:
+                self._loop.add_reader(fd, self.event.set)
+        self._event_fd_list = list(fd_list)
+
+    def _release_event_fd(self, fd, released_event):
+        if fd in self._event_fd_list:
+            self._loop.remove_reader(fd)
+            self._event_fd_list.remove(fd)
+        released_event.set()
+
+    def release_event_fd(self, fd):
+        # Run on the session thread. Wait until the loop stops watching the fd, then the fd can be closed.
+        released_event = threading.Event()
+        try:
+            self._loop.call_soon_threadsafe(self._release_event_fd, fd, released_event)
+        except RuntimeError:
+            # The loop has been closed
+            return
+        released_event.wait(SSH_ASYNC_FD_RELEASE_TIMEOUT)
+
+    def _write(self, data):
+        if self.closed:
+            return
+        try:
+            self._process.stdout.write(data)
+        except (asyncssh.Error, OSError):
+            pass
+
+    def send(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        try:
+            self._loop.call_soon_threadsafe(self._write, data)
+        except RuntimeError:
+            # The loop has been closed
+            return 0
+        return len(data)
+
+    def recv(self, size):
+        with self._rx_lock:
+            data = bytes(self._rx_buffer[:size])
+            del self._rx_buffer[:size]
+        return data
+
+    def recv_ready(self):
+        with self._rx_lock:
+            return len(self._rx_buffer) != 0
+
+    async def read_channel(self):
+        while not self.closed:
+            try:
+                data = await self._process.stdin.read(SSH_ASYNC_READ_SIZE)
+            except (asyncssh.BreakReceived, asyncssh.SignalReceived, asyncssh.TerminalSizeChanged):
+                continue
+            except (asyncssh.Error, OSError):
+                data = b""
+            if data == b"":
+                self.closed = True
+            else:
+                with self._rx_lock:
+                    self._rx_buffer.extend(data)
+            self.event.set()
+
+    def close(self):
+        self.closed = True
+        try:
+            self._process.exit(0)
+        except (asyncssh.Error, OSError):
+            pass
+
+
+class SshServerAsyncSubsystem(threading.Thread):
+    # Serve the SSH menu and the direct access ports by a single asyncio loop. Each session is a coroutine which waits
+    # for the SSH channel, the console sockets and the timeout of the server control, so the idle sessions only cost
+    # their coroutines. The server control sends its management requests by the blocking sockets, e.g. to sync the port
+    # config or to connect to a serial port, so it runs on a bounded pool of threads and does not stall the loop.
+    def __init__(self, daemon_id, ssh_ip_addr, ssh_passwd_port_list, ssh_none_auth_port_list, ssh_server_mgr_dict,
+                 thread_stop_event):
+        self._daemon_id = daemon_id
+        self._ssh_ip_addr = ssh_ip_addr
+        self._ssh_passwd_port_list = ssh_passwd_port_list
+        self._ssh_none_auth_port_list = ssh_none_auth_port_list
+        self._ssh_server_mgr_dict = ssh_server_mgr_dict
+        self._thread_stop_event = thread_stop_event
+        self._ssh_key_handler = self._ssh_server_mgr_dict["ssh_key_handler"]
+
+        threading.Thread.__init__(self, name="SshServerAsyncSubsystem_{}".format(self._daemon_id))
+
+        self._logger_system = LoggerSystem(self.name)
+        self._logger = self._logger_system.get_logger()
+
+        self.running = False
+        self._loop = None
+        self._stop_event = None
+        self._acceptor_list = []
+        self._session_num = 0
+        self._session_executor = None
+
+    async def _start_server(self, ssh_port, server_factory, process_factory):
+        try:
+            acceptor = await asyncssh.listen(host=self._ssh_ip_addr if self._ssh_ip_addr != "" else None,
+                                             port=ssh_port,
+                                             reuse_address=True,
+                                             server_factory=server_factory,
+                                             server_host_keys=self._ssh_key_handler.get_server_private_key_file_list(),
+                                             process_factory=process_factory,
+                                             encoding=None,
+                                             line_editor=False)
+        except (asyncssh.Error, OSError) as e:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code("Can not listen SSH port {}. {}".format(ssh_port, e)))
+            return RcCode.FAILURE
+        self._acceptor_list.append(acceptor)
+        return RcCode.SUCCESS
+
+    async def _serve_session(self, process, channel, server_control_intf):
+        session_id = self._session_num
+        self._session_num = self._session_num + 1
+        self._logger.info(
+            self._logger_system.set_logger_rc_code(
+                "Serve the session {} from {}.".format(session_id, process.get_extra_info("peername"))))
+
+        read_task = self._loop.create_task(channel.read_channel())
+        try:
+            while not channel.closed or channel.recv_ready():
+                # Wait until the session has the input or the server control has to run
+                timeout = server_control_intf.get_wait_timeout()
+                if channel.recv_ready() or timeout == 0:
+                    # Let the other sessions run between the inputs
+                    await asyncio.sleep(0)
+                else:
+                    channel.event.clear()
+                    try:
+                        await asyncio.wait_for(channel.event.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    if channel.closed and not channel.recv_ready():
+                        break
+
+                rc = await self._loop.run_in_executor(self._session_executor, server_control_intf.handler)
+                if rc == RcCode.EXIT_PROCESS:
+                    break
+                elif rc != RcCode.SUCCESS:
+                    self._logger.error(
+                        self._logger_system.set_logger_rc_code("session {} process event fail".format(session_id)))
+                    await asyncio.sleep(SESSION_RETRY_INTERVAL)
+                # The mode of the session may change the sockets, so watch the file descriptors again
+                channel.update_event_fd_list(server_control_intf.get_event_fd_list())
+        finally:
+            channel.update_event_fd_list([])
+            read_task.cancel()
+            channel.close()
+            self._logger.info(self._logger_system.set_logger_rc_code("session {} has stopped.".format(session_id)))
+
+    def _create_menu_session(self, process):
+        channel = _SshAsyncSessionChannel(process, self._loop)
+        server_control_intf = ServerControlHandlerMenuMode(
+            self._logger_system, self._ssh_server_mgr_dict, channel.get_trans_func_dict())
+        return self._serve_session(process, channel, server_control_intf)
+
+    def _create_direct_access_session(self, ssh_port, process):
+        channel = _SshAsyncSessionChannel(process, self._loop)
+        server_control_intf = ServerControlHandlerDirectAccessMode(
+            self._logger_system, self._ssh_server_mgr_dict, ssh_port, channel.get_trans_func_dict())
+        return self._serve_session(process, channel, server_control_intf)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+
+        for ssh_port in self._ssh_passwd_port_list:
+            rc = await self._start_server(ssh_port, _SshAsyncPassWdAuthServer, self._create_menu_session)
+            if rc != RcCode.SUCCESS:
+                return rc
+        for ssh_port in self._ssh_none_auth_port_list:
+            rc = await self._start_server(
+                ssh_port, _SshAsyncNoneAuthServer, functools.partial(self._create_direct_access_session, ssh_port))
+            if rc != RcCode.SUCCESS:
+                return rc
+
+        self.running = True
+        self._logger.info(
+            self._logger_system.set_logger_rc_code("SSH async subserver {} is running.........".format(self._daemon_id)))
+        await self._stop_event.wait()
+
+        # Stop accepting the client. The sessions are closed with the loop.
+        for acceptor in self._acceptor_list:
+            acceptor.close()
+            await acceptor.wait_closed()
+        self._acceptor_list = []
+        return RcCode.SUCCESS
+
+    def _reload_server_key(self):
+        for acceptor in self._acceptor_list:
+            acceptor.update(server_host_keys=self._ssh_key_handler.get_server_private_key_file_list())
+
+    def reload_server_key(self):
+        # The key handler has loaded the keys again. Offer them to the new connections.
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._reload_server_key)
+
+    def stop_subsystem(self):
+        self.running = False
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def run(self):
+        rc = self._logger_system.init_logger_system()
+        if rc != RcCode.SUCCESS:
+            return
+
+        if asyncssh is None:
+            self._logger.error(self._logger_system.set_logger_rc_code("asyncssh is not installed."))
+            return
+
+        self._session_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=SSH_ASYNC_SESSION_WORKER, thread_name_prefix="SshAsyncSession_{}".format(self._daemon_id))
+        rc = asyncio.run(self._serve())
+        if rc != RcCode.SUCCESS:
+            self._logger.error(self._logger_system.set_logger_rc_code("SSH async subserver fail.", rc=rc))
+        self._session_executor.shutdown(wait=True, cancel_futures=True)
+        self.running = False
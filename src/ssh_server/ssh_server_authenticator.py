@@ -1,57 +1,176 @@
 import base64
+import binascii
 import os
 import threading
 import pam
 import paramiko
+from paramiko.primes import ModulusPack
+
+from src.common.rc_code import RcCode
+
+
+# The host key files of the server. All the keys which exist are offered, so the clients can choose the Ed25519 or
+# ECDSA key, whose handshake is cheaper than the RSA key.
+SSH_SERVER_HOST_KEY_FILE_LIST = ['~/.ssh/id_ed25519', '~/.ssh/id_ecdsa', '~/.ssh/id_rsa']
+
+# The DH moduli files which paramiko looks for, in the order they are tried
+SSH_SERVER_MODULI_FILE_LIST = ['/etc/ssh/moduli', '/usr/local/etc/moduli']
+
+# The key classes which load a private key file, in the order they are tried
+_SSH_PRIVATE_KEY_CLASS_LIST = [paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey]
+
+# The key classes of the public key types
+_SSH_PUBLIC_KEY_CLASS_DICT = {
+    'ssh-ed25519': paramiko.Ed25519Key,
+    'ecdsa-sha2-nistp256': paramiko.ECDSAKey,
+    'ecdsa-sha2-nistp384': paramiko.ECDSAKey,
+    'ecdsa-sha2-nistp521': paramiko.ECDSAKey,
+    'ssh-rsa': paramiko.RSAKey
+}
 
 
 class SshKeyHandler:
-    def __init__(self, server_pri_key_file, logger_system, auth_host_pub_key_file=None):
+    # The keys and the DH moduli are loaded once and shared by all the sessions of the process. They are loaded again
+    # by reload_key_handler, e.g. on SIGHUP.
+    def __init__(self, server_pri_key_file_list, logger_system, auth_host_pub_key_file=None):
         self._auth_host_pub_key_file = auth_host_pub_key_file
         self._logger_system = logger_system
         self._logger = self._logger_system.get_logger()
-        self._server_pri_key_file = os.path.expanduser(server_pri_key_file)
-        self._server_private_key = None
-        self._host_pub_keys = {}
+        self._server_pri_key_file_list = [os.path.expanduser(key_file) for key_file in server_pri_key_file_list]
+        self._reload_lock = threading.Lock()
 
-        self._init_server_pri_key()
-        self._init_host_pub_key()
+        # The loaded keys are replaced as a whole, so the sessions read them without the lock
+        self._server_private_key_list = []
+        self._server_private_key_file_list = []
+        self._host_pub_keys = {}
 
-    def _init_host_pub_key(self):
+    def init_key_handler(self):
+        return self.reload_key_handler()
+
+    def reload_key_handler(self):
+        with self._reload_lock:
+            rc, server_private_key_list, server_private_key_file_list = self._load_server_pri_key()
+            if rc != RcCode.SUCCESS:
+                return rc
+            rc, host_pub_keys = self._load_host_pub_key()
+            if rc != RcCode.SUCCESS:
+                return rc
+
+            # The moduli are kept by paramiko for all the transports, so they are parsed once here instead of per
+            # connection. paramiko.Transport.load_server_moduli fills the shared pack in place, so the handshakes which
+            # run meanwhile may see a partial pack. Parse the file into a new pack and replace the shared pack at once.
+            # The previous pack is kept if the file can not be read.
+            rc, modulus_pack = self._load_server_moduli()
+            if rc == RcCode.SUCCESS:
+                paramiko.Transport._modulus_pack = modulus_pack
+            elif paramiko.Transport._modulus_pack is None:
+                self._logger.warning(
+                    self._logger_system.set_logger_rc_code("Can not load the DH moduli. Disable the group exchange."))
+            else:
+                self._logger.warning(
+                    self._logger_system.set_logger_rc_code("Can not load the DH moduli. Keep the previous moduli."))
+
+            self._server_private_key_list = server_private_key_list
+            self._server_private_key_file_list = server_private_key_file_list
+            self._host_pub_keys = host_pub_keys
+        self._logger.info(
+            self._logger_system.set_logger_rc_code(
+                "Load the server keys {}.".format([key.get_name() for key in server_private_key_list])))
+        return RcCode.SUCCESS
+
+    @staticmethod
+    def _load_server_moduli():
+        for moduli_file in SSH_SERVER_MODULI_FILE_LIST:
+            modulus_pack = ModulusPack()
+            try:
+                modulus_pack.read_file(moduli_file)
+            except OSError:
+                continue
+            if len(modulus_pack.pack) == 0:
+                continue
+            return RcCode.SUCCESS, modulus_pack
+        return RcCode.FILE_NOT_FOUND, None
+
+    def _load_host_pub_key(self):
+        host_pub_keys = {}
         if self._auth_host_pub_key_file:
             try:
                 with open(self._auth_host_pub_key_file, 'r') as fd:
                     host_keys = fd.readlines()
-                for key in host_keys:
-                    entries = key.split(' ')
-                    if len(entries) != 3:
-                        continue
-                    if entries[0] != 'ssh-rsa':
-                        continue
-
-                    user = entries[2].split('@')
-                    self.add_host_public_key(entries[1], user[0])
             except OSError:
                 self._logger.error(
                     self._logger_system.set_logger_rc_code("Can not access file to get the host public keys."))
-                return
-
-    def _init_server_pri_key(self):
-        self._server_private_key = paramiko.RSAKey(filename=self._server_pri_key_file)
-
-    def add_host_public_key(self, user, key_data):
-        key = paramiko.RSAKey(data=base64.decodestring(key_data))
-        if user not in self._host_pub_keys:
-            self._host_pub_keys[user] = []
-        self._host_pub_keys[user].append(key)
+                return RcCode.FILE_ACCESS_FAIL, None
+            for key in host_keys:
+                entries = key.split(' ')
+                if len(entries) != 3:
+                    continue
+                if entries[0] not in _SSH_PUBLIC_KEY_CLASS_DICT:
+                    continue
+
+                user = entries[2].split('@')
+                rc, host_pub_key = self._create_host_public_key(entries[0], entries[1])
+                if rc != RcCode.SUCCESS:
+                    continue
+                if user[0] not in host_pub_keys:
+                    host_pub_keys[user[0]] = []
+                host_pub_keys[user[0]].append(host_pub_key)
+        return RcCode.SUCCESS, host_pub_keys
+
+    def _load_server_pri_key(self):
+        server_private_key_list = []
+        server_private_key_file_list = []
+        for key_file in self._server_pri_key_file_list:
+            if not os.path.exists(key_file):
+                continue
+            for key_class in _SSH_PRIVATE_KEY_CLASS_LIST:
+                try:
+                    server_private_key_list.append(key_class(filename=key_file))
+                    server_private_key_file_list.append(key_file)
+                    break
+                except (paramiko.SSHException, OSError, ValueError):
+                    continue
+            else:
+                self._logger.warning(
+                    self._logger_system.set_logger_rc_code("Can not load the server key {}.".format(key_file)))
+        if len(server_private_key_list) == 0:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "No server key in {}.".format(self._server_pri_key_file_list), rc=RcCode.FILE_NOT_FOUND))
+            return RcCode.FILE_NOT_FOUND, None, None
+        return RcCode.SUCCESS, server_private_key_list, server_private_key_file_list
+
+    def _create_host_public_key(self, key_type, key_data):
+        try:
+            key = _SSH_PUBLIC_KEY_CLASS_DICT[key_type](data=base64.decodebytes(key_data.encode('ascii')))
+        except (paramiko.SSHException, binascii.Error, ValueError):
+            self._logger.warning(
+                self._logger_system.set_logger_rc_code("Can not decode the {} public key.".format(key_type)))
+            return RcCode.INVALID_VALUE, None
+        return RcCode.SUCCESS, key
+
+    def add_host_public_key(self, user, key_data, key_type='ssh-rsa'):
+        if key_type not in _SSH_PUBLIC_KEY_CLASS_DICT:
+            return RcCode.INVALID_TYPE
+        rc, key = self._create_host_public_key(key_type, key_data)
+        if rc != RcCode.SUCCESS:
+            return rc
+        with self._reload_lock:
+            host_pub_keys = dict(self._host_pub_keys)
+            host_pub_keys[user] = self._host_pub_keys.get(user, []) + [key]
+            self._host_pub_keys = host_pub_keys
+        return RcCode.SUCCESS
 
     def get_host_public_key(self, user):
         if user not in self._host_pub_keys:
             return None
         return self._host_pub_keys[user]
 
-    def get_server_private_key(self):
-        return self._server_private_key
+    def get_server_private_key_list(self):
+        return self._server_private_key_list
+
+    def get_server_private_key_file_list(self):
+        return self._server_private_key_file_list
 
 
 class SshServerPassWdAuthenticator(paramiko.ServerInterface):
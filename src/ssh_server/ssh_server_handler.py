@@ -1,5 +1,4 @@
 import os
-import threading
 import paramiko
 
 from src.common.logger_system import LoggerSystem
@@ -7,16 +6,18 @@ from src.common.rc_code import RcCode
 from src.server_control.server_control_handler import ServerControlHandlerMenuMode, ServerControlHandlerDirectAccessMode
 
 
-class SshServerSessionHandler(threading.Thread):
-    def __init__(self, handler_id, client_sock, ssh_key_handler, channel_timeout=30, ssh_authenticator_server_class=None):
+class SshServerSessionHandler:
+    # The handshake is executed by the SshHandshakeExecutor, and the session is served by the subsystem after it.
+    def __init__(self, handler_id, client_sock, ssh_key_handler, channel_timeout=30, ssh_authenticator_server_class=None,
+                 event_notify_func=None):
         self._handler_id = handler_id
         self._username = os.getlogin()
         self._client_sock = client_sock
         self._key_handler = ssh_key_handler
         self._channel_timeout = channel_timeout
         self._ssh_authenticator_server_class = ssh_authenticator_server_class
+        self._event_notify_func = event_notify_func
 
-        threading.Thread.__init__(self)
         self.name = "SshServerSessionHandler_{}".format(self._handler_id)
 
         self._logger_system = LoggerSystem(self.name)
@@ -38,9 +39,10 @@ class SshServerSessionHandler(threading.Thread):
                 self._logger_system.set_logger_rc_code("SSH server does not start."))
             return RcCode.FAILURE
         try:
+            # The keys and the DH moduli are loaded once by the key handler
             self._transporter = paramiko.Transport(self._client_sock)
-            self._transporter.load_server_moduli()
-            self._transporter.add_server_key(self._key_handler.get_server_private_key())
+            for server_private_key in self._key_handler.get_server_private_key_list():
+                self._transporter.add_server_key(server_private_key)
         except Exception:
             self._logger.warning(
                 self._logger_system.set_logger_rc_code("Can not create SSH transport."))
@@ -78,10 +80,41 @@ class SshServerSessionHandler(threading.Thread):
         self._client_sock.close()
         self.clear = True
 
+    def notify_event(self):
+        # Wake up the subsystem which waits for the handshake
+        if self._event_notify_func is not None:
+            self._event_notify_func()
+
+    def is_channel_closed(self):
+        # The channel keeps readable after the client closes it
+        if self._channel is None:
+            return True
+        return self._channel.closed or (self._channel.eof_received and not self._channel.recv_ready())
+
+    def get_event_fd_list(self):
+        # The file descriptors which are readable when the session has the data to process
+        if self._channel is None:
+            return []
+        return [self._channel.fileno()]
+
+    def get_wait_timeout(self):
+        # The seconds until the session has to run without any input. None means that it only waits for the input.
+        return None
+
     def handler(self, *args, **kwargs):
         raise NotImplementedError
 
+    def _init_server_control(self):
+        raise NotImplementedError
+
     def run(self):
+        # Wake up the subsystem whether the handshake succeeds or not
+        try:
+            self._run_handshake()
+        finally:
+            self.notify_event()
+
+    def _run_handshake(self):
         rc = self._logger_system.init_logger_system()
         if rc != RcCode.SUCCESS:
             return
@@ -114,18 +147,25 @@ class SshServerSessionHandler(threading.Thread):
             self.close_client()
             return
 
+        rc = self._init_server_control()
+        if rc != RcCode.SUCCESS:
+            self._logger.warning(self._logger_system.set_logger_rc_code("Init server control fail...", rc=rc))
+            self.close_client()
+            return
+
         self._logger.info(self._logger_system.set_logger_rc_code("SSH client init DONE !!"))
         self.complete = True
 
 
 class SshServerPassWdAuthSessionHandler(SshServerSessionHandler):
     def __init__(self, handler_id, ssh_server_mgr_dict, client_sock, ssh_key_handler, channel_timeout=30,
-                 ssh_authenticator_server_class=None):
+                 ssh_authenticator_server_class=None, event_notify_func=None):
         self.handler_id = handler_id
         self._ssh_server_mgr_dict = ssh_server_mgr_dict
 
         SshServerSessionHandler.__init__(
-            self, handler_id, client_sock, ssh_key_handler, channel_timeout, ssh_authenticator_server_class)
+            self, handler_id, client_sock, ssh_key_handler, channel_timeout, ssh_authenticator_server_class,
+            event_notify_func)
         self.name = "SshServerPassWdAuthSessionHandler_{}".format(self.handler_id)
 
         self._logger_system = LoggerSystem(self.name)
@@ -134,8 +174,7 @@ class SshServerPassWdAuthSessionHandler(SshServerSessionHandler):
         self.in_queue = False
         self._server_control_intf = None
 
-    def run(self):
-        super().run()
+    def _init_server_control(self):
         self._server_control_intf = ServerControlHandlerMenuMode(
             self._logger_system,
             self._ssh_server_mgr_dict,
@@ -144,6 +183,13 @@ class SshServerPassWdAuthSessionHandler(SshServerSessionHandler):
                 "rx_func": self._channel.recv,
                 "rx_ready_func": self._channel.recv_ready
             })
+        return RcCode.SUCCESS
+
+    def get_event_fd_list(self):
+        return SshServerSessionHandler.get_event_fd_list(self) + self._server_control_intf.get_event_fd_list()
+
+    def get_wait_timeout(self):
+        return self._server_control_intf.get_wait_timeout()
 
     def handler(self, *args, **kwargs):
         return self._server_control_intf.handler()
@@ -151,13 +197,14 @@ class SshServerPassWdAuthSessionHandler(SshServerSessionHandler):
 
 class SshServerNoneAuthSessionHandler(SshServerSessionHandler):
     def __init__(self, handler_id, ssh_server_mgr_dict, ssh_server_port, client_sock, ssh_key_handler,
-                 channel_timeout=30, ssh_authenticator_server_class=None):
+                 channel_timeout=30, ssh_authenticator_server_class=None, event_notify_func=None):
         self.handler_id = handler_id
         self._ssh_server_mgr_dict = ssh_server_mgr_dict
         self._ssh_server_port = ssh_server_port
 
         SshServerSessionHandler.__init__(
-            self, handler_id, client_sock, ssh_key_handler, channel_timeout, ssh_authenticator_server_class)
+            self, handler_id, client_sock, ssh_key_handler, channel_timeout, ssh_authenticator_server_class,
+            event_notify_func)
         self.name = "SshServerNoneAuthSessionHandler_{}".format(handler_id)
 
         self._logger_system = LoggerSystem(self.name)
@@ -165,8 +212,7 @@ class SshServerNoneAuthSessionHandler(SshServerSessionHandler):
 
         self._server_control_intf = None
 
-    def run(self):
-        super().run()
+    def _init_server_control(self):
         self._server_control_intf = ServerControlHandlerDirectAccessMode(
             self._logger_system,
             self._ssh_server_mgr_dict,
@@ -176,6 +222,13 @@ class SshServerNoneAuthSessionHandler(SshServerSessionHandler):
                 "rx_func": self._channel.recv,
                 "rx_ready_func": self._channel.recv_ready,
             })
+        return RcCode.SUCCESS
+
+    def get_event_fd_list(self):
+        return SshServerSessionHandler.get_event_fd_list(self) + self._server_control_intf.get_event_fd_list()
+
+    def get_wait_timeout(self):
+        return self._server_control_intf.get_wait_timeout()
 
     def handler(self, *args, **kwargs):
         return self._server_control_intf.handler()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import queue
+import threading
+
+from src.common.logger_system import LoggerSystem
+from src.common.rc_code import RcCode
+
+
+# The number of the threads which execute the SSH handshake
+SSH_HANDSHAKE_WORKER = 16
+
+# The number of the accepted connections which wait for a handshake thread
+SSH_HANDSHAKE_QUEUE_SIZE = 256
+
+# The number of the connections from a source IP address which are queued or in the handshake at the same time. It is
+# a fraction of the threads, so a source IP address which stalls its handshakes can not hold all the threads.
+SSH_HANDSHAKE_PER_IP_LIMIT = SSH_HANDSHAKE_WORKER // 4
+
+# The seconds between the logs of the handshake statistics
+SSH_HANDSHAKE_STATISTICS_INTERVAL = 60
+
+
+class SshHandshakeExecutor:
+    # Execute the handshake of the accepted connections by a fixed number of threads. A connection waits in the accept
+    # queue until a thread is free, and it is rejected when the queue is full or its source IP address already has too
+    # many connections in the queue or the handshake.
+    def __init__(self, num_of_worker=SSH_HANDSHAKE_WORKER, max_queue_size=SSH_HANDSHAKE_QUEUE_SIZE,
+                 max_handshake_per_ip=SSH_HANDSHAKE_PER_IP_LIMIT):
+        self._num_of_worker = num_of_worker
+        self._max_handshake_per_ip = max_handshake_per_ip
+
+        self._logger_system = LoggerSystem("SshHandshakeExecutor")
+        self._logger = self._logger_system.get_logger()
+
+        self._handshake_queue = queue.Queue(max_queue_size)
+        self._worker_list = []
+        self._lock = threading.Lock()
+
+        # The number of the connections which are queued or in the handshake for each source IP address
+        # {
+        #       ip_addr: int
+        # }
+        self._handshake_ip_dict = {}
+
+        self._statistics_dict = {
+            "submitted": 0,
+            "completed": 0,
+            "running": 0,
+            "max_queue_depth": 0,
+            "rejected_queue_full": 0,
+            "rejected_ip_limit": 0
+        }
+        self.running = False
+
+    def init_executor(self):
+        rc = self._logger_system.init_logger_system()
+        if rc != RcCode.SUCCESS:
+            return rc
+
+        for worker_id in range(self._num_of_worker):
+            worker = threading.Thread(
+                target=self._run_worker, name="SshHandshakeWorker_{}".format(worker_id), daemon=True)
+            worker.start()
+            self._worker_list.append(worker)
+        self.running = True
+        return RcCode.SUCCESS
+
+    def submit_handshake(self, server_handler, ip_addr):
+        if not self.running:
+            return RcCode.FAILURE
+        with self._lock:
+            num_of_handshake = self._handshake_ip_dict.get(ip_addr, 0)
+            if num_of_handshake >= self._max_handshake_per_ip:
+                self._statistics_dict["rejected_ip_limit"] = self._statistics_dict["rejected_ip_limit"] + 1
+                self._logger.warning(
+                    self._logger_system.set_logger_rc_code(
+                        "{} has too many connections in the handshake.".format(ip_addr)))
+                return RcCode.REQUEST_DENIED
+            try:
+                self._handshake_queue.put_nowait((server_handler, ip_addr))
+            except queue.Full:
+                self._statistics_dict["rejected_queue_full"] = self._statistics_dict["rejected_queue_full"] + 1
+                self._logger.warning(
+                    self._logger_system.set_logger_rc_code(
+                        "The handshake queue is full. Reject the connection from {}.".format(ip_addr)))
+                return RcCode.QUEUE_FULL
+            self._handshake_ip_dict[ip_addr] = num_of_handshake + 1
+            self._statistics_dict["submitted"] = self._statistics_dict["submitted"] + 1
+            self._statistics_dict["max_queue_depth"] = max(
+                self._statistics_dict["max_queue_depth"], self._handshake_queue.qsize())
+        return RcCode.SUCCESS
+
+    def get_statistics(self):
+        with self._lock:
+            statistics_dict = dict(self._statistics_dict)
+            statistics_dict["queue_depth"] = self._handshake_queue.qsize()
+            statistics_dict["num_of_ip_addr"] = len(self._handshake_ip_dict)
+        return RcCode.SUCCESS, statistics_dict
+
+    def _run_worker(self):
+        while True:
+            handshake = self._handshake_queue.get()
+            if handshake is None:
+                break
+            server_handler, ip_addr = handshake
+
+            with self._lock:
+                self._statistics_dict["running"] = self._statistics_dict["running"] + 1
+            try:
+                server_handler.run()
+            except Exception as e:
+                # The thread serves the next connection even if the handshake crashes
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code(
+                        "The handshake of the connection from {} fails. {}".format(ip_addr, e)))
+            finally:
+                with self._lock:
+                    self._statistics_dict["running"] = self._statistics_dict["running"] - 1
+                    self._statistics_dict["completed"] = self._statistics_dict["completed"] + 1
+                    self._release_ip_addr(ip_addr)
+
+    def _release_ip_addr(self, ip_addr):
+        self._handshake_ip_dict[ip_addr] = self._handshake_ip_dict[ip_addr] - 1
+        if self._handshake_ip_dict[ip_addr] == 0:
+            del self._handshake_ip_dict[ip_addr]
+
+    def stop_executor(self):
+        if not self.running:
+            return RcCode.SUCCESS
+        self.running = False
+
+        # Close the connections which still wait in the queue, then stop the threads
+        while True:
+            try:
+                server_handler, ip_addr = self._handshake_queue.get_nowait()
+            except queue.Empty:
+                break
+            server_handler.close_client()
+            with self._lock:
+                self._release_ip_addr(ip_addr)
+        for _ in self._worker_list:
+            self._handshake_queue.put(None)
+        for worker in self._worker_list:
+            worker.join()
+        self._worker_list = []
+        return RcCode.SUCCESS
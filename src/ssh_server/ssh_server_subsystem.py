@@ -1,16 +1,162 @@
+import selectors
 import socket
 import threading
 import time
 
-import select
-
 from src.common.logger_system import LoggerSystem
 from src.common.rc_code import RcCode
-from src.ssh_server.ssh_server_authenticator import SshServerNoneAuthenticator, SshServerPassWdAuthenticator, SshKeyHandler
+from src.ssh_server.ssh_server_authenticator import SshServerNoneAuthenticator, SshServerPassWdAuthenticator
 from src.ssh_server.ssh_server_handler import SshServerNoneAuthSessionHandler, SshServerPassWdAuthSessionHandler
 
 
-class SshServerSubsystem(threading.Thread):
+# The seconds a session waits before it runs again after the session fails to process the event
+SESSION_RETRY_INTERVAL = 0.01
+
+
+class _SshServerSessionEventLoop:
+    # Wait until the SSH channel or the console socket of a session is readable, or until a session has to run without
+    # any input, e.g. to show the menu. The other threads wake up the loop by the socket pair.
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+
+        # The file descriptors which are registered to the selector for each session
+        # {
+        #       server_handler: [fd, ...]
+        # }
+        self._server_handler_fd_dict = {}
+
+        # The time when the session has to run without any input
+        # {
+        #       server_handler: float
+        # }
+        self._server_handler_deadline_dict = {}
+
+        self._wakeup_rx_sock, self._wakeup_tx_sock = socket.socketpair()
+        self._wakeup_rx_sock.setblocking(False)
+        self._wakeup_tx_sock.setblocking(False)
+        self._selector.register(self._wakeup_rx_sock, selectors.EVENT_READ, None)
+
+    def wakeup(self):
+        try:
+            self._wakeup_tx_sock.send(b"\0")
+        except BlockingIOError:
+            # The loop has not read the previous wakeup yet
+            pass
+
+    def _clear_wakeup(self):
+        try:
+            while self._wakeup_rx_sock.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _wait_event(self, max_timeout=None):
+        # Return the ready keys which are not the sessions and the sessions which have to run. The timeout is only
+        # limited by the sessions and the max timeout, so the loop does not poll.
+        timeout = None
+        if len(self._server_handler_deadline_dict) != 0:
+            timeout = max(0, min(self._server_handler_deadline_dict.values()) - time.monotonic())
+        if max_timeout is not None and (timeout is None or timeout > max_timeout):
+            timeout = max_timeout
+
+        wakeup = False
+        key_list = []
+        ready_handler_set = set()
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                self._clear_wakeup()
+                wakeup = True
+            elif key.data in self._server_handler_fd_dict:
+                ready_handler_set.add(key.data)
+            else:
+                key_list.append(key)
+        current_time = time.monotonic()
+        for server_handler, deadline in self._server_handler_deadline_dict.items():
+            if deadline <= current_time:
+                ready_handler_set.add(server_handler)
+        return wakeup, key_list, ready_handler_set
+
+    def _add_server_handler_event(self, server_handler):
+        if server_handler in self._server_handler_fd_dict:
+            return
+        self._server_handler_fd_dict[server_handler] = []
+        # Run the new session at once to show the menu
+        self._server_handler_deadline_dict[server_handler] = time.monotonic()
+
+    def _update_server_handler_event(self, server_handler, retry_interval=None):
+        # The mode of the session may change the sockets, so register the file descriptors again when they change
+        fd_list = server_handler.get_event_fd_list()
+        registered_fd_list = self._server_handler_fd_dict[server_handler]
+        if fd_list != registered_fd_list:
+            for fd in registered_fd_list:
+                self._selector.unregister(fd)
+            self._server_handler_fd_dict[server_handler] = []
+            try:
+                for fd in fd_list:
+                    self._selector.register(fd, selectors.EVENT_READ, server_handler)
+                    self._server_handler_fd_dict[server_handler].append(fd)
+            except (KeyError, ValueError, OSError):
+                self._logger.error(
+                    self._logger_system.set_logger_rc_code(
+                        "Can not register the file descriptors {} of the server handler {}.".format(
+                            fd_list, server_handler.handler_id)))
+                return RcCode.FAILURE
+
+        # Run the session later if it has the work which does not wait for the input
+        timeout = server_handler.get_wait_timeout()
+        if timeout is not None and retry_interval is not None:
+            timeout = max(timeout, retry_interval)
+        if timeout is None:
+            self._server_handler_deadline_dict.pop(server_handler, None)
+        else:
+            self._server_handler_deadline_dict[server_handler] = time.monotonic() + timeout
+        return RcCode.SUCCESS
+
+    def _remove_server_handler_event(self, server_handler):
+        if server_handler not in self._server_handler_fd_dict:
+            return
+        for fd in self._server_handler_fd_dict.pop(server_handler):
+            self._selector.unregister(fd)
+        self._server_handler_deadline_dict.pop(server_handler, None)
+
+    def _close_server_handler(self, server_handler):
+        # Stop waiting for the session before its sockets are closed
+        self._remove_server_handler_event(server_handler)
+        server_handler.shutdown = True
+        if not server_handler.clear:
+            self._logger.info(
+                self._logger_system.set_logger_rc_code(
+                    "server handler {} has stopped.".format(server_handler.handler_id)))
+            server_handler.close_client()
+
+    def _process_server_handler(self, server_handler):
+        if server_handler not in self._server_handler_fd_dict:
+            # The session has been deleted
+            return
+        self._server_handler_deadline_dict.pop(server_handler, None)
+        if server_handler.shutdown or server_handler.is_channel_closed():
+            self._close_server_handler(server_handler)
+            return
+        if not server_handler.running or not server_handler.complete:
+            return
+
+        retry_interval = None
+        rc = server_handler.handler()
+        if rc == RcCode.EXIT_PROCESS:
+            self._close_server_handler(server_handler)
+            return
+        elif rc != RcCode.SUCCESS:
+            self._logger.error(
+                self._logger_system.set_logger_rc_code(
+                    "server handler {} process event fail".format(server_handler.handler_id)))
+            retry_interval = SESSION_RETRY_INTERVAL
+
+        rc = self._update_server_handler_event(server_handler, retry_interval)
+        if rc != RcCode.SUCCESS:
+            self._close_server_handler(server_handler)
+
+
+class SshServerSubsystem(threading.Thread, _SshServerSessionEventLoop):
     def __init__(self, daemon_id, ssh_ip_addr, ssh_port_id_list, num_of_client, thread_stop_event):
         # Save the variable
         self._daemon_id = daemon_id
@@ -20,6 +166,7 @@ class SshServerSubsystem(threading.Thread):
         self._thread_stop_event = thread_stop_event
 
         threading.Thread.__init__(self, name="SshServerSubsystem_{}".format(self._daemon_id))
+        _SshServerSessionEventLoop.__init__(self)
 
         self._logger_system = LoggerSystem(self.name)
         self._logger = self._logger_system.get_logger()
@@ -27,11 +174,6 @@ class SshServerSubsystem(threading.Thread):
         # Server running status
         self.running = False
 
-        # {
-        #       ssh_port_id: EPOLL
-        # }
-        self._server_epoll_dict = {}
-
         # Store the server socket
         # {
         #       server_port_id: {
@@ -41,6 +183,12 @@ class SshServerSubsystem(threading.Thread):
         # }
         self._ssh_subsystem_sock = {}
 
+        # The listening sockets are registered to the same selector as the sessions
+        # {
+        #       socket_fd: ssh_port_id
+        # }
+        self._server_socket_fd_dict = {}
+
         # Save the socket information
         # {
         #       ssh_port_id: [ssh_server_handler1, ...]
@@ -111,29 +259,46 @@ class SshServerSubsystem(threading.Thread):
         server_handler_list = self._server_handler_dict[server_port_id]
         count = 0
         for server_handler in server_handler_list:
-            if not server_handler.init:
-                del_it = False
-                if server_handler.clear:
-                    del_it = True
-                elif server_handler.started and server_handler.running and force:
-                    server_handler.running = False
-                    del_it = True
-                if del_it:
-                    server_handler.join()
-                    server_handler_list.remove(server_handler)
-                    break
+            # The handshake may fail before the channel is opened, so the closed handler is removed at any time
+            del_it = False
+            if server_handler.clear:
+                del_it = True
+            elif not server_handler.init and server_handler.started and server_handler.running and force:
+                server_handler.running = False
+                del_it = True
+            if del_it:
+                server_handler_list.remove(server_handler)
+                break
             count = count + 1
             if count >= max_ssh_server_handler:
                 break
 
-    def _process_server_socket_event(self, server_epoll):
-        raise NotImplemented
-    
+    def _process_server_socket_event(self, server_port_id):
+        raise NotImplementedError
+
+    def _process_server_handler_event(self, wakeup, ready_handler_set):
+        raise NotImplementedError
+
+    def _submit_handshake(self, server_handler, client_addr):
+        # The handshake is executed by the shared executor. The rejected connection is closed at once.
+        rc = self._ssh_server_mgr_dict["ssh_handshake_executor"].submit_handshake(server_handler, client_addr[0])
+        if rc != RcCode.SUCCESS:
+            _, statistics_dict = self._ssh_server_mgr_dict["ssh_handshake_executor"].get_statistics()
+            self._logger.warning(
+                self._logger_system.set_logger_rc_code(
+                    "Reject the client {}. Handshake statistics: {}".format(client_addr, statistics_dict), rc=rc))
+            server_handler.close_client()
+        return rc
+
+    def stop_subsystem(self):
+        self.running = False
+        self.wakeup()
+
     def clean_subsystem(self):
-        # Main process has stop, clean the server epoll and socket.
+        # Main process has stop, clean the server selector and socket.
         for ssh_port_id in self._ssh_port_id_list:
+            self._selector.unregister(self._ssh_subsystem_sock[ssh_port_id]["socket_fd"])
             self._ssh_subsystem_sock[ssh_port_id]["socket"].close()
-            self._server_epoll_dict[ssh_port_id].unregister(self._ssh_subsystem_sock[ssh_port_id]["socket_fd"])
         return RcCode.SUCCESS
 
     def run(self):
@@ -152,70 +317,91 @@ class SshServerSubsystem(threading.Thread):
         self._logger.info(
                 self._logger_system.set_logger_rc_code("SSH subserver {} is running.........".format(self._daemon_id)))
         try:
-            # Create epoll to monitor server list
+            # Monitor all the listening sockets by a single selector
             for ssh_port_id in self._ssh_port_id_list:
-                server_epoll = select.epoll()
-                server_epoll.register(self._ssh_subsystem_sock[ssh_port_id]["socket_fd"], select.EPOLLIN)
-                self._server_epoll_dict[ssh_port_id] = server_epoll
+                socket_fd = self._ssh_subsystem_sock[ssh_port_id]["socket_fd"]
+                self._selector.register(socket_fd, selectors.EVENT_READ, ssh_port_id)
+                self._server_socket_fd_dict[socket_fd] = ssh_port_id
 
-            # Main process to handle the client event
+            # Main process to handle the client event. The polling interval only limits how long the finished
+            # sessions are kept before they are cleaned.
             while self.running:
-                for ssh_port_id in self._ssh_port_id_list:
-                    rc = self._process_server_socket_event(ssh_port_id)
+                wakeup, key_list, ready_handler_set = self._wait_event(self._polling_interval)
+                for key in key_list:
+                    rc = self._process_server_socket_event(self._server_socket_fd_dict[key.fd])
                     if rc != RcCode.SUCCESS:
                         self.running = False
+                rc = self._process_server_handler_event(wakeup, ready_handler_set)
+                if rc != RcCode.SUCCESS:
+                    self.running = False
+                for ssh_port_id in self._ssh_port_id_list:
                     self._clean_client(ssh_port_id)
         except OSError:
             self._logger.error(
                 self._logger_system.set_logger_rc_code("Socket error occurs."))
 
 
-class _SshServerSubSystemWorker(threading.Thread, LoggerSystem):
+class _SshServerSubSystemWorker(threading.Thread, LoggerSystem, _SshServerSessionEventLoop):
+    # The worker sleeps until one of its sessions has the event. The subsystem wakes up the worker when it adds or
+    # deletes a session.
     def __init__(self, work_id):
         self._work_id = work_id
 
         threading.Thread.__init__(self)
+        _SshServerSessionEventLoop.__init__(self)
         self.name = "SshServerSubSystemWorker_{}".format(self._work_id)
 
         self._logger_system = LoggerSystem(self.name)
         self._logger = self._logger_system.get_logger()
 
         self._server_handler_list = []
-        self._server_handler_list_lock = threading.Lock()
         self._running = False
 
+        # The sessions which are added or deleted by the subsystem. They are applied by the worker.
+        # [(server_handler, add), ...]
+        self._server_handler_update_list = []
+        self._server_handler_update_list_lock = threading.Lock()
+
     def add_server_handler(self, server_handler):
-        with self._server_handler_list_lock:
-            self._server_handler_list.append(server_handler)
+        with self._server_handler_update_list_lock:
+            self._server_handler_update_list.append((server_handler, True))
             self._logger.info(self._logger_system.set_logger_rc_code("Add the new task"))
             server_handler.in_queue = True
+        self.wakeup()
         return RcCode.SUCCESS
 
     def delete_server_handler(self, server_handler):
-        with self._server_handler_list_lock:
-            self._server_handler_list.remove(server_handler)
+        with self._server_handler_update_list_lock:
+            self._server_handler_update_list.append((server_handler, False))
             self._logger.info(self._logger_system.set_logger_rc_code("Delete the task"))
+        self.wakeup()
         return RcCode.SUCCESS
 
+    def _update_server_handler_list(self):
+        with self._server_handler_update_list_lock:
+            server_handler_update_list = self._server_handler_update_list
+            self._server_handler_update_list = []
+        for server_handler, add in server_handler_update_list:
+            if add:
+                if server_handler not in self._server_handler_list:
+                    self._server_handler_list.append(server_handler)
+                    self._add_server_handler_event(server_handler)
+            elif server_handler in self._server_handler_list:
+                self._server_handler_list.remove(server_handler)
+                self._remove_server_handler_event(server_handler)
+
     def run(self):
         self._logger_system.init_logger_system()
         self._running = True
         while self._running:
-            for server_handler in self._server_handler_list:
-                if server_handler.shutdown:
-                    if not server_handler.clear:
-                        self._logger.info(
-                            self._logger_system.set_logger_rc_code(
-                                "server handler {} has stopped.".format(server_handler.handler_id)))
-                        server_handler.close_client()
-                elif server_handler.running and server_handler.complete:
-                    rc = server_handler.handler()
-                    if rc == RcCode.EXIT_PROCESS:
-                        server_handler.shutdown = True
-                    elif rc != RcCode.SUCCESS:
-                        self._logger.error("server handler {} process event fail".format(server_handler.handler_id))
-                        break
-            time.sleep(0.01)
+            # Wait until a session is readable or has to run
+            wakeup, _, ready_handler_set = self._wait_event()
+            if wakeup:
+                self._update_server_handler_list()
+            for server_handler in ready_handler_set:
+                self._process_server_handler(server_handler)
+                if server_handler.clear and server_handler in self._server_handler_list:
+                    self._server_handler_list.remove(server_handler)
 
 
 MAX_WORKER_GROUP = 8
@@ -228,7 +414,7 @@ class SshServerPassWdAuthSubSystem(SshServerSubsystem):
         SshServerSubsystem.__init__(self, daemon_id, ssh_ip_addr, ssh_port_list, num_of_client, thread_stop_event)
         self.name = "SshServerPassWdAuthSubSystem_{}".format(daemon_id)
 
-        self._ssh_key_handler = SshKeyHandler('~/.ssh/id_rsa', self._logger_system)
+        self._ssh_key_handler = self._ssh_server_mgr_dict["ssh_key_handler"]
 
         self._logger_system = LoggerSystem(self.name)
         self._logger = self._logger_system.get_logger()
@@ -242,44 +428,45 @@ class SshServerPassWdAuthSubSystem(SshServerSubsystem):
         self._handler_num = 0
 
     def _process_server_socket_event(self, server_port_id):
-        # Process the server event
-        events = self._server_epoll_dict[server_port_id].poll(timeout=self._polling_interval)
-        for file_no, _ in events:
-            if self._ssh_subsystem_sock[server_port_id]["socket_fd"] == file_no:
-                # A new client wants to connect the sever. Create an SSH server handler for this client
-                client_sock = self._ssh_subsystem_sock[server_port_id]["socket"].accept()
-                self._logger.warning(
-                    self._logger_system.set_logger_rc_code(
-                        "A new client arrived. {}".format(client_sock[0].getpeername())))
-
-                # Create the SSH server handler to execute SSH connection
-                server_handler = SshServerPassWdAuthSessionHandler(self._handler_num,
-                                                                  self._ssh_server_mgr_dict,
-                                                                  client_sock[0],
-                                                                  self._ssh_key_handler,
-                                                                  ssh_authenticator_server_class=SshServerPassWdAuthenticator)
-                server_handler.start()
-                self._handler_num = self._handler_num + 1
-                self._logger.warning(
-                    self._logger_system.set_logger_rc_code(
-                        "A new thread to service the client {}".format(client_sock[0].getpeername())))
+        # A new client wants to connect the sever. Create an SSH server handler for this client
+        client_sock = self._ssh_subsystem_sock[server_port_id]["socket"].accept()
+        self._logger.warning(
+            self._logger_system.set_logger_rc_code(
+                "A new client arrived. {}".format(client_sock[0].getpeername())))
+
+        # Create the SSH server handler to execute SSH connection. The handler wakes up the subsystem when the
+        # handshake finishes.
+        server_handler = SshServerPassWdAuthSessionHandler(self._handler_num,
+                                                          self._ssh_server_mgr_dict,
+                                                          client_sock[0],
+                                                          self._ssh_key_handler,
+                                                          ssh_authenticator_server_class=SshServerPassWdAuthenticator,
+                                                          event_notify_func=self.wakeup)
+        self._handler_num = self._handler_num + 1
+        rc = self._submit_handshake(server_handler, client_sock[1])
+        if rc != RcCode.SUCCESS:
+            return RcCode.SUCCESS
+        self._logger.warning(
+            self._logger_system.set_logger_rc_code(
+                "Queue the handshake of the client {}".format(client_sock[1])))
 
-                # Save the SSH server handler and wait SSH connection completely
-                self._server_handler_dict[server_port_id].append(server_handler)
-                continue
+        # Save the SSH server handler and wait SSH connection completely
+        self._server_handler_dict[server_port_id].append(server_handler)
+        return RcCode.SUCCESS
 
-        # Process the SSH event
+    def _process_server_handler_event(self, wakeup, ready_handler_set):
+        # The sessions are processed by the workers. Hand over the sessions which finish the handshake.
         for server_port_id in self._server_handler_dict:
             server_handler_list = self._server_handler_dict[server_port_id]
             exit_flag = False
             for server_handler in server_handler_list:
                 if server_handler.running and server_handler.complete:
-                    if not server_handler.is_alive() and not server_handler.in_queue:
+                    if not server_handler.in_queue:
                         rc = self._worker_list[self._next_worker_id].add_server_handler(server_handler)
                         if rc != RcCode.SUCCESS:
                             exit_flag = True
                             break
-                        self._next_worker_id = (self._next_worker_id + 1) % 8
+                        self._next_worker_id = (self._next_worker_id + 1) % MAX_WORKER_GROUP
                 elif server_handler.shutdown:
                     rc = self._worker_list[self._next_worker_id].delete_server_handler(server_handler)
                     if rc != RcCode.SUCCESS:
@@ -288,9 +475,9 @@ class SshServerPassWdAuthSubSystem(SshServerSubsystem):
                     server_handler.close_client()
             if exit_flag:
                 break
-            
+
         return RcCode.SUCCESS
-        
+
     def clean_subsystem(self):
         # Close the server socket
         rc = SshServerSubsystem.clean_subsystem(self)
@@ -314,7 +501,7 @@ class SshServerNoneAuthSubSystem(SshServerSubsystem):
         SshServerSubsystem.__init__(self, daemon_id, ssh_ip_addr, ssh_port_list, num_of_client, thread_stop_event)
         self.name = "SshServerNoneAuthSubSystem_{}".format(daemon_id)
 
-        self._ssh_key_handler = SshKeyHandler('~/.ssh/id_rsa', self._logger_system)
+        self._ssh_key_handler = self._ssh_server_mgr_dict["ssh_key_handler"]
 
         self._logger_system = LoggerSystem(self.name)
         self._logger = self._logger_system.get_logger()
@@ -322,52 +509,49 @@ class SshServerNoneAuthSubSystem(SshServerSubsystem):
         self._handler_num = 0
 
     def _process_server_socket_event(self, server_port_id):
-        # Process the server event
-        events = self._server_epoll_dict[server_port_id].poll(timeout=self._polling_interval)
-        for file_no, _ in events:
-            if self._ssh_subsystem_sock[server_port_id]["socket_fd"] == file_no:
-                # A new client wants to connect the sever. Create a SSH server handler for this client
-                client_sock = self._ssh_subsystem_sock[server_port_id]["socket"].accept()
-                self._logger.info(
-                    self._logger_system.set_logger_rc_code(
-                        "A new client arrived. {}".format(client_sock[0].getpeername())))
-
-                # Create the SSH server handler to execute SSH connection
-                server_handler = SshServerNoneAuthSessionHandler(self._handler_num,
-                                                                 self._ssh_server_mgr_dict,
-                                                                 server_port_id,
-                                                                 client_sock[0],
-                                                                 self._ssh_key_handler,
-                                                                 ssh_authenticator_server_class=SshServerNoneAuthenticator)
-                server_handler.start()
-                self._handler_num = self._handler_num + 1
-                self._logger.info(
-                    self._logger_system.set_logger_rc_code(
-                        "A new thread to service the client {}".format(client_sock[0].getpeername())))
+        # A new client wants to connect the sever. Create a SSH server handler for this client
+        client_sock = self._ssh_subsystem_sock[server_port_id]["socket"].accept()
+        self._logger.info(
+            self._logger_system.set_logger_rc_code(
+                "A new client arrived. {}".format(client_sock[0].getpeername())))
+
+        # Create the SSH server handler to execute SSH connection. The handler wakes up the subsystem when the
+        # handshake finishes.
+        server_handler = SshServerNoneAuthSessionHandler(self._handler_num,
+                                                         self._ssh_server_mgr_dict,
+                                                         server_port_id,
+                                                         client_sock[0],
+                                                         self._ssh_key_handler,
+                                                         ssh_authenticator_server_class=SshServerNoneAuthenticator,
+                                                         event_notify_func=self.wakeup)
+        self._handler_num = self._handler_num + 1
+        rc = self._submit_handshake(server_handler, client_sock[1])
+        if rc != RcCode.SUCCESS:
+            return RcCode.SUCCESS
+        self._logger.info(
+            self._logger_system.set_logger_rc_code(
+                "Queue the handshake of the client {}".format(client_sock[1])))
 
-                # Save the SSH server handler and wait SSH connection completely
-                self._server_handler_dict[server_port_id].append(server_handler)
-                continue
+        # Save the SSH server handler and wait SSH connection completely
+        self._server_handler_dict[server_port_id].append(server_handler)
+        return RcCode.SUCCESS
 
-        # Process the SSH event
+    def _process_server_handler_event(self, wakeup, ready_handler_set):
+        # Wait for the events of the sessions which finish the handshake. The handshake wakes up the subsystem, and
+        # the sessions are also checked when the subsystem is idle.
         for server_port_id in self._server_handler_dict:
+            if not wakeup and len(ready_handler_set) != 0:
+                break
             server_handler_list = self._server_handler_dict[server_port_id]
             for server_handler in server_handler_list:
-                if server_handler.shutdown:
-                    if not server_handler.clear:
-                        self._logger.info(
-                            self._logger_system.set_logger_rc_code(
-                                "server handler {} has stopped.".format(server_handler.handler_id)))
-                        server_handler.close_client()
-                elif server_handler.running and server_handler.complete:
-                    rc = server_handler.handler()
-                    if rc == RcCode.EXIT_PROCESS:
-                        server_handler.shutdown = True
-                    elif rc != RcCode.SUCCESS:
-                        self._logger.error(
-                            self._logger_system.set_logger_rc_code(
-                                "server handler {} process event fail".format(server_handler.handler_id)))
-                        break
+                if (server_handler.running and server_handler.complete and not server_handler.shutdown and
+                        server_handler not in self._server_handler_fd_dict):
+                    self._add_server_handler_event(server_handler)
+                    ready_handler_set.add(server_handler)
+
+        # Process the SSH event
+        for server_handler in ready_handler_set:
+            self._process_server_handler(server_handler)
         return RcCode.SUCCESS
 
     def clean_subsystem(self):
@@ -380,5 +564,6 @@ class SshServerNoneAuthSubSystem(SshServerSubsystem):
         for server_port_id in self._server_handler_dict:
             server_handler_list = self._server_handler_dict[server_port_id]
             for server_handler in server_handler_list:
+                self._remove_server_handler_event(server_handler)
                 server_handler.close_client()
         return RcCode.SUCCESS